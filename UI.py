@@ -1,10 +1,61 @@
 import pygame
 import math
+from collections import OrderedDict
+import numpy as np
 pygame.init()
 pygame.font.init()
 
+FONT_NAME = "Algerian"
 FONT_SIZE = 36
-FONT = pygame.font.SysFont("Algerian", FONT_SIZE)
+RENDER_CACHE_SIZE = 256
+
+
+class RenderCache:
+    '''
+    Fonts, rendered text and scaled images for the UI, shared by every widget.
+    SysFont scans the system font list and scale and render allocate a new surface,
+    so each one is only done the first time a key is asked for.
+    The least recently used entries are dropped once there are more than `capacity`
+    '''
+
+    def __init__(self, capacity=RENDER_CACHE_SIZE):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, make):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = self.entries[key] = make()
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+        return entry
+
+    def font(self, size, name=FONT_NAME):
+        return self.get(("font", name, size), lambda: pygame.font.SysFont(name, size))
+
+    def text(self, text, size, colour, name=FONT_NAME):
+        return self.get(("text", text, size, colour, name),
+                        lambda: self.font(size, name).render(text, True, colour))
+
+    def scaled(self, image, scale):
+        """
+        The image scaled by `scale`, keyed by the surface itself so it must not be drawn on afterwards.
+        """
+        size = (int(image.get_width() * scale), int(image.get_height() * scale))
+        return self.get(("scaled", image, size), lambda: pygame.transform.scale(image, size))
+
+
+RENDER_CACHE = RenderCache()
+FONT = RENDER_CACHE.font(FONT_SIZE)
 button_sprite = pygame.image.load("./assets/UI/button.png")
 BUTTON_SCALE = 2  # Default scale
 HOVER_SCALE = 2.2  # Scale when hovered
@@ -37,6 +88,114 @@ def get_background():
     return bg_images, bg_width
 
 
+def is_opaque(surface):
+    if not surface.get_flags() & pygame.SRCALPHA:
+        return True
+    alpha = pygame.surfarray.pixels_alpha(surface)
+    opaque = (alpha == 255).all()
+    del alpha
+    return opaque
+
+
+def is_horizontally_uniform(surface):
+    """
+    True if every column of the surface is the same, so where it is drawn along x does not matter.
+    """
+    pixels = pygame.surfarray.pixels3d(surface)
+    alpha = pygame.surfarray.pixels_alpha(surface) if surface.get_flags() & pygame.SRCALPHA else None
+    uniform = (pixels == pixels[:1]).all() and (alpha is None or (alpha == alpha[:1]).all())
+    del pixels, alpha
+    return uniform
+
+
+def to_colorkey(surface):
+    """
+    Surfaces whose pixels are either fully opaque or fully clear blit faster with a colorkey
+    and RLE than with per pixel alpha. Returns None if the surface has partial alpha
+    or uses every candidate key colour.
+    """
+    alpha = pygame.surfarray.pixels_alpha(surface)
+    binary = ((alpha == 0) | (alpha == 255)).all()
+    del alpha
+    if not binary:
+        return None
+    pixels = pygame.surfarray.array3d(surface)
+    used = set(np.unique(pixels.reshape(-1, 3) @ np.array([1 << 16, 1 << 8, 1])).tolist())
+    for key in ((255, 0, 255), (0, 255, 255), (1, 2, 3)):
+        if (key[0] << 16 | key[1] << 8 | key[2]) not in used:
+            keyed = pygame.Surface(surface.get_size()).convert()
+            keyed.fill(key)
+            keyed.blit(surface, (0, 0))
+            keyed.set_colorkey(key, pygame.RLEACCEL)
+            return keyed
+    return None
+
+
+class ParallaxBackground:
+    '''
+    The plx layers drawn back to front, each one scrolling at its own speed and wrapping forever.
+    Only the copies of a layer that are on screen get blitted, an opaque run of far layers
+    that look the same at any x offset is composited into the first layer that does not,
+    and layers without partial alpha are drawn with a colorkey
+    '''
+    BASE_SPEED = 0.1
+    SPEED_STEP = 0.2
+
+    def __init__(self, bg_images):
+        self.width = bg_images[0].get_width()
+        # same float steps as the old loop, so layers land on the same pixels
+        speeds = []
+        speed = self.BASE_SPEED
+        for _ in bg_images:
+            speeds.append(speed)
+            speed += self.SPEED_STEP
+
+        self.layers = list(zip(bg_images, speeds))
+        self.composited = 0
+        if is_opaque(bg_images[0]):
+            far = 0
+            while far < len(bg_images) - 1 and is_horizontally_uniform(bg_images[far]):
+                far += 1
+            if far:
+                composite = pygame.Surface(bg_images[far].get_size()).convert()
+                for image in bg_images[:far + 1]:
+                    composite.blit(image, (0, 0))
+                self.layers = [(composite, speeds[far])] + self.layers[far + 1:]
+                self.composited = far + 1
+
+        for i, (surface, speed) in enumerate(self.layers):
+            if surface.get_flags() & pygame.SRCALPHA:
+                self.layers[i] = (to_colorkey(surface) or surface, speed)
+
+    def draw(self, win, scroll):
+        screen_width = win.get_width()
+        width = self.width
+        for surface, speed in self.layers:
+            offset = scroll * speed
+            # the copy under the left edge of the window, then the ones after it until the right edge
+            copy = math.floor(offset / width)
+            while True:
+                x = int(copy * width - offset)
+                if x >= screen_width:
+                    break
+                win.blit(surface, (x, 0))
+                copy += 1
+
+
+BACKGROUND = None
+
+
+def get_parallax_background():
+    """
+    The parallax background, loaded and scaled once for the whole run.
+    """
+    global BACKGROUND
+    if BACKGROUND is None:
+        bg_images, _ = get_background()
+        BACKGROUND = ParallaxBackground(bg_images)
+    return BACKGROUND
+
+
 class Button:
     def __init__(self, x, y, text, image, scale=BUTTON_SCALE):
         self.x = x
@@ -50,25 +209,28 @@ class Button:
 
     def draw(self, surface):
         """
-        Draws the button and its text on the given surface.
+        Draws the button and its text on the given surface, returns the area it covered.
         """
         # Enlarge the button if hovered
         scale = self.hover_scale if self.is_hovered else self.default_scale
-        scaled_image = pygame.transform.scale(
-            self.image, (int(self.image.get_width() * scale), int(self.image.get_height() * scale))
-        )
+        scaled_image = RENDER_CACHE.scaled(self.image, scale)
         scaled_rect = scaled_image.get_rect(center=(self.x, self.y))
         surface.blit(scaled_image, scaled_rect)
 
         text_font_size = int(FONT_SIZE * scale / BUTTON_SCALE)  # Scale the font size
-        # scaled_font = pygame.font.Font(None, text_font_size)  # Create a scaled font
-        scaled_font = pygame.font.SysFont("Algerian", text_font_size)
-        text_surface = scaled_font.render(self.text, True, (255, 255, 255))  # White text
+        text_surface = RENDER_CACHE.text(self.text, text_font_size, WHITE)
         text_rect = text_surface.get_rect(center=(self.x, self.y))
         surface.blit(text_surface, text_rect)
 
         # Update the rect for hover detection
         self.rect = scaled_rect
+        return scaled_rect.union(text_rect)
+
+    def state(self):
+        """
+        Everything draw() depends on that can change, see MenuPainter.
+        """
+        return self.is_hovered
 
     def check_hover(self):
         """
@@ -110,14 +272,18 @@ class Slider:
 
     def draw(self, surface):
         """
-        Draws the slider bar, handle, and current value.
+        Draws the slider bar, handle, and current value, returns the area it covered.
         """
         pygame.draw.rect(surface, GRAY, self.slider_rect)
         pygame.draw.rect(surface, BLUE, self.handle_rect)
 
-        text_surface = FONT.render(f"{int(self.value)}", True, (0, 0, 0))
+        text_surface = RENDER_CACHE.text(f"{int(self.value)}", FONT_SIZE, (0, 0, 0))
         text_rect = text_surface.get_rect(center=(self.handle_rect.centerx, self.handle_rect.top - 20))
         surface.blit(text_surface, text_rect)
+        return self.slider_rect.union(self.handle_rect).union(text_rect)
+
+    def state(self):
+        return self.handle_rect.x, int(self.value)
 
     def handle_event(self, event, loudness_threshold):
         """
@@ -142,6 +308,83 @@ class Slider:
 
         return loudness_threshold
 
+class Label:
+    '''
+    Text that never changes, drawn at a fixed position
+    '''
+
+    def __init__(self, surface, position):
+        self.surface = surface
+        self.position = position
+
+    def draw(self, surface):
+        return surface.blit(self.surface, self.position)
+
+    def state(self):
+        return None
+
+
+class MenuPainter:
+    '''
+    Draws menu widgets over a still background and only repaints what changed.
+    A widget needs draw(surface), returning the rect it covered, and state(), anything
+    its drawing depends on. When a state changes, the old rect is restored from the
+    background, the widget is drawn again and only those rects go to the display
+    '''
+
+    def __init__(self, window, background, widgets):
+        self.window = window
+        self.background = background
+        self.widgets = list(widgets)
+        self.states = {}
+        self.rects = {}
+        self.idle = False
+
+    def events(self):
+        """
+        The pending events. If the last paint() had nothing to do this sleeps until the
+        next event comes in, instead of spinning at the frame rate.
+        """
+        if self.idle:
+            return [pygame.event.wait()] + pygame.event.get()
+        return pygame.event.get()
+
+    def paint(self):
+        """
+        Brings the display up to date, returns False (and goes idle) if nothing changed.
+        """
+        if not self.rects:
+            self.window.blit(self.background, (0, 0))
+            for widget in self.widgets:
+                self.rects[widget] = widget.draw(self.window)
+                self.states[widget] = widget.state()
+            pygame.display.update()
+            self.idle = False
+            return True
+
+        changed = [widget for widget in self.widgets if widget.state() != self.states[widget]]
+        self.idle = not changed
+        if not changed:
+            return False
+
+        dirty = [self.rects[widget] for widget in changed]
+        for rect in dirty:
+            # put the background back and redraw whatever else was under the old rect
+            self.window.set_clip(rect)
+            self.window.blit(self.background, rect, rect)
+            for widget in self.widgets:
+                if widget not in changed and self.rects[widget].colliderect(rect):
+                    widget.draw(self.window)
+        self.window.set_clip(None)
+
+        for widget in changed:
+            self.rects[widget] = widget.draw(self.window)
+            self.states[widget] = widget.state()
+            dirty.append(self.rects[widget])
+        pygame.display.update(dirty)
+        return True
+
+
 class Icon:
     """
     Icon (mainly used for microphone)
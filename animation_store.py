@@ -0,0 +1,174 @@
+"""
+Animation counters of a level in NumPy arrays
+
+Every animated object used to keep its own animation_count and work out its
+frame in its own loop(), one Python call per object per tick. An
+AnimationStore keeps the counter, frame delay, frame count and current frame
+index of every animated object of a level in arrays, and step() advances all
+of them at once. An object only holds its slot and reads its frame from the
+store when it is drawn.
+
+The frame a slot shows after step() is (count // delay) % frames, and the
+counter goes back to 0 once count // delay passes the frame count, the same
+rule the old loop() methods used. Stopped slots keep their frame.
+
+That makes every animation periodic, (frames + 1) * delay ticks long, so a
+slot does not have to be stepped every tick to show the right frame. Culled
+slots (decorations) are only stepped while they are on screen, step() is
+told which ones are. A culled slot coming back into view is fast-forwarded
+over the ticks it missed in one go and shows the frame it would have shown.
+"""
+import numpy as np
+
+
+class AnimationStore:
+    '''
+    Counters, delays, frame counts and frame indices of many animations, one slot per object
+    '''
+
+    def __init__(self, capacity=16):
+        self.count = np.zeros(capacity, dtype=np.int32)
+        self.delay = np.ones(capacity, dtype=np.int32)
+        self.length = np.ones(capacity, dtype=np.int32)
+        self.index = np.zeros(capacity, dtype=np.int32)
+        self.running = np.zeros(capacity, dtype=bool)
+        self.culled = np.zeros(capacity, dtype=bool)
+        # the tick each slot was last brought up to
+        self.stepped = np.zeros(capacity, dtype=np.int64)
+        # the frame tuple each slot is playing, surfaces stay in Python
+        self.frames = []
+        # slots given back by remove(), add() hands them out again before growing
+        self.free = []
+        self.tick = 0
+        # the slots stepped every tick whether they are on screen or not
+        self.always = np.zeros(0, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def grow(self):
+        capacity = len(self.count) * 2
+        for name in ("count", "delay", "length", "index", "running", "culled", "stepped"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, frames, delay, running=True, culled=False):
+        """
+        Gives an animation a slot and returns it, the slot starts on the first frame.
+        A culled slot only moves on while step() is told it is visible.
+        """
+        if self.free:
+            slot = self.free.pop()
+            self.frames[slot] = tuple(frames)
+            self.count[slot] = self.index[slot] = 0
+        else:
+            slot = len(self.frames)
+            if slot == len(self.count):
+                self.grow()
+            self.frames.append(tuple(frames))
+        self.delay[slot] = delay
+        self.length[slot] = len(frames)
+        self.running[slot] = running
+        self.culled[slot] = culled
+        self.stepped[slot] = self.tick
+        if not culled:
+            self.always = np.append(self.always, slot)
+        return slot
+
+    def take(self, other, slot):
+        """
+        Moves a slot of another store into this one, on the frame it is on, and returns the new slot.
+        """
+        other.catch_up(np.array([slot]))
+        new = self.add(other.frames[slot], other.delay[slot], other.running[slot], other.culled[slot])
+        self.count[new], self.index[new] = other.count[slot], other.index[slot]
+        other.remove(slot)
+        return new
+
+    def remove(self, slot):
+        """
+        Gives a slot back, the object that had it must not read its frame any more.
+        """
+        self.frames[slot] = ()
+        self.running[slot] = False
+        self.length[slot] = 1
+        if not self.culled[slot]:
+            self.always = self.always[self.always != slot]
+        self.culled[slot] = True
+        self.free.append(slot)
+
+    def play(self, slot, frames):
+        """
+        Switches a slot to other frames and runs it, the counter carries on where it was.
+        """
+        self.catch_up(np.array([slot]))
+        self.frames[slot] = tuple(frames)
+        self.length[slot] = len(frames)
+        self.running[slot] = True
+        # fewer frames than before, stay on one that exists until the next step
+        self.index[slot] %= len(frames)
+
+    def stop(self, slot):
+        self.catch_up(np.array([slot]))
+        self.running[slot] = False
+
+    def fast_forward(self, slots, ticks):
+        """
+        Moves the counters of the running ones of `slots` on by `ticks` (one per slot), frames are left alone.
+        """
+        ticks = np.where(self.running[slots], ticks, 0)
+        if not ticks.any():
+            return
+        count, delay, length = self.count[slots], self.delay[slots], self.length[slots]
+        # the first tick as step() does it, the counter may be past the end after play() changed the frames
+        first = count + 1
+        first[first // delay > length] = 0
+        # the rest wrap around the period
+        self.count[slots] = np.where(ticks > 0, (first + ticks - 1) % ((length + 1) * delay), count)
+
+    def catch_up(self, slots):
+        """
+        Brings slots up to the current tick, before they are changed outside of step().
+        """
+        self.fast_forward(slots, self.tick - self.stepped[slots])
+        self.stepped[slots] = self.tick
+
+    def step(self, visible=None):
+        """
+        Advances every running slot by one tick. `visible` are the culled slots on screen,
+        None steps every slot, culled or not.
+        """
+        self.tick += 1
+        if visible is None:
+            slots = slice(0, len(self.frames))
+        else:
+            slots = np.concatenate((self.always, np.asarray(visible, dtype=np.intp)))
+        # culled slots coming back into view make up for the ticks they were away first
+        behind = self.tick - 1 - self.stepped[slots]
+        if behind.any():
+            self.fast_forward(slots, behind)
+
+        running = self.running[slots]
+        count, delay, length = self.count[slots], self.delay[slots], self.length[slots]
+        self.index[slots] = np.where(running, (count // delay) % length, self.index[slots])
+        count = count + running
+        count[count // delay > length] = 0
+        self.count[slots] = count
+        self.stepped[slots] = self.tick
+
+    def frame(self, slot):
+        return self.frames[slot][self.index[slot]]
+
+    def snapshot(self):
+        size = len(self.frames)
+        return (self.count[:size].copy(), self.index[:size].copy(), self.length[:size].copy(),
+                self.running[:size].copy(), self.stepped[:size].copy(), self.tick, list(self.frames))
+
+    def restore(self, state):
+        count, index, length, running, stepped, self.tick, frames = state
+        size = len(frames)
+        self.count[:size], self.index[:size], self.length[:size], self.running[:size] = count, index, length, running
+        self.stepped[:size] = stepped
+        self.frames[:] = frames
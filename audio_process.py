@@ -0,0 +1,195 @@
+"""
+Audio capture in a child process
+
+In the default thread mode the audio callback and the level analysis run on
+a thread of the game process, so they take turns with the game loop for the
+GIL. In process mode (get_MIC.capture_mode = "process", or --audio-process)
+a child process opens the audio source, works out the Levels (voice onset
+included) of every CALLBACK_SIZE block and publishes them into a LevelsRing
+in shared memory.
+The game only reads the ring.
+
+The ring has one writer and never takes a lock. The writer fills the slot of
+the next frame, then bumps the sequence counter. A reader copies the frames
+between its last sequence number and the counter, then reads the counter
+again and drops any frame the writer could have overwritten meanwhile.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import get_MIC
+from audio_sources import SAMPLE_RATE, PyAudioSource, open_source
+from voice_detector import VoiceDetector
+
+# about 6 s of CALLBACK_SIZE blocks, far more than a frame ever has to catch up on
+RING_FRAMES = 1024
+# how long close() gives the child to stop before killing it
+STOP_TIMEOUT = 2
+
+
+class LevelsRing:
+    '''
+    Ring of Levels rows on a shared memory buffer, the first 8 bytes count every row ever written
+    '''
+
+    def __init__(self, buffer, frames=RING_FRAMES):
+        self.frames = frames
+        self.sequence = np.ndarray((1,), dtype=np.int64, buffer=buffer)
+        self.rows = np.ndarray((frames, len(get_MIC.Levels._fields)), dtype=np.float64, buffer=buffer, offset=8)
+
+    @staticmethod
+    def nbytes(frames=RING_FRAMES):
+        return 8 + frames * len(get_MIC.Levels._fields) * 8
+
+    def write(self, levels):
+        """
+        Only ever called from one process.
+        """
+        sequence = int(self.sequence[0])
+        self.rows[sequence % self.frames] = levels
+        self.sequence[0] = sequence + 1
+
+    def read(self, start):
+        """
+        Rows from sequence number `start` on that are still intact, and the sequence number to read from next.
+        """
+        end = int(self.sequence[0])
+        start = max(start, end - self.frames)
+        rows = self.rows[np.arange(start, end) % self.frames]
+        # the writer may have moved on while we copied, its next row goes over sequence `now - frames`
+        now = int(self.sequence[0])
+        return rows[max(0, now + 1 - self.frames - start):], end
+
+
+def combine(rows):
+    """
+    One Levels for a run of block rows, the same as analyse() on all of their samples
+    with the loudest window taken over whole blocks, and the first onset of any of them.
+    """
+    if len(rows) == 0:
+        return get_MIC.Levels(0.0, 0.0, 0.0, 0.0, 0.0)
+    peak, rms, loudness, start, end, onset = rows.T
+    onset = onset[onset > 0]
+    # every block has CALLBACK_SIZE samples, so the mean of the squares is the mean over the blocks
+    return get_MIC.Levels(float(peak.max()), float(np.sqrt(np.mean(rms ** 2))), float(loudness.max()),
+                          float(start[0]), float(end[-1]), float(onset[0]) if len(onset) else 0.0)
+
+
+def attach(name):
+    """
+    Opens the game's ring memory without handing it to this process's resource tracker,
+    which would unlink it when the child exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # before Python 3.13 attaching registers the memory like creating it does
+        memory = shared_memory.SharedMemory(name=name)
+        if os.name == "posix":
+            resource_tracker.unregister(memory._name, "shared_memory")
+        return memory
+
+
+def serve(name, spec=None):
+    """
+    Child process: captures `spec` into the ring at `name` until stdin is closed.
+    Prints "ready" once the source is open, or why it could not be opened.
+    """
+    memory = attach(name)
+    ring = LevelsRing(memory.buf)
+    stop = threading.Event()
+    detector = VoiceDetector()
+
+    def publish(block):
+        end = time.perf_counter()
+        levels = get_MIC.analyse(block, end - len(block) / SAMPLE_RATE, end)
+        triggers = detector.process(block, end)
+        ring.write(levels._replace(onset=triggers[0].time) if triggers else levels)
+
+    try:
+        source = open_source(spec)
+        if isinstance(source, PyAudioSource):
+            def callback(in_data, frame_count, time_info, flags):
+                publish(np.frombuffer(in_data, dtype=np.float32))
+                return None, source.pyaudio.paContinue
+            source.open(get_MIC.CALLBACK_SIZE, callback)
+        else:
+            threading.Thread(target=get_MIC.mic_thread, args=(source, stop, publish), daemon=True).start()
+    except (ImportError, OSError, ValueError) as e:
+        print(e, flush=True)
+        return
+    print("ready", flush=True)
+    # the game closes our stdin to stop us, or dies and it gets closed for it
+    sys.stdin.read()
+    stop.set()
+    # the pump may still be writing, the ring goes away with the process
+    source.close()
+
+
+class CaptureProcess:
+    '''
+    The game side of process mode: starts the child, reads the ring, stops it again
+    '''
+
+    def __init__(self, spec=None):
+        self.spec = spec
+        self.memory = None
+        self.process = None
+        self.ring = None
+        self.read_pos = 0
+
+    def start(self):
+        """
+        Starts the child and waits for its source, raises OSError if it cannot capture.
+        """
+        self.memory = shared_memory.SharedMemory(create=True, size=LevelsRing.nbytes())
+        self.ring = LevelsRing(self.memory.buf)
+        self.ring.sequence[0] = 0
+        # its own script rather than multiprocessing, which would import the game's __main__ (and open a window) again
+        args = [sys.executable, os.path.abspath(__file__), self.memory.name]
+        if self.spec is not None:
+            args.append(self.spec)
+        self.process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        status = self.process.stdout.readline().strip()
+        if status != "ready":
+            self.close()
+            raise OSError(status or "capture process did not start")
+        self.skip_pending()
+
+    def skip_pending(self):
+        self.read_pos = int(self.ring.sequence[0])
+
+    def read_levels(self):
+        """
+        Levels of every block published since the last call.
+        """
+        rows, self.read_pos = self.ring.read(self.read_pos)
+        return combine(rows)
+
+    def close(self):
+        if self.process is not None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process.stdout.close()
+            self.process = None
+        if self.memory is not None:
+            # the ring views have to go before the buffer can be closed
+            self.ring = None
+            self.memory.close()
+            self.memory.unlink()
+            self.memory = None
+
+
+if __name__ == "__main__":
+    # python audio_process.py NAME [SPEC], started by CaptureProcess
+    serve(*sys.argv[1:3])
@@ -0,0 +1,217 @@
+"""
+Audio sources get_MIC can listen to
+
+Every source hands out mono float32 blocks at SAMPLE_RATE through read(frames).
+Pick one with a spec string, from the SCREAM_FROG_AUDIO environment variable
+or the --audio flag:
+
+    mic                                   live microphone (default)
+    file:PATH                             WAV file (PCM 8/16/32 bit or float)
+    raw:PATH                              headerless float32 mono at SAMPLE_RATE
+    gen:silence
+    gen:bursts[:period=1,length=0.2,level=0.5,freq=300]
+    gen:ramp[:period=1,level=0.5,freq=300]
+"""
+import os
+import struct
+
+import numpy as np
+
+SAMPLE_RATE = 44100
+ENV_VAR = "SCREAM_FROG_AUDIO"
+DEFAULT_SPEC = "mic"
+
+
+class AudioSource:
+    '''
+    Base class, read() returns exactly `frames` samples (silence once a finite source runs out)
+    '''
+    # live sources block in read() at the speed of the hardware, the others answer at once
+    realtime = False
+    sample_rate = SAMPLE_RATE
+
+    def read(self, frames):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PyAudioSource(AudioSource):
+    '''
+    The live microphone through PyAudio, either blocking reads or callback mode
+    '''
+    realtime = True
+
+    def __init__(self):
+        # only the live source needs PyAudio, so machines without it can still use the others
+        import pyaudio
+        self.pyaudio = pyaudio
+        self.audio = pyaudio.PyAudio()
+        self.stream = None
+
+    def open(self, frames_per_buffer, callback=None):
+        self.stream = self.audio.open(format=self.pyaudio.paFloat32,
+                                      channels=1,
+                                      rate=self.sample_rate,
+                                      input=True,
+                                      frames_per_buffer=frames_per_buffer,
+                                      stream_callback=callback)
+        return self.stream
+
+    def read(self, frames):
+        if self.stream is None:
+            self.open(frames)
+        return np.frombuffer(self.stream.read(frames, exception_on_overflow=False), dtype=np.float32)
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+        self.audio.terminate()
+
+
+class ArraySource(AudioSource):
+    '''
+    Plays a (frames, channels) array, usually a read-only memmap so only the part being read is paged in
+    '''
+
+    def __init__(self, samples, rate, scale=1.0, bias=0.0, loop=False):
+        self.samples = samples
+        self.rate = rate
+        self.scale = scale
+        self.bias = bias
+        self.loop = loop
+        self.position = 0.0
+
+    def read(self, frames):
+        step = self.rate / self.sample_rate
+        indexes = (self.position + np.arange(frames) * step).astype(np.int64)
+        self.position += frames * step
+        total = len(self.samples)
+        if self.loop and total:
+            indexes %= total
+            self.position %= total
+        valid = indexes < total
+
+        block = np.zeros(frames, dtype=np.float32)
+        if valid.any():
+            chunk = np.asarray(self.samples[indexes[valid]], dtype=np.float32)
+            block[valid] = (chunk.mean(axis=1) - self.bias) * self.scale
+        return block
+
+
+def open_wav(path, loop=False):
+    """
+    Memory maps the data chunk of a WAV file, the wave module would read it all into memory.
+    """
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"{path} is not a WAV file")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = f.read(size)
+                f.seek(size & 1, 1)
+            elif chunk_id == b"data":
+                offset = f.tell()
+                break
+            else:
+                # chunks are padded to an even size
+                f.seek(size + (size & 1), 1)
+    if fmt is None:
+        raise ValueError(f"{path} has no fmt chunk")
+
+    format_tag, channels, rate, _, _, bits = struct.unpack_from("<HHIIHH", fmt)
+    if format_tag == 0xFFFE and len(fmt) >= 26:
+        # WAVE_FORMAT_EXTENSIBLE, the real format is the start of the sub format GUID
+        format_tag = struct.unpack_from("<H", fmt, 24)[0]
+    if format_tag == 3:
+        dtype, scale, bias = np.float32, 1.0, 0.0
+    elif bits == 8:
+        dtype, scale, bias = np.uint8, 1 / 128, 128.0
+    elif bits == 16:
+        dtype, scale, bias = np.int16, 1 / 32768, 0.0
+    elif bits == 32:
+        dtype, scale, bias = np.int32, 1 / 2 ** 31, 0.0
+    else:
+        raise ValueError(f"{path}: {bits} bit samples are not supported")
+
+    # streamed WAVs can leave the data size at its maximum, trust the file length instead
+    size = min(size, os.path.getsize(path) - offset)
+    frames = size // (np.dtype(dtype).itemsize * channels)
+    samples = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(frames, channels))
+    return ArraySource(samples, rate, scale, bias, loop)
+
+
+def open_raw(path, loop=False):
+    samples = np.memmap(path, dtype=np.float32, mode="r")
+    return ArraySource(samples.reshape(-1, 1), SAMPLE_RATE, loop=loop)
+
+
+# what a gen: spec can set, see GeneratorSource
+GENERATOR_OPTIONS = ("period", "length", "level", "freq")
+
+
+class GeneratorSource(AudioSource):
+    '''
+    Procedural test signal, the same spec always gives the same samples
+    kind is "silence", "bursts" (a tone for `length` s every `period` s) or "ramp"
+    (a tone fading in from 0 to `level` over `period` s, over and over)
+    '''
+
+    def __init__(self, kind="silence", period=1.0, length=0.2, level=0.5, freq=300.0):
+        if kind not in ("silence", "bursts", "ramp"):
+            raise ValueError(f"unknown generator {kind!r}")
+        self.kind = kind
+        self.period = period
+        self.length = length
+        self.level = level
+        self.freq = freq
+        self.position = 0
+
+    def read(self, frames):
+        t = (self.position + np.arange(frames)) / self.sample_rate
+        self.position += frames
+        if self.kind == "silence":
+            return np.zeros(frames, dtype=np.float32)
+
+        phase = np.mod(t, self.period)
+        if self.kind == "bursts":
+            envelope = np.where(phase < self.length, self.level, 0.0)
+        else:
+            envelope = phase / self.period * self.level
+        return (envelope * np.sin(2 * np.pi * self.freq * t)).astype(np.float32)
+
+
+def open_source(spec=None):
+    """
+    Builds the source a spec string asks for, see the module docstring.
+    With no spec it uses SCREAM_FROG_AUDIO, then the microphone.
+    """
+    if spec is None:
+        spec = os.environ.get(ENV_VAR) or DEFAULT_SPEC
+    kind, _, rest = spec.partition(":")
+
+    if kind == "mic":
+        return PyAudioSource()
+    if kind == "file":
+        return open_wav(rest)
+    if kind == "raw":
+        return open_raw(rest)
+    if kind == "gen":
+        name, _, params = rest.partition(":")
+        options = {}
+        for param in filter(None, params.split(",")):
+            key, _, value = param.partition("=")
+            if key not in GENERATOR_OPTIONS:
+                raise ValueError(f"unknown generator option {key!r} in {spec!r}")
+            options[key] = float(value)
+        return GeneratorSource(name or "silence", **options)
+    raise ValueError(f"unknown audio source {spec!r}")
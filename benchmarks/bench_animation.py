@@ -0,0 +1,77 @@
+"""
+Animation cost per tick against the number of animated objects.
+
+"before" is the old way, every object counts its own frames in loop() and
+game_tick calls them one by one. "after" is one AnimationStore.step() for
+all of them. The objects are Fires with the "on" frames.
+
+Run from anywhere:  python benchmarks/bench_animation.py [count ...]
+"""
+import sys
+import time
+
+from common import setup
+
+setup()
+
+import pygame  # noqa: E402
+from animation_store import AnimationStore  # noqa: E402
+from sprite_loader import Fire, load_animation_set  # noqa: E402
+
+COUNTS = (10, 100, 1000, 10000)
+TICKS = 300
+
+
+class LegacyFire:
+    '''
+    Fire as it animated before the AnimationStore
+    '''
+    ANIMATION_DELAY = 3
+
+    def __init__(self, x, y, width, height):
+        self.fire = load_animation_set("Sprites", "Fire", width, height)
+        self.image = self.fire["on"][0]
+        self.rect = self.image.get_rect(topleft=(x, y))
+        self.animation_count = 0
+        self.animation_name = "on"
+
+    def loop(self):
+        sprites = self.fire[self.animation_name]
+        sprite_index = (self.animation_count //
+                        self.ANIMATION_DELAY) % len(sprites)
+        self.image = sprites[sprite_index]
+        self.animation_count += 1
+
+        self.rect = self.image.get_rect(topleft=(self.rect.x, self.rect.y))
+        self.mask = self.fire.mask_of(self.image)
+
+        if self.animation_count // self.ANIMATION_DELAY > len(sprites):
+            self.animation_count = 0
+
+
+def time_ticks(tick):
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        tick()
+    return (time.perf_counter() - start) / TICKS * 1e6
+
+
+def main_bench(counts):
+    pygame.display.set_mode((1, 1))
+    print(f"{'objects':>8} {'before us/tick':>15} {'after us/tick':>14}")
+    for count in counts:
+        legacy = [LegacyFire(i * 48, 0, 16, 32) for i in range(count)]
+
+        def loop_all():
+            for obj in legacy:
+                obj.loop()
+
+        animations = AnimationStore()
+        for i in range(count):
+            Fire(i * 48, 0, 16, 32, animations).on()
+        print(f"{count:>8} {time_ticks(loop_all):>15.1f} {time_ticks(animations.step):>14.1f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main_bench([int(arg) for arg in sys.argv[1:]] or COUNTS)
@@ -0,0 +1,98 @@
+"""
+Frame time jitter of a busy game loop while audio is being captured.
+
+Each mode runs in a fresh process: it starts capturing gen:bursts in
+get_MIC's "thread" or "process" capture mode, then runs a loop paced to
+60 FPS that reads the levels and does about half a frame of work, Python
+busy work plus blits to a window sized surface. Reported are the frame
+times (ms between clock.tick returns) and how many blocks of audio made it
+to the game.
+
+Run from anywhere:  python benchmarks/bench_audio_jitter.py [seconds]
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+from common import setup
+
+SECONDS = 5
+FPS = 60
+# share of the frame spent working, the rest clock.tick waits
+LOAD = 0.5
+SPEC = "gen:bursts"
+
+
+def busy(deadline, surface, sprite):
+    """
+    Python work and blits until `deadline`, like a heavy game_tick plus draw.
+    """
+    total = 0
+    while time.perf_counter() < deadline:
+        for i in range(200):
+            total += i * i % 7
+        for x in range(0, surface.get_width(), 64):
+            surface.blit(sprite, (x, 100))
+    return total
+
+
+def run(mode, seconds):
+    """
+    Runs in the child process, prints the frame times as JSON.
+    """
+    setup()
+    import pygame
+    import get_MIC
+    from UI import WINDOW_WIDTH, WINDOW_HEIGHT
+
+    pygame.init()
+    surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    sprite = pygame.Surface((64, 64))
+    sprite.fill((80, 160, 80))
+    clock = pygame.time.Clock()
+
+    get_MIC.capture_mode = mode
+    if get_MIC.start_capture(SPEC) is None:
+        sys.exit(1)
+    get_MIC.skip_pending()
+    frames, blocks = [], 0
+    clock.tick(FPS)
+    last = time.perf_counter()
+    end = last + seconds
+    while last < end:
+        levels = get_MIC.read_levels()
+        if levels.end > levels.start:
+            blocks += round((levels.end - levels.start) * get_MIC.SAMPLE_RATE / get_MIC.CALLBACK_SIZE)
+        busy(last + LOAD / FPS, surface, sprite)
+        clock.tick(FPS)
+        now = time.perf_counter()
+        frames.append((now - last) * 1e3)
+        last = now
+    get_MIC.stop_capture()
+    pygame.quit()
+    print(json.dumps({"frames": frames, "blocks": blocks}))
+
+
+def stats(frames):
+    ordered = sorted(frames)
+    mean = sum(frames) / len(frames)
+    std = (sum((f - mean) ** 2 for f in frames) / len(frames)) ** 0.5
+    return mean, std, ordered[int(len(ordered) * 0.99)], ordered[-1]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        run(sys.argv[2], float(sys.argv[3]))
+        sys.exit()
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else SECONDS
+    print(f"{SPEC} for {seconds:g} s at {FPS} FPS, {LOAD:.0%} of each frame busy, frame times in ms")
+    print(f"{'mode':<9}{'mean':>8}{'std':>8}{'p99':>8}{'max':>8}{'blocks/s':>10}")
+    for mode in ("thread", "process"):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, str(seconds)],
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        mean, std, p99, worst = stats(result["frames"])
+        print(f"{mode:<9}{mean:>8.2f}{std:>8.2f}{p99:>8.2f}{worst:>8.2f}{result['blocks'] / seconds:>10.0f}")
@@ -0,0 +1,96 @@
+"""
+Collision cost against level width.
+
+Tiles Level1_map.tmx horizontally 1x, 10x and 100x and times one frame of
+collision work: move_and_collide walking right while standing on a grass block,
+so the x sweep is free and the y sweep stops and looks up what it landed on.
+"grid" finds the contacts through the SpatialHash, "brute" goes over every object.
+
+Run from anywhere:  python benchmarks/bench_collision.py [scale ...]
+"""
+import os
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+from common import setup
+
+setup()
+
+import pygame  # noqa: E402
+import main  # noqa: E402
+from sprite_loader import GrassBlock, load_objects_from_tmx  # noqa: E402
+
+SOURCE_MAP = os.path.join("Level", "Level1_map.tmx")
+SCALES = (1, 10, 100)
+FRAMES = 300
+
+
+class FlatObjects:
+    """
+    Same interface as SpatialHash but hands back every object, like the old loop did.
+    """
+
+    def __init__(self, objects):
+        self.objects = list(objects)
+
+    def query(self, rect, margin=1):
+        return self.objects
+
+
+def widen_map(scale, out_dir):
+    """
+    Writes a copy of the level with every row repeated `scale` times.
+    """
+    tree = ET.parse(SOURCE_MAP)
+    root = tree.getroot()
+    width = int(root.get("width")) * scale
+    root.set("width", str(width))
+    for tileset in root.iter("tileset"):
+        tileset.set("source", os.path.abspath(os.path.join("Level", tileset.get("source"))))
+    for layer in root.iter("layer"):
+        layer.set("width", str(width))
+        data = layer.find("data")
+        rows = [row.strip().rstrip(",") for row in data.text.strip().splitlines()]
+        data.text = "\n" + ",\n".join(",".join([row] * scale) for row in rows) + "\n"
+    path = os.path.join(out_dir, f"level_x{scale}.tmx")
+    tree.write(path, encoding="UTF-8", xml_declaration=True)
+    return path
+
+
+def place_player(objects):
+    """
+    Stands a player on the first grass block far enough from the start.
+    """
+    ground = [obj for obj in objects if isinstance(obj, GrassBlock)]
+    block = ground[len(ground) // 2]
+    player = main.Player(block.rect.x, 0, 32, 32)
+    player.update_sprite()
+    player.rect.bottom = block.rect.top
+    return player
+
+
+def time_frames(player, grid, masks):
+    start_pos = player.rect.topleft
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        player.rect.topleft = start_pos
+        main.move_and_collide(player, main.PLAYER_VEL, 1, grid, masks)
+    return (time.perf_counter() - start) / FRAMES * 1e6
+
+
+def main_bench(scales):
+    print(f"{'map':>10} {'objects':>8} {'grid us/frame':>14} {'brute us/frame':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            objects, _, grid, masks, _ = load_objects_from_tmx(widen_map(scale, tmp))
+            player = place_player(objects)
+            grid_us = time_frames(player, grid, masks)
+            brute_us = time_frames(player, FlatObjects(o for o in objects if o in grid), masks)
+            print(f"{80 * scale:>7}x15 {len(objects):>8} {grid_us:>14.1f} {brute_us:>15.1f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main_bench([int(arg) for arg in sys.argv[1:]] or SCALES)
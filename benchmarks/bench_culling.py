@@ -0,0 +1,66 @@
+"""
+Decoration cost per tick against level length.
+
+Builds levels 10x to 1000x the window wide with a Fire every 100 px and
+times one tick of animating and drawing them. "before" steps every
+animation and draws every object, "after" only the ones within the cull
+margin of the window, the way game_tick and ChunkedTileLayer.draw do it now.
+
+Run from anywhere:  python benchmarks/bench_culling.py [screens ...]
+"""
+import sys
+import time
+
+from common import setup
+
+setup()
+
+import pygame  # noqa: E402
+from animation_store import AnimationStore  # noqa: E402
+from sprite_loader import Fire  # noqa: E402
+from tile_layer import ChunkedTileLayer  # noqa: E402
+from UI import WINDOW_WIDTH, WINDOW_HEIGHT  # noqa: E402
+
+SCREENS = (10, 100, 1000)
+SPACING = 100
+TICKS = 200
+
+
+def build(screens):
+    animations = AnimationStore()
+    fires = [Fire(x, 400, 16, 32, animations) for x in range(0, screens * WINDOW_WIDTH, SPACING)]
+    for fire in fires:
+        fire.on()
+    return fires, animations, ChunkedTileLayer(fires)
+
+
+def time_ticks(tick, screens):
+    # walk the camera through the first screens like a player would
+    start = time.perf_counter()
+    for i in range(TICKS):
+        tick(i * 5 % (screens * WINDOW_WIDTH))
+    return (time.perf_counter() - start) / TICKS * 1e6
+
+
+def main_bench(screens_list):
+    window = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    print(f"{'level px':>9} {'objects':>8} {'before us/tick':>15} {'after us/tick':>14}")
+    for screens in screens_list:
+        fires, animations, tile_layer = build(screens)
+
+        def before(offset_x):
+            animations.step()
+            for obj in fires:
+                obj.draw(window, offset_x)
+
+        def after(offset_x):
+            animations.step([obj.slot for obj in tile_layer.visible(offset_x, window.get_size())])
+            tile_layer.draw(window, offset_x)
+
+        before_us, after_us = time_ticks(before, screens), time_ticks(after, screens)
+        print(f"{screens * WINDOW_WIDTH:>9} {len(fires):>8} {before_us:>15.1f} {after_us:>14.1f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main_bench([int(arg) for arg in sys.argv[1:]] or SCREENS)
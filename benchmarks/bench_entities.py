@@ -0,0 +1,93 @@
+"""
+Per tick object pass and stick removal against level width.
+
+Tiles Level1_map.tmx horizontally 1x, 10x and 100x. "pass" is the part of
+game_tick that looks for shaking sticks and the finish point: "before" walks
+the objects list with isinstance like it used to, "after" goes through the
+EntityRegistry's active set (nothing shakes here) and its trigger bucket. "remove" is taking every stick out again, list.remove
+one by one before, destroy() plus one flush() after.
+
+Run from anywhere:  python benchmarks/bench_entities.py [scale ...]
+"""
+import sys
+import tempfile
+import time
+
+from bench_collision import widen_map
+from common import setup
+
+setup()
+
+import pygame  # noqa: E402
+from entities import TRIGGER, EntityRegistry  # noqa: E402
+from sprite_loader import BreakingStick, FinishPoint, load_objects_from_tmx  # noqa: E402
+
+SCALES = (1, 10, 100)
+TICKS = 200
+
+
+def legacy_pass(objects, player):
+    for obj in objects:
+        if isinstance(obj, BreakingStick) and obj.shaking:
+            pass
+        elif isinstance(obj, FinishPoint):
+            pygame.sprite.collide_rect(player, obj)
+
+
+def registry_pass(registry, player):
+    for stick in registry.active_objects():
+        pass
+    for trigger in registry.bucket(TRIGGER):
+        pygame.sprite.collide_rect(player, trigger)
+
+
+def time_ticks(tick):
+    start = time.perf_counter()
+    for _ in range(TICKS):
+        tick()
+    return (time.perf_counter() - start) / TICKS * 1e6
+
+
+def time_removal(objects, remove):
+    sticks = [obj for obj in objects if isinstance(obj, BreakingStick)]
+    start = time.perf_counter()
+    remove(sticks)
+    return (time.perf_counter() - start) * 1e3
+
+
+def remove_from_list(objects):
+    def remove(sticks):
+        for stick in sticks:
+            objects.remove(stick)
+    return remove
+
+
+def remove_from_registry(registry):
+    def remove(sticks):
+        for stick in sticks:
+            registry.destroy(stick)
+        registry.flush()
+    return remove
+
+
+def main_bench(scales):
+    print(f"{'map':>10} {'objects':>8} {'pass before':>12} {'pass after':>11} {'remove before':>14} "
+          f"{'remove after':>13}")
+    print(f"{'':>10} {'':>8} {'us/tick':>12} {'us/tick':>11} {'ms':>14} {'ms':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            objects, _, _, _, _ = load_objects_from_tmx(widen_map(scale, tmp))
+            registry = EntityRegistry(objects)
+            player = pygame.sprite.Sprite()
+            player.rect = pygame.Rect(0, 0, 64, 64)
+            before = time_ticks(lambda: legacy_pass(objects, player))
+            after = time_ticks(lambda: registry_pass(registry, player))
+            remove_before = time_removal(objects, remove_from_list(list(objects)))
+            remove_after = time_removal(objects, remove_from_registry(registry))
+            print(f"{80 * scale:>7}x15 {len(objects):>8} {before:>12.1f} {after:>11.1f} {remove_before:>14.2f} "
+                  f"{remove_after:>13.2f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main_bench([int(arg) for arg in sys.argv[1:]] or SCALES)
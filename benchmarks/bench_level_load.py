@@ -0,0 +1,71 @@
+"""
+Restart latency, the level setup GAME_SCENE does every time "Again" is hit.
+
+"before" is load_objects_from_tmx (pytmx parse with images, properties gid by
+gid), "after" is load_level with a warm .levelcache and "compile" is a
+load_level that has to build the cache first. Every version runs in a fresh
+process: "first" is the first load there (the first GAME_SCENE of a session),
+"load" the median of the loads after it (a restart). "bake" is the median
+ChunkedTileLayer build GAME_SCENE does after loading.
+
+Run from anywhere:  python benchmarks/bench_level_load.py [level.tmx] [runs]
+"""
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+from common import ROOT, setup
+
+LEVEL = os.path.join(ROOT, "Level", "Level1_map.tmx")
+RUNS = 20
+
+
+def run(version, level, runs):
+    """
+    Runs in the child process, prints first, load and bake times in ms.
+    """
+    setup()
+    import pygame
+    import level_cache
+    from sprite_loader import load_objects_from_tmx
+    from tile_layer import ChunkedTileLayer
+
+    pygame.display.set_mode((1, 1))
+    if version == "before":
+        load = load_objects_from_tmx
+    elif version == "compile":
+        def load(path):
+            shutil.rmtree(os.path.dirname(level_cache.cache_path(path)), ignore_errors=True)
+            return level_cache.load_level(path)
+    else:
+        level_cache.compiled_level(level)
+        load = level_cache.load_level
+
+    loads, bakes = [], []
+    for _ in range(runs + 1):
+        start = time.perf_counter()
+        objects, _, _, _, _ = load(level)
+        loaded = time.perf_counter()
+        ChunkedTileLayer(objects)
+        loads.append((loaded - start) * 1000)
+        bakes.append((time.perf_counter() - loaded) * 1000)
+    print(loads[0], statistics.median(loads[1:]), statistics.median(bakes[1:]))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        run(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        sys.exit()
+
+    level = os.path.abspath(sys.argv[1]) if len(sys.argv) > 1 else LEVEL
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else RUNS
+    print(f"{level}, ms")
+    print(f"{'':<10}{'first':>8}{'load':>8}{'bake':>8}")
+    for version in ("before", "compile", "after"):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", version, level, str(runs)],
+                                capture_output=True, text=True, check=True).stdout
+        first, load, bake = (float(value) for value in output.strip().splitlines()[-1].split())
+        print(f"{version:<10}{first:>8.2f}{load:>8.2f}{bake:>8.2f}")
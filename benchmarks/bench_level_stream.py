@@ -0,0 +1,118 @@
+"""
+Loading a level all at once against streaming it in chunks, by level length.
+
+Writes the synthetic maps of bench_tile_load.py and plays each one in a fresh
+process, so the RSS numbers do not mix. "eager" is what start_level did before
+--stream: load_level and a ChunkedTileLayer of the whole map. "stream" is a
+LevelStream whose camera sweeps the whole map SPEED pixels per tick, with
+FRAME_REST seconds between ticks standing in for the rest of a frame (the
+loader thread runs then). "update" is the main thread's LevelStream.update
+per tick, "stalls" the chunks the window needed before the loader was done.
+"load s" is load_level, or the first restore() of the stream, after the map
+was compiled into the level cache. "alive" is the most objects in play at once.
+
+Run from anywhere:  python benchmarks/bench_level_stream.py [columns ...]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_tile_load import rss_mb, write_map
+from common import setup
+
+setup()
+
+COLUMNS = (2500, 10000, 100000)
+# the whole map at once takes gigabytes past this
+EAGER_MAX = 10000
+# about 40 times PLAYER_VEL, so 100000 columns take 25000 ticks
+SPEED = 192
+FRAME_REST = 0.001
+WINDOW_WIDTH = 500
+
+
+def measure_eager(path):
+    from level_cache import compiled_level, load_level
+    from tile_layer import ChunkedTileLayer
+
+    compiled_level(path)
+    before = rss_mb()
+    start = time.perf_counter()
+    objects, _, _, masks, _ = load_level(path)
+    tile_layer = ChunkedTileLayer(objects)
+    elapsed = time.perf_counter() - start
+    rss = rss_mb() - before
+    # both held on to until here, like a level in play
+    del masks, tile_layer
+    return elapsed, len(objects), rss, None
+
+
+def measure_stream(path):
+    from types import SimpleNamespace
+
+    import numpy as np
+    import pygame
+    from level_cache import compiled_level
+    from level_stream import LevelStream
+
+    types, block_size = compiled_level(path)
+    before = rss_mb()
+    start = time.perf_counter()
+    # nothing plays, the player only has to be there for restore()
+    stream = LevelStream(SimpleNamespace(rect=pygame.Rect(50, 200, 32, 32)), types, block_size, WINDOW_WIDTH)
+    stream.restore()
+    elapsed = time.perf_counter() - start
+
+    times, alive, rss = [], 0, 0.0
+    for tick, offset_x in enumerate(range(0, types.shape[2] * block_size - WINDOW_WIDTH, SPEED)):
+        begin = time.perf_counter()
+        stream.update(offset_x)
+        times.append(time.perf_counter() - begin)
+        alive = max(alive, len(stream.entities))
+        if tick % 256 == 0:
+            rss = max(rss, rss_mb() - before)
+        time.sleep(FRAME_REST)
+    stream.close()
+    times = np.array(times) * 1e3
+    return elapsed, alive, rss, (times.mean(), np.percentile(times, 99), times.max(), stream.stalls)
+
+
+def measure(mode, path):
+    """
+    Runs inside the child process, prints what measure_eager or measure_stream found.
+    """
+    import pygame
+    pygame.display.set_mode((1, 1))
+    elapsed, alive, rss, update = (measure_eager if mode == "eager" else measure_stream)(path)
+    print(elapsed, alive, rss, *(update or ()))
+
+
+def main_bench(columns):
+    print(f"{'mode':<7}{'columns':>8} {'load s':>7} {'alive':>7} {'RSS +MB':>8} "
+          f"{'update ms mean/p99/max':>23} {'stalls':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for width in columns:
+            path = os.path.join(tmp, f"synthetic_{width}.tmx")
+            write_map(width, path)
+            for mode in ("eager", "stream"):
+                if mode == "eager" and width > EAGER_MAX:
+                    print(f"{mode:<7}{width:>8} {'skipped, more than EAGER_MAX columns':>47}")
+                    continue
+                out = subprocess.run([sys.executable, __file__, "--measure", mode, path],
+                                     capture_output=True, text=True, check=True).stdout
+                values = out.split("\n")[-2].split()
+                elapsed, alive, rss = float(values[0]), int(values[1]), float(values[2])
+                line = f"{mode:<7}{width:>8} {elapsed:>7.2f} {alive:>7} {rss:>8.1f}"
+                if len(values) > 3:
+                    mean, p99, worst, stalls = (float(value) for value in values[3:])
+                    line += f" {f'{mean:.3f}/{p99:.3f}/{worst:.2f}':>23} {int(stalls):>7}"
+                print(line)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--measure"]:
+        measure(sys.argv[2], sys.argv[3])
+    else:
+        main_bench([int(arg) for arg in sys.argv[1:]] or COLUMNS)
@@ -0,0 +1,110 @@
+"""
+Mask constructions per simulated second of play.
+
+Runs Player.loop + handle_move on Level1 for a few simulated seconds and
+counts calls to pygame.mask.from_surface. "before" replays the old
+probe-and-revert collide() and after-the-fact vertical snap with a Player that
+rebuilds its mask in update(), "after" is the code as it is now.
+
+Run from anywhere:  python benchmarks/bench_mask_rebuilds.py [seconds]
+"""
+import sys
+import time
+
+from common import setup
+
+setup()
+
+import pygame  # noqa: E402
+import get_MIC  # noqa: E402
+import main  # noqa: E402
+
+SECONDS = 10
+# jump, then keep talking so the frog runs right
+LOUDNESS = [300] + [50] * 29
+
+constructions = 0
+from_surface = pygame.mask.from_surface
+
+
+def counting_from_surface(*args, **kwargs):
+    global constructions
+    constructions += 1
+    return from_surface(*args, **kwargs)
+
+
+class LegacyPlayer(main.Player):
+    def update(self):
+        self.rect = self.sprite.get_rect(topleft=(self.rect.x, self.rect.y))
+        self.mask = pygame.mask.from_surface(self.sprite)
+
+
+def legacy_collide(player, grid, dx):
+    player.move(dx, 0)
+    player.update()
+    collided_object = None
+    for obj in grid.query(player.rect):
+        if pygame.sprite.collide_mask(player, obj):
+            collided_object = obj
+            break
+
+    player.move(-dx, 0)
+    player.update()
+    return collided_object
+
+
+def legacy_vertical_collision(player, grid, dy):
+    for obj in grid.query(player.rect):
+        if pygame.sprite.collide_mask(player, obj):
+            if dy > 0:
+                player.rect.bottom = obj.rect.top
+                player.landed()
+            elif dy < 0:
+                player.rect.top = obj.rect.bottom
+                player.hit_head()
+
+
+def legacy_loop(player, grid, masks):
+    """
+    Moves without collision, probes 10 px left and right, then snaps out of whatever it went into.
+    """
+    player.loop(main.FPS)
+    left = legacy_collide(player, grid, -main.PLAYER_VEL * 2)
+    right = legacy_collide(player, grid, main.PLAYER_VEL * 2)
+    player.contacts = [main.Contact(obj, normal) for obj, normal in ((left, (1, 0)), (right, (-1, 0))) if obj]
+    legacy_vertical_collision(player, grid, player.y_vel)
+
+
+def loop(player, grid, masks):
+    player.loop(main.FPS, grid, masks)
+
+
+def simulate(player_class, step, seconds):
+    global constructions
+    _, _, grid, masks, _ = main.load_objects_from_tmx("./Level/Level1_map.tmx")
+    player = player_class(50, 200, 32, 32)
+    main.death_trigger = False
+    constructions = 0
+    ticks = seconds * main.FPS
+    start = time.perf_counter()
+    for tick in range(ticks):
+        get_MIC.loudness = LOUDNESS[tick % len(LOUDNESS)]
+        step(player, grid, masks)
+        main.handle_move(player, grid)
+    elapsed = time.perf_counter() - start
+    return constructions / seconds, elapsed / ticks * 1e6
+
+
+def main_bench(seconds):
+    pygame.mask.from_surface = counting_from_surface
+    before = simulate(LegacyPlayer, legacy_loop, seconds)
+    after = simulate(main.Player, loop, seconds)
+
+    print(f"{'':>7} {'masks/sim s':>12} {'us/tick':>8}")
+    print(f"{'before':>7} {before[0]:>12.0f} {before[1]:>8.1f}")
+    print(f"{'after':>7} {after[0]:>12.0f} {after[1]:>8.1f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main_bench(int(sys.argv[1]) if sys.argv[1:] else SECONDS)
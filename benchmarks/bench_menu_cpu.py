@@ -0,0 +1,90 @@
+"""
+CPU use of START_SCENE while it sits on screen.
+
+Each run starts a fresh process, opens START_SCENE and leaves it for a few
+seconds, then a timer thread posts QUIT. CPU is process time over wall time.
+"idle" gets no input at all, "mouse" gets a MOUSEMOTION event 60 times a
+second (the pointer never reaches a button). "before" is the old loop that
+redraws everything and updates the whole window every frame, "after" is
+START_SCENE as it is now.
+
+Run from anywhere:  python benchmarks/bench_menu_cpu.py [seconds]
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from common import setup
+
+SECONDS = 5
+MOUSE_HZ = 60
+
+
+def legacy_start_scene(main):
+    play_button = main.Button(main.WINDOW_WIDTH // 2, main.WINDOW_HEIGHT // 2 - 50, "Play", main.button_sprite)
+    settings_button = main.Button(main.WINDOW_WIDTH // 2, main.WINDOW_HEIGHT // 2 + 50, "Mic Set",
+                                  main.button_sprite)
+    background_image = main.pygame.image.load("./assets/Background/Whole_Background.png").convert()
+    background_image = main.pygame.transform.scale2x(background_image)
+
+    while True:
+        main.window.blit(background_image, (0, 0))
+        for event in main.pygame.event.get():
+            if event.type == main.pygame.QUIT:
+                main.pygame.quit()
+                sys.exit()
+        play_button.check_hover()
+        settings_button.check_hover()
+        play_button.draw(main.window)
+        settings_button.draw(main.window)
+        main.pygame.display.update()
+        main.clock.tick(main.FPS)
+
+
+def run(version, scenario, seconds):
+    """
+    Runs in the child process, prints the CPU share of one core.
+    """
+    setup()
+    import pygame
+    import main
+
+    stop = threading.Event()
+
+    def post_input():
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            if scenario == "mouse":
+                pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=(5, 5), rel=(1, 0), buttons=(0, 0, 0)))
+            stop.wait(1 / MOUSE_HZ)
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    threading.Thread(target=post_input, daemon=True).start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        if version == "before":
+            legacy_start_scene(main)
+        else:
+            main.START_SCENE()
+    except SystemExit:
+        pass
+    print((time.process_time() - cpu) / (time.perf_counter() - wall) * 100)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        run(sys.argv[2], sys.argv[3], float(sys.argv[4]))
+        sys.exit()
+
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else SECONDS
+    print(f"START_SCENE for {seconds:g} s, CPU % of one core")
+    print(f"{'scenario':<10}{'before':>10}{'after':>10}")
+    for scenario in ("idle", "mouse"):
+        row = []
+        for version in ("before", "after"):
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", version, scenario,
+                                     str(seconds)], capture_output=True, text=True, check=True).stdout
+            row.append(float(output.strip().splitlines()[-1]))
+        print(f"{scenario:<10}{row[0]:>10.1f}{row[1]:>10.1f}")
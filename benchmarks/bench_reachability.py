@@ -0,0 +1,48 @@
+"""
+Reachability time against level width, beam and processes.
+
+Tiles Level1_map.tmx horizontally 1x and 2x (the FinishPoint comes along, so
+the shortest path stays the same) and runs reachability.py on it: the bound,
+then the search up to the FinishPoint with the default beam on one process,
+and without a beam on one process and on all cores. "compile" is loading the
+level into a CompiledLevel, "bound" reachability.bound, "search" the breadth
+first search, "states/s" the states it kept per second of searching.
+
+Run from anywhere:  python benchmarks/bench_reachability.py [scale ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from bench_collision import widen_map
+from common import setup
+
+setup()
+
+import reachability  # noqa: E402
+
+SCALES = (1, 2)
+
+
+def main_bench(scales):
+    runs = [(reachability.BEAM, 1)] + [(0, count) for count in sorted({1, os.cpu_count() or 1})]
+    print(f"{'map':>10} {'beam':>5} {'-j':>3} {'compile s':>10} {'bound s':>8} {'search s':>9} {'states':>10} "
+          f"{'states/s':>9} {'ticks':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            path = widen_map(scale, tmp)
+            for beam, count in runs:
+                start = time.perf_counter()
+                level = reachability.compile_level(path)
+                compiled = time.perf_counter()
+                reachability.bound(level)
+                bounded = time.perf_counter()
+                shortest, total = reachability.search(level, count, beam=beam)
+                searched = time.perf_counter() - bounded
+                ticks = len(shortest) if shortest is not None else "-"
+                print(f"{80 * scale:>7}x15 {beam:>5} {count:>3} {compiled - start:>10.2f} {bounded - compiled:>8.2f} "
+                      f"{searched:>9.2f} {total:>10} {total / searched:>9.0f} {ticks:>6}")
+
+if __name__ == "__main__":
+    main_bench([int(arg) for arg in sys.argv[1:]] or SCALES)
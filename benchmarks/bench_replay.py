@@ -0,0 +1,63 @@
+"""
+Simulation throughput replaying an input log.
+
+Records Level/scripts/level1_finish.txt as an input log (the same ticks the
+game would write with --record), then replays it through headless.run_episode
+as fast as it goes, without drawing and with every tick drawn to the window
+(SDL's dummy driver, so no display.update cost of a real screen). Reports
+ticks per second and how much faster than the game's TICK_RATE that is.
+
+Run from anywhere:  python benchmarks/bench_replay.py [runs]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from common import setup
+
+setup()
+
+import headless  # noqa: E402
+import main  # noqa: E402
+from input_log import InputRecorder, load_log  # noqa: E402
+
+LEVEL = "Level/Level1_map.tmx"
+SCRIPT = "Level/scripts/level1_finish.txt"
+RUNS = 5
+
+
+def record_script(path):
+    """
+    Writes the script's ticks to an input log at `path`.
+    """
+    script = headless.load_script(SCRIPT)
+    recorder = InputRecorder(path, LEVEL, main.TICK_RATE, main.loudness_threshold)
+    for tick in range(len(script)):
+        loudness, left, right, space, voice = script.get(tick)
+        recorder.record(loudness, left, right, space, voice)
+    recorder.close()
+
+
+def main_bench(runs):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "level1_finish.sfil")
+        record_script(path)
+        log = load_log(path)
+        print(f"{len(log)} ticks, {os.path.getsize(path)} bytes, best of {runs} runs")
+        # the first run loads the level, the rest restart it in place like the game does
+        headless.run_episode(LEVEL, log)
+        print(f"{'mode':<10}{'outcome':>16}{'ticks/s':>10}{'x realtime':>12}")
+        for render in (False, True):
+            best = None
+            for _ in range(runs):
+                start = time.perf_counter()
+                outcome, ticks = headless.run_episode(LEVEL, log, render=render)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{'render' if render else 'logic':<10}{f'{outcome} {ticks}':>16}{ticks / best:>10.0f}"
+                  f"{ticks / best / main.TICK_RATE:>12.1f}")
+
+
+if __name__ == "__main__":
+    main_bench(int(sys.argv[1]) if len(sys.argv) > 1 else RUNS)
@@ -0,0 +1,93 @@
+"""
+Level load time and memory against tile count.
+
+Writes synthetic maps (ground rows of dirt and grass with spikes and sticks
+on top) using the level1test tileset and loads each one through
+load_objects_from_tmx in a fresh process, so the RSS numbers do not mix.
+
+Run from anywhere:  python benchmarks/bench_tile_load.py [columns ...]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT, setup
+
+setup()
+
+# gids in level1test.tsx (tile id + firstgid)
+GRASS, STICK, SPIKE, DIRT = 3, 7, 9, 37
+ROWS = 15
+COLUMNS = (250, 2500, 5000)
+
+
+def write_map(columns, path):
+    """
+    Four solid rows at the bottom and a row of spikes / sticks above them,
+    that is about 4.4 tiles per column.
+    """
+    rows = []
+    for y in range(ROWS):
+        if y < ROWS - 5:
+            row = [0] * columns
+        elif y == ROWS - 5:
+            row = [SPIKE if x % 5 == 0 else STICK if x % 5 == 2 else 0 for x in range(columns)]
+        elif y == ROWS - 4:
+            row = [GRASS] * columns
+        else:
+            row = [DIRT] * columns
+        rows.append(",".join(map(str, row)))
+    tileset = os.path.join(ROOT, "Level", "level1test.tsx")
+    with open(path, "w", encoding="UTF-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(f'<map version="1.10" orientation="orthogonal" renderorder="right-down" width="{columns}" '
+                f'height="{ROWS}" tilewidth="48" tileheight="48" infinite="0">\n')
+        f.write(f' <tileset firstgid="1" source="{tileset}"/>\n')
+        f.write(f' <layer id="1" name="Tile Layer 1" width="{columns}" height="{ROWS}">\n')
+        f.write('  <data encoding="csv">\n' + ",\n".join(rows) + "\n</data>\n </layer>\n</map>\n")
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+
+def measure(path):
+    """
+    Runs inside the child process, prints tiles, seconds and RSS growth.
+    """
+    import pygame
+    pygame.display.set_mode((1, 1))
+    from sprite_loader import load_objects_from_tmx
+
+    before = rss_mb()
+    start = time.perf_counter()
+    objects, _, _, _, _ = load_objects_from_tmx(path)
+    elapsed = time.perf_counter() - start
+    print(len(objects), elapsed, rss_mb() - before)
+
+
+def main_bench(columns):
+    print(f"{'tiles':>8} {'load s':>8} {'us/tile':>12} {'RSS +MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for width in columns:
+            path = os.path.join(tmp, f"synthetic_{width}.tmx")
+            write_map(width, path)
+            out = subprocess.run([sys.executable, __file__, "--measure", path],
+                                 capture_output=True, text=True, check=True).stdout
+            tiles, elapsed, rss = out.split()[-3:]
+            tiles, elapsed, rss = int(tiles), float(elapsed), float(rss)
+            print(f"{tiles:>8} {elapsed:>8.2f} {elapsed / tiles * 1e6:>12.1f} {rss:>8.1f}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--measure"]:
+        measure(sys.argv[2])
+    else:
+        main_bench([int(arg) for arg in sys.argv[1:]] or COLUMNS)
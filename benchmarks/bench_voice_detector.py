@@ -0,0 +1,110 @@
+"""
+Cost and hit rate of the VoiceDetector.
+
+"cost" streams 10 s of voice over noise through VoiceDetector.process in
+chunks of each size and reports the CPU time per chunk, and which share of
+the chunk's real time at 44.1 kHz that is.
+
+"triggers" plays 4 s scenes with voice at 1, 2 and 3 s in CALLBACK_SIZE
+blocks. "before" counts the jumps the loudness threshold gives (rising
+edges of calculate_loudness over the default 200), "after" the Triggers.
+The latency is from the true start of the voice to the trigger.
+
+Run from anywhere:  python benchmarks/bench_voice_detector.py [chunk ...]
+"""
+import sys
+import time
+
+import numpy as np
+
+from common import setup
+
+setup()
+
+from audio_sources import SAMPLE_RATE  # noqa: E402
+from get_MIC import CALLBACK_SIZE, calculate_loudness  # noqa: E402
+from voice_detector import VoiceDetector  # noqa: E402
+
+CHUNKS = (256, 735, 1024, 4096)
+THRESHOLD = 200
+ONSETS = (1.0, 2.0, 3.0)
+SECONDS = 4
+
+
+def voice(seconds, f0=220.0, level=0.3):
+    """
+    A vowel-ish tone, a fundamental and ten harmonics falling off.
+    """
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (level / 2 * sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 12))).astype(np.float32)
+
+
+def scenes(rng):
+    n = SECONDS * SAMPLE_RATE
+    t = np.arange(n) / SAMPLE_RATE
+    room = 0.003 * rng.standard_normal(n)
+    fan = 0.15 * rng.standard_normal(n) + 0.2 * np.sin(2 * np.pi * 100 * t)
+    claps = room.copy()
+    spoken = room.copy()
+    over_fan = fan.copy()
+    for onset in ONSETS:
+        start = int(onset * SAMPLE_RATE)
+        claps[start:start + 220] += 0.8 * rng.standard_normal(220)
+        spoken[start:start + int(0.3 * SAMPLE_RATE)] += voice(0.3)
+        over_fan[start:start + int(0.3 * SAMPLE_RATE)] += voice(0.3, level=0.6)
+    return {"voice": (spoken, True), "voice + fan": (over_fan, True), "fan": (fan, False), "claps": (claps, False)}
+
+
+def loudness_jumps(samples):
+    times, loud = [], False
+    for start in range(0, len(samples) - CALLBACK_SIZE + 1, CALLBACK_SIZE):
+        now = calculate_loudness(samples[start:start + CALLBACK_SIZE]) > THRESHOLD
+        if now and not loud:
+            times.append((start + CALLBACK_SIZE - 1) / SAMPLE_RATE)
+        loud = now
+    return times
+
+
+def voice_triggers(samples):
+    detector, times = VoiceDetector(), []
+    for start in range(0, len(samples) - CALLBACK_SIZE + 1, CALLBACK_SIZE):
+        end_time = (start + CALLBACK_SIZE - 1) / SAMPLE_RATE
+        times += [trigger.time for trigger in detector.process(samples[start:start + CALLBACK_SIZE], end_time)]
+    return times
+
+
+def describe(times, has_voice):
+    if not has_voice or len(times) == 0:
+        return f"{len(times):>4}{'':>9}"
+    latency = np.mean([min(abs(t - onset) for t in times) for onset in ONSETS]) * 1e3
+    return f"{len(times):>4}{latency:>7.1f}ms"
+
+
+def time_chunks(samples, chunk):
+    detector = VoiceDetector()
+    count = len(samples) // chunk
+    start = time.process_time()
+    for i in range(count):
+        detector.process(samples[i * chunk:(i + 1) * chunk])
+    return (time.process_time() - start) / count * 1e6
+
+
+def main_bench(chunks):
+    rng = np.random.default_rng(0)
+    samples = (0.05 * rng.standard_normal(10 * SAMPLE_RATE)).astype(np.float32)
+    samples[SAMPLE_RATE:SAMPLE_RATE + len(voice(8))] += voice(8)
+    print(f"{'chunk':>6} {'us/chunk':>9} {'realtime %':>11}")
+    for chunk in chunks:
+        us = time_chunks(samples, chunk)
+        print(f"{chunk:>6} {us:>9.1f} {us / (chunk / SAMPLE_RATE * 1e6) * 100:>11.2f}")
+
+    print()
+    print(f"voice at {', '.join(f'{onset:g}' for onset in ONSETS)} s, triggers and mean latency")
+    print(f"{'scene':<12}{'before':>13}{'after':>13}")
+    for name, (scene, has_voice) in scenes(rng).items():
+        scene = scene.astype(np.float32)
+        print(f"{name:<12}{describe(loudness_jumps(scene), has_voice)}{describe(voice_triggers(scene), has_voice)}")
+
+
+if __name__ == "__main__":
+    main_bench([int(arg) for arg in sys.argv[1:]] or CHUNKS)
@@ -0,0 +1,19 @@
+"""
+Setup shared by the benchmarks, call setup() before importing pygame or the game.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup():
+    """
+    SDL's dummy drivers unless others are set, and the repository root as the working directory
+    (the assets are loaded relative to it) and on sys.path.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
@@ -0,0 +1,145 @@
+"""
+Entity registry of a level
+
+game_tick used to walk the whole objects list every tick and sort out what
+each object was with isinstance, and a breaking stick took itself out of the
+list the loop was walking. An EntityRegistry sorts the level objects into
+category buckets once, when the level is loaded, so game_tick only looks at
+the bucket it needs (the finish trigger). Objects that have to be updated
+every tick, the sticks the player made shake, are activate()d into a set of
+their own, so a tick with nothing shaking costs nothing however many sticks
+the level has.
+
+Every object gets a handle, an int that stays the same for as long as the
+registry lives. destroy() only queues an object, flush() at the end of the
+tick takes the queued ones out of every bucket, each in O(1), and hands them
+back so the grid, tile layer and level masks can let go of them too.
+"""
+from sprite_loader import GrassBlock, DirtBlock, BreakingStick, Spike, Fire, StartingPoint, FinishPoint
+
+SOLID, HAZARD, BREAKABLE, DECORATION, TRIGGER = "solid", "hazard", "breakable", "decoration", "trigger"
+CATEGORIES = (SOLID, HAZARD, BREAKABLE, DECORATION, TRIGGER)
+CATEGORY_TYPES = {
+    GrassBlock: (SOLID,),
+    DirtBlock: (SOLID,),
+    BreakingStick: (SOLID, BREAKABLE),
+    Spike: (HAZARD,),
+    Fire: (SOLID, DECORATION),
+    StartingPoint: (DECORATION,),
+    FinishPoint: (DECORATION, TRIGGER),
+}
+
+
+def categories_of(obj):
+    return CATEGORY_TYPES.get(type(obj), ())
+
+
+class EntityRegistry:
+    '''
+    The objects of a level by handle and by category, in load order, with destruction deferred to flush()
+    '''
+
+    def __init__(self, objects=()):
+        self.entities = {}
+        self.handles = {}
+        # dicts rather than lists, removing from the middle is O(1) and the order is kept
+        self.buckets = {category: {} for category in CATEGORIES}
+        self.doomed = {}
+        # what game_tick updates every tick, in the order it was activated
+        self.active = {}
+        self.next_handle = 0
+        for obj in objects:
+            self.add(obj)
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __iter__(self):
+        return iter(list(self.entities.values()))
+
+    def __contains__(self, obj):
+        return obj in self.handles
+
+    def add(self, obj):
+        """
+        Registers an object and returns its handle, an object already in keeps the one it has.
+        """
+        if obj in self.handles:
+            return self.handles[obj]
+        handle = self.next_handle
+        self.next_handle += 1
+        self.entities[handle] = obj
+        self.handles[obj] = handle
+        for category in categories_of(obj):
+            self.buckets[category][handle] = obj
+        return handle
+
+    def get(self, handle):
+        """
+        The object behind a handle, None once it was destroyed.
+        """
+        return self.entities.get(handle)
+
+    def handle_of(self, obj):
+        return self.handles.get(obj)
+
+    def bucket(self, category):
+        """
+        The live objects of one category, safe to destroy() from while going through them.
+        """
+        return self.buckets[category].values()
+
+    def activate(self, obj):
+        """
+        Has game_tick update an object every tick from now on (a shaking stick), until it is removed.
+        """
+        if obj in self.handles:
+            self.active[obj] = None
+
+    def active_objects(self):
+        """
+        The activated objects, safe to destroy() from while going through them.
+        """
+        return self.active.keys()
+
+    def destroy(self, obj):
+        """
+        Queues an object for removal at the next flush(), it stays in every bucket until then.
+        """
+        if obj in self.handles:
+            self.doomed[obj] = None
+
+    def flush(self):
+        """
+        Removes the queued objects and returns them in the order they were destroyed.
+        """
+        removed = list(self.doomed)
+        self.doomed.clear()
+        for obj in removed:
+            self.remove(obj)
+        return removed
+
+    def remove(self, obj):
+        """
+        Takes an object out right away, for when nothing is going through the buckets (e.g. a chunk unloading).
+        """
+        handle = self.handles.pop(obj, None)
+        if handle is None:
+            return
+        self.doomed.pop(obj, None)
+        self.active.pop(obj, None)
+        del self.entities[handle]
+        for category in categories_of(obj):
+            del self.buckets[category][handle]
+
+    def snapshot(self):
+        buckets = {category: dict(bucket) for category, bucket in self.buckets.items()}
+        return dict(self.entities), dict(self.handles), buckets, dict(self.active), self.next_handle
+
+    def restore(self, state):
+        entities, handles, buckets, active, self.next_handle = state
+        self.entities = dict(entities)
+        self.handles = dict(handles)
+        self.buckets = {category: dict(bucket) for category, bucket in buckets.items()}
+        self.active = dict(active)
+        self.doomed = {}
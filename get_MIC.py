@@ -1,14 +1,25 @@
-import pyaudio
 import numpy as np
+import atexit
 import time
 import threading
+from collections import namedtuple, deque
+from audio_sources import SAMPLE_RATE, PyAudioSource, open_source
+from voice_detector import VoiceDetector
 
-SAMPLE_RATE = 44100
-DURATION = 0.001
 loudness = 0.0
-CHUNK_SIZE = 1024
+# callback mode hands us small blocks (~6 ms) so a short scream is never averaged away
+CALLBACK_SIZE = 256
+WINDOW_SIZE = 256
+RING_SECONDS = 2
+# spec of the audio source to use, None falls back to $SCREAM_FROG_AUDIO and then the microphone
+audio_spec = None
+# "thread" captures and analyses in this process, "process" in a child process (see audio_process.py)
+capture_mode = "thread"
 
-p = pyaudio.PyAudio()
+# peak / rms are raw sample values, loudness is the loudest WINDOW_SIZE window on the
+# calculate_loudness scale, start / end are time.perf_counter() of the first and last sample,
+# onset is the time of the first voice onset in between (see voice_detector.py), 0.0 if there was none
+Levels = namedtuple("Levels", "peak rms loudness start end onset", defaults=(0.0,))
 
 
 def calculate_loudness(audio_data):
@@ -19,22 +30,202 @@ def calculate_loudness(audio_data):
     return rms_amplitude * 1000
 
 
-def mic_thread():
+def mic_thread(audio_source=None, stop=None, sink=None):
     """
-    Background thread to continuously calculate loudness using PyAudio.
+    Background thread to continuously pump an audio source into the ring buffer
+    (or whatever `sink` does with each block), until the `stop` event is set.
     Runs in a different thread to avoid laggy
     """
+    if audio_source is None:
+        audio_source = open_source(audio_spec)
+    if stop is None:
+        stop = threading.Event()
+    if sink is None:
+        sink = feed
+
+    block_time = CALLBACK_SIZE / SAMPLE_RATE
+    next_time = time.perf_counter()
+    while not stop.is_set():
+        sink(audio_source.read(CALLBACK_SIZE))
+
+        if not audio_source.realtime:
+            # files and generators answer at once, play them at the speed of a real microphone
+            next_time += block_time
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+
+class RingBuffer:
+    """
+    Preallocated float32 ring the audio callback writes into and the game reads from.
+    One writer and one reader, positions count every sample ever written.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.samples = np.zeros(size, dtype=np.float32)
+        # (samples written, perf_counter of the last one), swapped in one assignment
+        self.head = (0, time.perf_counter())
+
+    def write(self, block, end_time):
+        written = self.head[0]
+        if len(block) > self.size:
+            written += len(block) - self.size
+            block = block[-self.size:]
+        start = written % self.size
+        first = min(len(block), self.size - start)
+        self.samples[start:start + first] = block[:first]
+        self.samples[:len(block) - first] = block[first:]
+        self.head = (written + len(block), end_time)
+
+    def read(self, start, end):
+        """
+        Copy of the samples between two positions, only the last `size` of them still exist.
+        """
+        start = max(start, end - self.size)
+        first, last = start % self.size, end % self.size
+        if end - start == 0:
+            return self.samples[:0].copy()
+        if first < last:
+            return self.samples[first:last].copy()
+        return np.concatenate((self.samples[first:], self.samples[:last]))
+
+
+ring = RingBuffer(SAMPLE_RATE * RING_SECONDS)
+source = None
+read_pos = 0
+# set to end the mic_thread of the current source, None in callback mode
+pump_stop = None
+# the audio_process.CaptureProcess in process mode
+capture = None
+# every block fed goes through the detector, the game takes the onsets out again in read_levels()
+detector = VoiceDetector()
+onsets = deque()
+stop_registered = False
+
+
+def feed(block):
+    """
+    Adds a block of samples to the ring buffer and the current loudness.
+    """
     global loudness
+    end_time = time.perf_counter()
+    ring.write(block, end_time)
+    loudness = calculate_loudness(block)
+    onsets.extend(trigger.time for trigger in detector.process(block, end_time))
+
+
+def audio_callback(in_data, frame_count, time_info, status):
+    """
+    Called by PyAudio on its own thread for every CALLBACK_SIZE block.
+    """
+    feed(np.frombuffer(in_data, dtype=np.float32))
+    return None, source.pyaudio.paContinue
 
-    # Open the microphone stream
-    stream = p.open(format=pyaudio.paFloat32,
-                    channels=1,
-                    rate=SAMPLE_RATE,
-                    input=True,
-                    frames_per_buffer=CHUNK_SIZE)
 
-    while True:
-        audio_data = np.frombuffer(stream.read(CHUNK_SIZE), dtype=np.float32)
-        loudness = calculate_loudness(audio_data)
+def start_capture(spec=None):
+    """
+    Starts listening to the audio source, does nothing if it is already running.
+    It is one service for the whole run, it keeps going across scenes until stop_capture()
+    or exit. The microphone runs in callback mode, other sources get a mic_thread pumping them.
+    Without an audio source the game keeps running with silence.
+    """
+    global source, read_pos, pump_stop, stop_registered, capture
+    if source is not None or capture is not None:
+        return source or capture
+    try:
+        if capture_mode == "process":
+            # audio_process imports this module, so it can only be imported here
+            from audio_process import CaptureProcess
+            capture = CaptureProcess(spec or audio_spec)
+            capture.start()
+        else:
+            detector.reset()
+            source = open_source(spec or audio_spec)
+            if isinstance(source, PyAudioSource):
+                source.open(CALLBACK_SIZE, audio_callback)
+            else:
+                pump_stop = threading.Event()
+                threading.Thread(target=mic_thread, args=(source, pump_stop), daemon=True).start()
+    except (ImportError, OSError, ValueError) as e:
+        print(f"Audio source not available: {e}")
+        source = None
+        capture = None
+        return None
+    if not stop_registered:
+        # close the stream and PortAudio properly, not whenever the interpreter gets to it
+        atexit.register(stop_capture)
+        stop_registered = True
+    # nothing before this point is news for the reader
+    read_pos = ring.head[0]
+    return source or capture
+
+
+def stop_capture():
+    """
+    Stops the audio source, start_capture() can open one again afterwards.
+    """
+    global source, pump_stop, capture
+    if capture is not None:
+        capture.close()
+        capture = None
+    if source is None:
+        return
+    if pump_stop is not None:
+        pump_stop.set()
+        pump_stop = None
+    source.close()
+    source = None
+
+
+def skip_pending():
+    """
+    Forgets what was captured so far, the next read_levels() only sees what comes in from now.
+    """
+    global read_pos
+    read_pos = ring.head[0]
+    onsets.clear()
+    if capture is not None:
+        capture.skip_pending()
+
+
+def read_levels():
+    """
+    Peak, RMS, loudest window and first voice onset of everything captured since the last call.
+    """
+    global read_pos, loudness
+    if capture is not None:
+        levels = capture.read_levels()
+        # nothing calls feed() in this process, the latest read is the current loudness
+        loudness = levels.loudness
+        return levels
+    end, end_time = ring.head
+    start = max(read_pos, end - ring.size)
+    read_pos = end
+    start_time = end_time - (end - start) / SAMPLE_RATE
+    onset = onsets.popleft() if onsets else 0.0
+    # later onsets of the same read go too, one at a time as the audio thread may be appending
+    while onsets:
+        onsets.popleft()
+    return analyse(ring.read(start, end), start_time, end_time)._replace(onset=onset)
+
+
+def analyse(audio_data, start_time=0.0, end_time=0.0):
+    """
+    Levels of a block of samples, read_levels uses it on the ring buffer
+    and headless runs on blocks straight from an audio source.
+    """
+    if len(audio_data) == 0:
+        return Levels(0.0, 0.0, 0.0, start_time, end_time)
 
-        time.sleep(DURATION)
+    peak = float(np.abs(audio_data).max())
+    rms = float(np.sqrt(np.mean(audio_data ** 2)))
+    if len(audio_data) <= WINDOW_SIZE:
+        windows = audio_data.reshape(1, -1)
+    else:
+        # whole windows plus the last one, so the newest samples always count
+        whole = len(audio_data) // WINDOW_SIZE * WINDOW_SIZE
+        windows = np.vstack((audio_data[:whole].reshape(-1, WINDOW_SIZE), audio_data[-WINDOW_SIZE:]))
+    window_loudness = float(np.sqrt(np.mean(windows ** 2, axis=1)).max()) * 1000
+    return Levels(peak, rms, window_loudness, start_time, end_time)
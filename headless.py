@@ -0,0 +1,213 @@
+"""
+Headless batch simulation of GAME_SCENE
+
+Runs the game logic (Player, game_tick / handle_move, check_finish and the
+level objects) with SDL's dummy video driver, no microphone and no frame
+limit. Input comes from a script instead of the keyboard and get_MIC.
+
+A script is a list of ticks, each one (loudness, left, right, space, voice).
+As a file it is one tick per line: "loudness[,left,right,space[,voice]]",
+blank lines and lines starting with # are skipped. An audio source spec
+(see audio_sources.py) can stand in for a script, its loudness is then
+measured on 1/TICK_RATE s of samples per tick. So can an input log that
+main.py --record wrote (see input_log.py), it replays on the level and with
+the loudness_threshold it was recorded with.
+
+With --render every tick is drawn as well, one episode after the other in
+this process. Set SDL_VIDEODRIVER to a real driver to watch.
+With --stream the level is loaded in chunks around the camera like
+main.py --stream does (see level_stream.py).
+
+    python headless.py Level/Level1_map.tmx run1.txt run2.txt --expect finished
+    python headless.py Level/Level1_map.tmx --audio gen:bursts:period=0.5
+    python headless.py Level/Level1_map.tmx recordings/run-001.sfil --render
+"""
+import os
+
+# has to be set before pygame opens a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# SDL turns SIGTERM into a quit event otherwise, and pool workers would never stop
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")
+
+import argparse
+import sys
+import multiprocessing
+
+import pygame
+import get_MIC
+import main
+from audio_sources import SAMPLE_RATE, open_source
+from input_log import SUFFIX, InputLog, load_log
+
+# two simulated minutes
+MAX_TICKS = main.TICK_RATE * 120
+# voice None jumps on the loudness threshold, like the game without --voice-jump
+SILENCE = (0.0, False, False, 0, None)
+# what scripts play with, input logs bring their own
+DEFAULT_THRESHOLD = main.loudness_threshold
+
+
+class ScriptedInput:
+    '''
+    Per tick input for a headless run, silence and no keys once the script runs out
+    '''
+
+    def __init__(self, ticks):
+        self.ticks = []
+        for tick in ticks:
+            if isinstance(tick, (int, float)):
+                tick = (tick,)
+            loudness, left, right, space, voice = (tuple(tick) + SILENCE[len(tick):])
+            self.ticks.append((float(loudness), bool(left), bool(right), int(space),
+                               None if voice is None else bool(voice)))
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def get(self, tick):
+        if tick < len(self.ticks):
+            return self.ticks[tick]
+        return SILENCE
+
+
+class AudioInput:
+    '''
+    Per tick loudness measured on an audio source, pulled as fast as the simulation runs.
+    Ticks have to be asked for in order
+    '''
+
+    def __init__(self, source):
+        self.source = source
+        self.frames = SAMPLE_RATE // main.TICK_RATE
+
+    def get(self, tick):
+        return get_MIC.analyse(self.source.read(self.frames)).loudness, False, False, 0, None
+
+
+def load_script(path):
+    """
+    Reads a script file, see the module docstring for the format, or an input log.
+    """
+    if path.endswith(SUFFIX):
+        return load_log(path)
+    ticks = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            values = line.split(",")
+            ticks.append([float(values[0])] + [int(value) for value in values[1:]])
+    return ScriptedInput(ticks)
+
+
+def reset_game_state():
+    """
+    Puts main's module level game state back to the start of a level.
+    """
+    main.current_scene = "GAME_SCENE"
+    main.reset_level_globals()
+
+
+def run_episode(level_path, script, max_ticks=MAX_TICKS, render=False, stream=False):
+    """
+    Plays one level with a script (or an audio source spec, or an input log) as input.
+    Returns (outcome, ticks) where outcome is "finished", "dead" or "timeout".
+    With render every tick is drawn to main.window too, with stream the level is a LevelStream.
+    """
+    if isinstance(script, str):
+        script = AudioInput(open_source(script))
+    elif not isinstance(script, (ScriptedInput, AudioInput, InputLog)):
+        script = ScriptedInput(script)
+    main.loudness_threshold = DEFAULT_THRESHOLD
+    if isinstance(script, InputLog):
+        if script.tick_rate != main.TICK_RATE:
+            raise ValueError(f"input log recorded at {script.tick_rate} ticks/s, the game runs {main.TICK_RATE}")
+        level_path = script.level_path
+        main.loudness_threshold = script.threshold
+    reset_game_state()
+    main.stream_levels = stream
+
+    # a worker playing the same level again restores it in place instead of loading it
+    objects = main.start_level(level_path)
+    level = main.level
+    player, grid, tile_layer, firework_obj = level.player, level.grid, level.tile_layer, level.firework_objects
+    offset_x = 0
+    background = main.get_parallax_background() if render else None
+
+    for tick in range(max_ticks):
+        loudness, left, right, space, voice = script.get(tick)
+        # same as the SPACE keydowns in GAME_SCENE, they come in before the tick
+        for _ in range(space):
+            if player.jump_count < 2:
+                player.jump()
+        keys = {pygame.K_LEFT: left, pygame.K_RIGHT: right}
+        level.update(offset_x)
+        objects, offset_x = main.game_tick(player, objects, grid, tile_layer, firework_obj, offset_x,
+                                           keys, loudness, level.masks, level.animations, voice)
+        if render:
+            main.draw(main.window, background, player, tile_layer, firework_obj, offset_x, main.scroll)
+            pygame.display.update()
+            # keeps a real window responsive, the game's own events do not matter here
+            pygame.event.pump()
+        if main.finished:
+            return "finished", tick + 1
+        if main.death_trigger:
+            return "dead", tick + 1
+
+    return "timeout", max_ticks
+
+
+def run_episode_args(args):
+    return run_episode(*args)
+
+
+def run_episodes(level_path, scripts, processes=None, max_ticks=MAX_TICKS, render=False, stream=False):
+    """
+    Runs one episode per script over a process pool (all cores by default).
+    Results come back in the same order as the scripts.
+    Rendered episodes all draw to this process's window, one after the other.
+    """
+    jobs = [(level_path, script, max_ticks, render, stream) for script in scripts]
+    if not jobs:
+        return []
+    if render:
+        return [run_episode_args(job) for job in jobs]
+    workers = processes or os.cpu_count() or 1
+    chunksize = max(1, len(jobs) // (workers * 4))
+    # forking after pygame has started its threads can deadlock the workers, start them clean
+    pool = multiprocessing.get_context("spawn").Pool(processes)
+    try:
+        return pool.map(run_episode_args, jobs, chunksize)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Run scripted levels without a window or microphone.")
+    parser.add_argument("level", help="path to the .tmx level")
+    parser.add_argument("scripts", nargs="*", help=f"input script files or input logs (*{SUFFIX})")
+    parser.add_argument("--audio", action="append", default=[], help="audio source spec to play instead of a script")
+    parser.add_argument("-j", "--processes", type=int, default=None, help="worker processes, all cores by default")
+    parser.add_argument("--max-ticks", type=int, default=MAX_TICKS)
+    parser.add_argument("--render", action="store_true", help="draw every tick, in this process")
+    parser.add_argument("--stream", action="store_true", help="load the level in chunks like main.py --stream")
+    parser.add_argument("--expect", choices=["finished", "dead", "timeout"],
+                        help="exit with status 1 if any episode ends differently")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    # audio specs go to the workers as strings, each one opens its own source
+    scripts = [load_script(path) for path in args.scripts] + args.audio
+    results = run_episodes(args.level, scripts, args.processes, args.max_ticks, args.render, args.stream)
+
+    failed = False
+    for path, (outcome, ticks) in zip(args.scripts + args.audio, results):
+        print(f"{path}: {outcome} after {ticks} ticks")
+        if args.expect and outcome != args.expect:
+            failed = True
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,119 @@
+"""
+Input logs of GAME_SCENE
+
+With --record main.py writes what went into every tick of a level attempt
+to a log: the loudness handed to game_tick, the arrow keys, the SPACE
+presses since the tick before and, with --voice-jump, the voice onset.
+headless.py plays a log back through game_tick (so handle_move and
+Player.loop) as fast as it can, with or without drawing, and ends up where
+the attempt ended. Everything else a level does (e.g. how long a stick
+shakes) counts ticks, so the input is all a log needs.
+
+A log is a header, then one TICK record per tick:
+
+    magic b"SFIL", version u1, tick rate u2, loudness_threshold f8,
+    flags u1 (FLAG_VOICE_JUMP), level path length u2 and the path in UTF-8
+
+    loudness f8 (the same float the game compared), keys u1 (LEFT, RIGHT,
+    VOICE bits and the SPACE press count from bit 2 on)
+
+The records are read back as a NumPy structured array without a copy.
+"""
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"SFIL"
+VERSION = 1
+SUFFIX = ".sfil"
+HEADER = struct.Struct("<4sBHdBH")
+TICK = struct.Struct("<dB")
+TICK_DTYPE = np.dtype([("loudness", "<f8"), ("keys", "u1")])
+
+FLAG_VOICE_JUMP = 1
+LEFT, RIGHT, VOICE = 1, 2, 128
+SPACE_SHIFT = 2
+# presses of SPACE between two ticks that fit, more than two never do anything anyway
+MAX_SPACE = 3
+
+
+class InputRecorder:
+    '''
+    Writes the ticks of one level attempt as they are played
+    '''
+
+    def __init__(self, path, level_path, tick_rate, threshold, voice_jump=False):
+        self.path = path
+        self.file = open(path, "wb")
+        level = level_path.encode("utf-8")
+        self.file.write(HEADER.pack(MAGIC, VERSION, tick_rate, threshold, FLAG_VOICE_JUMP if voice_jump else 0,
+                                    len(level)))
+        self.file.write(level)
+        self.ticks = 0
+
+    def record(self, loudness, left=False, right=False, space=0, voice=None):
+        keys = (LEFT if left else 0) | (RIGHT if right else 0) | (VOICE if voice else 0)
+        self.file.write(TICK.pack(loudness, keys | min(int(space), MAX_SPACE) << SPACE_SHIFT))
+        self.ticks += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+class InputLog:
+    '''
+    A recorded attempt, hands its ticks out like headless.ScriptedInput does
+    '''
+
+    def __init__(self, level_path, tick_rate, threshold, voice_jump, ticks):
+        self.level_path = level_path
+        self.tick_rate = tick_rate
+        self.threshold = threshold
+        self.voice_jump = voice_jump
+        self.ticks = ticks
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def get(self, tick):
+        """
+        (loudness, left, right, space presses, voice) of a tick, silence once the log runs out.
+        """
+        voice = False if self.voice_jump else None
+        if tick >= len(self.ticks):
+            return 0.0, False, False, 0, voice
+        loudness, keys = self.ticks[tick].item()
+        if self.voice_jump:
+            voice = bool(keys & VOICE)
+        return loudness, bool(keys & LEFT), bool(keys & RIGHT), keys >> SPACE_SHIFT & MAX_SPACE, voice
+
+
+def next_log_path(directory):
+    """
+    First run-NNN.sfil in `directory` that is not taken yet.
+    """
+    os.makedirs(directory, exist_ok=True)
+    number = 1
+    while os.path.exists(os.path.join(directory, f"run-{number:03d}{SUFFIX}")):
+        number += 1
+    return os.path.join(directory, f"run-{number:03d}{SUFFIX}")
+
+
+def load_log(path):
+    """
+    Reads a log written by InputRecorder, raises ValueError if it is not one.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is not an input log")
+    magic, version, tick_rate, threshold, flags, length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not an input log of version {VERSION}")
+    level_path = data[HEADER.size:HEADER.size + length].decode("utf-8")
+    body = data[HEADER.size + length:]
+    # a log cut short by a crash keeps its whole ticks
+    ticks = np.frombuffer(body, dtype=TICK_DTYPE, count=len(body) // TICK_DTYPE.itemsize)
+    return InputLog(level_path, tick_rate, threshold, bool(flags & FLAG_VOICE_JUMP), ticks)
@@ -0,0 +1,175 @@
+"""
+Compiled level cache
+
+Parsing a TMX map through pytmx and looking up the tile properties gid by gid
+is slow, and GAME_SCENE does it on every restart. compile_level() reduces a
+map to what the game uses: a (layers, height, width) grid of tile type codes
+(index into sprite_loader.TILE_TYPES plus one, 0 for no tile) and the tile
+size. The spawn, finish and firework positions are the cells holding
+startingPoint, FinishPoint and firework codes.
+
+load_level() keeps the compiled map as an .npz in a .levelcache folder next to
+the map. The cache is used as long as the map and its tilesets have the mtimes
+and sizes it was built from, or failing that the same SHA-1. Otherwise it is
+compiled again.
+
+    python level_cache.py Level/Level1_map.tmx     (compile ahead of time)
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ElementTree
+
+import numpy as np
+import pytmx
+
+from sprite_loader import TILE_TYPES, build_level, read_tmx_tiles
+
+CACHE_DIR = ".levelcache"
+# bump when the layout of the .npz changes
+FORMAT_VERSION = 1
+
+
+def cache_path(tmx_file):
+    folder, name = os.path.split(os.path.abspath(tmx_file))
+    return os.path.join(folder, CACHE_DIR, os.path.splitext(name)[0] + ".npz")
+
+
+def source_files(tmx_file):
+    """
+    The map and the external tilesets it uses, everything the compiled level depends on.
+    """
+    folder = os.path.dirname(os.path.abspath(tmx_file))
+    sources = [os.path.abspath(tmx_file)]
+    for tileset in ElementTree.parse(tmx_file).getroot().iter("tileset"):
+        if "source" in tileset.attrib:
+            sources.append(os.path.normpath(os.path.join(folder, tileset.attrib["source"])))
+    return sources
+
+
+def stamps(sources):
+    """
+    (mtime_ns, size) of every source, -1s for a missing one.
+    """
+    result = []
+    for path in sources:
+        try:
+            stat = os.stat(path)
+            result.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            result.append((-1, -1))
+    return np.array(result, dtype=np.int64).reshape(-1, 2)
+
+
+def digest(sources):
+    sha = hashlib.sha1()
+    for path in sources:
+        with open(path, "rb") as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+def compile_level(tmx_file):
+    """
+    Parses a map and returns its tile type grid and tile size.
+    """
+    # no image loader, the compiled level only needs the tile properties
+    tmx_data = pytmx.TiledMap(tmx_file)
+    layers = sum(1 for layer in tmx_data.visible_layers if hasattr(layer, "tiles"))
+    types = np.zeros((layers, tmx_data.height, tmx_data.width), dtype=np.int8)
+    codes = {tile_type: code for code, tile_type in enumerate(TILE_TYPES, 1)}
+    for layer, x, y, tile_type in read_tmx_tiles(tmx_data):
+        types[layer, y, x] = codes.get(tile_type, 0)
+    return types, tmx_data.tilewidth
+
+
+def write_cache(path, types, block_size, sources):
+    folder, name = os.path.split(path)
+    os.makedirs(folder, exist_ok=True)
+    # write then rename, so a game started at the same time never reads half a file,
+    # each writer its own temp file, pool workers loading the same level all write the cache
+    handle, temp = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(handle, "wb") as f:
+            np.savez(f, version=FORMAT_VERSION, types=types, block_size=block_size,
+                     sources=np.array(sources), stamps=stamps(sources), digest=digest(sources))
+        os.replace(temp, path)
+    except BaseException:
+        os.remove(temp)
+        raise
+
+
+def read_cache(path):
+    """
+    Returns (types, block_size) if the cache at path is still good for its sources, else None.
+    """
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != FORMAT_VERSION:
+                return None
+            types, block_size = data["types"], int(data["block_size"])
+            sources = [str(source) for source in data["sources"]]
+            cached_stamps, cached_digest = data["stamps"], str(data["digest"])
+    except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile):
+        # missing, from another version or not a whole .npz, compiled again and overwritten
+        return None
+
+    if np.array_equal(stamps(sources), cached_stamps):
+        return types, block_size
+    # touched but maybe not changed (a checkout, a copy), compare contents before compiling again
+    try:
+        if digest(sources) != cached_digest:
+            return None
+    except OSError:
+        return None
+    try:
+        write_cache(path, types, block_size, sources)
+    except OSError:
+        pass
+    return types, block_size
+
+
+def compiled_level(tmx_file):
+    """
+    The (types, block_size) of a map, from the cache when it is up to date.
+    """
+    path = cache_path(tmx_file)
+    cached = read_cache(path)
+    if cached is not None:
+        return cached
+    types, block_size = compile_level(tmx_file)
+    try:
+        write_cache(path, types, block_size, source_files(tmx_file))
+    except OSError:
+        # a read-only install still plays, it just compiles every time
+        pass
+    return types, block_size
+
+
+def level_tiles(types, first_column=0):
+    """
+    Yields (x, y, tile_type) in the same order as the map, layer by layer, row by row.
+    `types` can be a slice of columns starting at first_column, x is still the map column.
+    """
+    layers, ys, xs = np.nonzero(types)
+    codes = types[layers, ys, xs]
+    for x, y, code in zip((xs + first_column).tolist(), ys.tolist(), codes.tolist()):
+        yield x, y, TILE_TYPES[code - 1]
+
+
+def load_level(tmx_file):
+    """
+    Same result as sprite_loader.load_objects_from_tmx, built from the compiled level:
+    (objects, firework_objects, grid, masks, animations).
+    """
+    types, block_size = compiled_level(tmx_file)
+    return build_level(level_tiles(types), block_size)
+
+
+if __name__ == "__main__":
+    for tmx in sys.argv[1:]:
+        types, size = compile_level(tmx)
+        write_cache(cache_path(tmx), types, size, source_files(tmx))
+        print(f"{tmx}: {np.count_nonzero(types)} tiles -> {cache_path(tmx)}")
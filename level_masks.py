@@ -0,0 +1,226 @@
+"""
+Level-wide collision masks
+
+The tiles never move, so instead of testing the player mask against every
+nearby tile mask one by one, LevelMasks ORs them into one pygame Mask per
+collision category covering the whole level: SOLID (grass, dirt, sticks) and
+HAZARD (spikes), the categories of the entity table in entities.py. "Is the
+player touching anything" is then one overlap() call per category at the
+player's offset.
+
+Objects that move or change frames (a shaking stick, fire) are taken out of
+the masks with release() and tested on their own, only the ones in the grid
+cells around the tested mask. Taking an object out erases its bits and
+redraws whatever other object shared those pixels, so the masks stay the
+exact union of the objects still in them.
+
+sweep() moves a mask along one axis up to the first pixel it would touch,
+which is how the player moves.
+
+A streamed level (level_stream.py) has a LevelMasks per loaded chunk, and
+StreamedMasks tests the one or two a mask reaches into.
+"""
+import pygame
+
+from entities import SOLID, HAZARD, categories_of
+from sprite_loader import Animated
+from spatial_hash import SpatialHash
+
+# the categories that get a mask
+CATEGORIES = (SOLID, HAZARD)
+
+
+def category_of(obj):
+    """
+    The mask an object is drawn into, None if it is tested on its own (animated ones change their mask).
+    """
+    if isinstance(obj, Animated):
+        return None
+    for category in categories_of(obj):
+        if category in CATEGORIES:
+            return category
+    return None
+
+
+# (mask, steps, horizontal) -> smeared mask, the player only has so many frames and speeds
+SMEARS = {}
+
+
+def smear(mask, steps, horizontal=True):
+    """
+    The union of `mask` shifted by 0 to `steps` pixels along one axis, in log2(steps) draws.
+    """
+    key = (mask, steps, horizontal)
+    if key in SMEARS:
+        return SMEARS[key]
+    width, height = mask.get_size()
+    smeared = pygame.mask.Mask((width + steps, height) if horizontal else (width, height + steps))
+    smeared.draw(mask, (0, 0))
+    # shifts 0..covered are in, drawing a copy `shift` further on adds covered+1..covered+shift
+    covered = 0
+    while covered < steps:
+        shift = min(covered + 1, steps - covered)
+        smeared.draw(smeared.copy(), (shift, 0) if horizontal else (0, shift))
+        covered += shift
+    SMEARS[key] = smeared
+    return smeared
+
+
+class LevelMasks:
+    '''
+    One bit mask per collision category for all static tiles of a level,
+    everything else that collides is kept in the `dynamic` grid and tested per object
+    '''
+
+    def __init__(self, objects, cell_size=48):
+        static = [obj for obj in objects if category_of(obj) is not None]
+        # a shaking stick moves a few pixels from where it was put in, the default query margin covers that
+        self.dynamic = SpatialHash(cell_size)
+        for obj in objects:
+            if category_of(obj) is None:
+                self.dynamic.insert(obj)
+        bounds = static[0].rect.unionall([obj.rect for obj in static]) if static else pygame.Rect(0, 0, 1, 1)
+        self.origin = bounds.topleft
+        self.masks = {category: pygame.mask.Mask(bounds.size) for category in CATEGORIES}
+        # where each object was drawn, so it can be erased even after its rect moved
+        self.positions = {}
+        # to find the neighbours that have to be redrawn after erasing an object
+        self.index = SpatialHash(cell_size)
+
+        for obj in static:
+            self.positions[obj] = (obj.rect.x - self.origin[0], obj.rect.y - self.origin[1])
+            self.masks[category_of(obj)].draw(obj.mask, self.positions[obj])
+            self.index.insert(obj)
+
+    def __contains__(self, obj):
+        return obj in self.positions
+
+    def overlaps_mask(self, mask, x, y, categories=CATEGORIES):
+        """
+        True if `mask` with its top left at (x, y) would touch anything in the given categories,
+        the same answer collide_mask against every object would give.
+        """
+        offset = (x - self.origin[0], y - self.origin[1])
+        for category in categories:
+            if self.masks[category].overlap(mask, offset):
+                return True
+
+        for obj in self.dynamic.query(pygame.Rect((x, y), mask.get_size())):
+            if (any(category in categories for category in categories_of(obj))
+                    and mask.overlap(obj.mask, (obj.rect.x - x, obj.rect.y - y))):
+                return True
+        return False
+
+    def overlaps(self, player, dx=0, dy=0, categories=CATEGORIES):
+        return self.overlaps_mask(player.mask, player.rect.x + dx, player.rect.y + dy, categories)
+
+    def sweep(self, mask, x, y, dx, dy):
+        """
+        Moves `mask` from (x, y) by dx or dy (one of them must be 0) until it would touch something.
+        Returns (distance moved, stopped). Every pixel of the way is tested, so a fast move
+        cannot skip over a thin tile. The start position is assumed to be clear.
+        """
+        move = dx or dy
+        if move == 0:
+            return 0, False
+        horizontal = dx != 0
+        sign = 1 if move > 0 else -1
+
+        def hits(steps):
+            # the mask smeared over the first `steps` pixels of the move
+            if sign > 0:
+                return self.overlaps_mask(smear(mask, steps, horizontal), x, y)
+            if horizontal:
+                return self.overlaps_mask(smear(mask, steps, horizontal), x - steps, y)
+            return self.overlaps_mask(smear(mask, steps, horizontal), x, y - steps)
+
+        if not hits(abs(move)):
+            return move, False
+        # hits() only grows with steps, find the last clear step
+        clear, blocked = 0, abs(move)
+        while blocked - clear > 1:
+            middle = (clear + blocked) // 2
+            if hits(middle):
+                blocked = middle
+            else:
+                clear = middle
+        return sign * clear, True
+
+    def erase(self, obj):
+        position = self.positions.pop(obj)
+        self.index.remove(obj)
+        category = category_of(obj)
+        mask = self.masks[category]
+        mask.erase(obj.mask, position)
+        # tiles can overlap, put back the bits the neighbours still cover
+        area = pygame.Rect(position[0] + self.origin[0], position[1] + self.origin[1], *obj.mask.get_size())
+        for other in self.index.query(area, margin=0):
+            if category_of(other) == category:
+                mask.draw(other.mask, self.positions[other])
+
+    def release(self, obj):
+        """
+        Takes an object out of the masks and tests it on its own from now on (e.g. a shaking stick).
+        """
+        if obj in self.positions:
+            self.erase(obj)
+            self.dynamic.insert(obj)
+
+    def remove(self, obj):
+        """
+        Stops colliding with an object at all (e.g. a broken stick).
+        """
+        if obj in self.positions:
+            self.erase(obj)
+        self.dynamic.remove(obj)
+
+    def snapshot(self):
+        return ({category: mask.copy() for category, mask in self.masks.items()}, dict(self.positions),
+                self.dynamic.snapshot(), self.index.snapshot())
+
+    def restore(self, state):
+        masks, positions, dynamic, index = state
+        self.masks = {category: mask.copy() for category, mask in masks.items()}
+        self.positions = dict(positions)
+        self.dynamic.restore(dynamic)
+        self.index.restore(index)
+
+
+class StreamedMasks(LevelMasks):
+    '''
+    The LevelMasks of the loaded chunks of a streamed level, overlaps() and sweep() work the same over them
+    '''
+
+    def __init__(self, chunk_width, margin=48):
+        self.chunk_width = chunk_width
+        # objects stick out of their chunk by less than this (a shaking stick, a fire)
+        self.margin = margin
+        self.chunks = {}
+
+    def __contains__(self, obj):
+        return any(obj in masks for masks in self.chunks.values())
+
+    def add_chunk(self, index, masks):
+        self.chunks[index] = masks
+
+    def drop_chunk(self, index):
+        self.chunks.pop(index, None)
+
+    def overlaps_mask(self, mask, x, y, categories=CATEGORIES):
+        first = (x - self.margin) // self.chunk_width
+        last = (x + mask.get_size()[0] + self.margin) // self.chunk_width
+        for index in range(first, last + 1):
+            masks = self.chunks.get(index)
+            if masks is not None and masks.overlaps_mask(mask, x, y, categories):
+                return True
+        return False
+
+    def release(self, obj):
+        for masks in self.chunks.values():
+            if obj in masks:
+                masks.release(obj)
+                return
+
+    def remove(self, obj):
+        for masks in self.chunks.values():
+            masks.remove(obj)
@@ -0,0 +1,69 @@
+"""
+Level snapshot for restarting in place
+
+Building a level means loading the map, making every object and baking the
+tile chunks. A LevelSnapshot is taken once right after that and restore() puts
+the same objects back the way they started: broken sticks come back into the
+entity registry, the collision grid, the level masks and the baked chunks, and positions,
+velocities and animation counters (the AnimationStore's too) are reset.
+"""
+import pygame
+
+from entities import EntityRegistry
+
+
+def copy_state(state):
+    """
+    Copy of an attribute dict, Rects are copied too since the game moves them in place.
+    """
+    return {name: value.copy() if isinstance(value, pygame.Rect) else value for name, value in state.items()}
+
+
+def restore_object(obj, state):
+    # attributes set after the snapshot (e.g. Firework.type_num) have to go as well
+    obj.__dict__.clear()
+    obj.__dict__.update(copy_state(state))
+
+
+class LevelSnapshot:
+    '''
+    A loaded level (player, objects, fireworks, collision grid, tile layer, level masks and animations) plus
+    how it all looked at the start, so a restart costs a few dict copies instead of a reload
+    '''
+
+    def __init__(self, player, objects, firework_objects, grid, tile_layer, masks, animations):
+        self.player = player
+        self.objects = list(objects)
+        self.firework_objects = list(firework_objects)
+        self.grid = grid
+        self.tile_layer = tile_layer
+        self.masks = masks
+        self.animations = animations
+        self.entities = EntityRegistry(self.objects)
+
+        # restore() brings back exactly these attributes, so the player has to have its first frame already,
+        # GAME_SCENE can draw a restart before its first tick
+        self.states = {obj: copy_state(vars(obj)) for obj in [player] + self.objects + self.firework_objects}
+        self.grid_state = grid.snapshot()
+        self.layer_state = tile_layer.snapshot()
+        self.masks_state = masks.snapshot()
+        self.animations_state = animations.snapshot()
+        self.entities_state = self.entities.snapshot()
+
+    def restore(self):
+        """
+        Puts everything back to the snapshot, returns the EntityRegistry to play with.
+        """
+        for obj, state in self.states.items():
+            restore_object(obj, state)
+        self.grid.restore(self.grid_state)
+        self.tile_layer.restore(self.layer_state)
+        self.masks.restore(self.masks_state)
+        self.animations.restore(self.animations_state)
+        self.entities.restore(self.entities_state)
+        return self.entities
+
+    def update(self, offset_x):
+        """
+        Nothing to do, all of the level is loaded. A LevelStream loads around offset_x here.
+        """
@@ -0,0 +1,186 @@
+"""
+Streaming levels in column chunks
+
+load_level makes every object of a map up front and keeps it for the whole
+run, along with collision masks and baked tile surfaces as long as the
+level. A LevelStream only keeps the compiled tile grid (level_cache.py, a
+byte per cell) and turns it into objects CHUNK_COLUMNS columns at a time,
+the columns of one ChunkedTileLayer chunk.
+
+Before every tick update(offset_x) asks a loader thread for the chunks up to
+LOOKAHEAD pixels past the right edge of the window. The thread makes the
+objects (build_level), the chunk's LevelMasks and its baked tile surface, so
+the main thread only hands them over to the collision grid, the
+EntityRegistry, the tile layer, the StreamedMasks and the AnimationStore.
+Chunks more than BEHIND pixels left of the window are let go. A chunk the
+window needs that the thread has not finished yet is waited for, the player
+never walks on tiles that are not there.
+
+Sticks that broke are remembered by their cell, so a chunk that is loaded
+again comes back without them. Everything else in it starts over. How many
+chunks are alive depends on the window width, not on the length of the
+level.
+
+A LevelStream has the attributes of a LevelSnapshot, GAME_SCENE plays it
+with --stream.
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from animation_store import AnimationStore
+from entities import EntityRegistry
+from level_cache import compiled_level, level_tiles
+from level_masks import StreamedMasks
+from level_state import copy_state, restore_object
+from spatial_hash import SpatialHash
+from sprite_loader import TILE_TYPES, Animated, BreakingStick, build_level
+from tile_layer import CHUNK_WIDTH, CULL_MARGIN, ChunkedTileLayer
+
+# one CHUNK_WIDTH of 48 px tiles
+CHUNK_COLUMNS = 16
+# pixels past the right edge of the window loaded in the background, and kept left of it
+LOOKAHEAD = CHUNK_WIDTH
+BEHIND = CHUNK_WIDTH
+# the tiles baked into the tile layer, the rows they are in are as high as its surfaces go
+STATIC_TILES = ("grassBlock", "stick", "Spike", "dirtBlock")
+
+# what the loader thread hands over, grid is the chunk's own SpatialHash (what collides), masks its LevelMasks
+Chunk = namedtuple("Chunk", "index objects firework_objects grid masks surface")
+
+
+class LevelStream:
+    '''
+    A level that is only loaded around the camera, played like a LevelSnapshot
+    '''
+
+    def __init__(self, player, types, block_size, view_width):
+        self.player = player
+        self.types = types
+        self.block_size = block_size
+        self.view_width = view_width
+        self.chunk_width = CHUNK_COLUMNS * block_size
+        self.count = -(-types.shape[2] // CHUNK_COLUMNS)
+        codes = [TILE_TYPES.index(name) + 1 for name in STATIC_TILES]
+        rows = np.flatnonzero(np.isin(types, codes).any(axis=(0, 2)))
+        span = (int(rows[0]) * block_size, (int(rows[-1]) + 1) * block_size) if len(rows) else (0, 0)
+
+        self.grid = SpatialHash(block_size)
+        self.tile_layer = ChunkedTileLayer([], self.chunk_width, span=span)
+        self.masks = StreamedMasks(self.chunk_width, block_size)
+        self.animations = AnimationStore()
+        self.entities = EntityRegistry()
+        # the list the game holds on to, chunks add and take out theirs in place
+        self.firework_objects = []
+        self.chunks = {}
+        # chunk index -> Future of its Chunk
+        self.pending = {}
+        # (column, row) of every stick that broke since the level started
+        self.broken = set()
+        self.loader = ThreadPoolExecutor(1, thread_name_prefix="level-stream")
+        # chunks the window needed before the loader had them ready, each one a hitch
+        self.stalls = 0
+        # like LevelSnapshot, taken from a player that already has a frame to draw
+        self.player_state = copy_state(vars(player))
+
+    def restore(self):
+        """
+        Starts the level over with the chunks around the spawn, returns the EntityRegistry to play with.
+        """
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        for index in list(self.chunks):
+            self.drop(index)
+        self.broken.clear()
+        restore_object(self.player, self.player_state)
+        self.update(0)
+        # the level is not playing yet, waiting for its start is no hitch
+        self.stalls = 0
+        return self.entities
+
+    def update(self, offset_x):
+        """
+        Loads the chunks from BEHIND left of the window to LOOKAHEAD right of it and lets go of the rest.
+        """
+        first = max(0, (offset_x - BEHIND) // self.chunk_width)
+        # the window and what is culled around it have to be there this tick
+        needed = min(self.count - 1, (offset_x + self.view_width + CULL_MARGIN) // self.chunk_width)
+        last = min(self.count - 1, (offset_x + self.view_width + LOOKAHEAD) // self.chunk_width)
+        for index in [index for index in self.chunks if not first <= index <= last]:
+            self.drop(index)
+        for index in [index for index in self.pending if not first <= index <= last]:
+            self.pending.pop(index).cancel()
+        for index in range(first, last + 1):
+            if index not in self.chunks and index not in self.pending:
+                self.pending[index] = self.loader.submit(self.build, index)
+        for index in list(self.pending):
+            future = self.pending[index]
+            if future.done() or index <= needed:
+                if not future.done():
+                    self.stalls += 1
+                self.attach(self.pending.pop(index).result())
+
+    def build(self, index):
+        """
+        Makes the objects, masks and tile surface of one chunk, on the loader thread.
+        """
+        start = index * CHUNK_COLUMNS
+        tiles = [(x, y, tile_type)
+                 for x, y, tile_type in level_tiles(self.types[:, :, start:start + CHUNK_COLUMNS], start)
+                 if tile_type != "stick" or (x, y) not in self.broken]
+        # the objects animate in a store of their own until attach() moves them over
+        objects, firework_objects, grid, masks, _ = build_level(tiles, self.block_size)
+        static = [obj for obj in objects if isinstance(obj, ChunkedTileLayer.STATIC_TYPES)]
+        return Chunk(index, objects, firework_objects, grid, masks, self.tile_layer.render(index, static))
+
+    def attach(self, chunk):
+        """
+        Puts a built chunk into the level, on the main thread between ticks.
+        """
+        for obj in chunk.objects + chunk.firework_objects:
+            if isinstance(obj, Animated):
+                obj.slot = self.animations.take(obj.animations, obj.slot)
+                obj.animations = self.animations
+        for obj in chunk.objects:
+            if obj in chunk.grid:
+                self.grid.insert(obj)
+            self.entities.add(obj)
+        self.firework_objects.extend(chunk.firework_objects)
+        self.tile_layer.add_chunk(chunk.index, chunk.objects, chunk.surface)
+        self.masks.add_chunk(chunk.index, chunk.masks)
+        self.chunks[chunk.index] = chunk
+
+    def drop(self, index):
+        """
+        Lets go of a chunk and everything in it.
+        """
+        chunk = self.chunks.pop(index)
+        for obj in chunk.objects:
+            # flush() took it out of the registry, so it broke
+            if isinstance(obj, BreakingStick) and obj not in self.entities:
+                self.broken.add((obj.original_x // self.block_size, obj.original_y // self.block_size))
+            if isinstance(obj, Animated):
+                self.animations.remove(obj.slot)
+            self.grid.remove(obj)
+            self.entities.remove(obj)
+        for obj in chunk.firework_objects:
+            self.animations.remove(obj.slot)
+        self.firework_objects[:] = [obj for obj in self.firework_objects if obj not in chunk.firework_objects]
+        self.tile_layer.drop_chunk(index, chunk.objects)
+        self.masks.drop_chunk(index)
+
+    def close(self):
+        """
+        Stops the loader thread, the chunks that are loaded stay usable.
+        """
+        self.loader.shutdown(wait=False, cancel_futures=True)
+
+
+def stream_level(player, tmx_file, view_width):
+    """
+    A LevelStream of a map, from the level cache when it is up to date.
+    """
+    types, block_size = compiled_level(tmx_file)
+    return LevelStream(player, types, block_size, view_width)
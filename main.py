@@ -1,26 +1,55 @@
 import sys
+import argparse
+from collections import namedtuple
 import pygame.display
 
 import get_MIC
 from get_MIC import *
 from sprite_loader import *
 from UI import *
+from tile_layer import ChunkedTileLayer
+from level_cache import load_level
+from level_state import LevelSnapshot
+from level_stream import LevelStream, stream_level
+from entities import TRIGGER
+from input_log import InputRecorder, next_log_path
+from profiler import FrameProfiler, enabled_by_env, WAIT, EVENTS, PLAYER, OBJECTS, HANDLE_MOVE, DRAW, MIC_ICON, DISPLAY
 
 pygame.init()
 pygame.display.set_caption("Scream Frog")
 
 FPS = 60
+# the simulation always advances in fixed ticks, whatever the frame rate
+TICK_RATE = 60
+TICK_MS = 1000 / TICK_RATE
+# ticks allowed per rendered frame before the backlog is dropped
+MAX_TICKS_PER_FRAME = 5
 PLAYER_VEL = 5
+SCROLL_AREA_WIDTH = 200
 scroll = 0
 clock = pygame.time.Clock()
 window = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
 
 loudness_threshold = 200
+# jump on voice onsets (voice_detector.py) instead of the loudness threshold, --voice-jump
+voice_jump = False
+# every level attempt is written to an input log in here (input_log.py), --record
+record_dir = None
+# load levels in chunks around the camera (level_stream.py) instead of all at once, --stream
+stream_levels = False
 current_scene = "START_SCENE"
 death_trigger = False
 death_time = None
 finish_time = None
 objects = []
+LEVEL_PATH = "./Level/Level1_map.tmx"
+# top left of the player at the start of every level
+SPAWN = (50, 200)
+# the LevelSnapshot of the level being played and the path it came from, restarts reuse it
+level = None
+level_path = None
+mic_icon = None
+frame_profiler = FrameProfiler(enabled=enabled_by_env())
 
 
 class Player(pygame.sprite.Sprite):
@@ -29,7 +58,6 @@ class Player(pygame.sprite.Sprite):
     '''
     COLOR = (255, 0, 0)
     GRAVITY = 1
-    SPRITES = load_sprite_sheets("Sprites", "Frog", 32, 32, True)
     ANIMATION_DELAY = 3
     global current_scene
 
@@ -38,7 +66,6 @@ class Player(pygame.sprite.Sprite):
         self.rect = pygame.Rect(x, y, width, height)
         self.x_vel = 0
         self.y_vel = 0
-        self.mask = None
         self.direction = "left"
         self.animation_count = 0
         self.fall_count = 0
@@ -46,6 +73,15 @@ class Player(pygame.sprite.Sprite):
         self.hit = False
         self.hit_count = 0
         self.isHurting = False
+        # where the last tick left the player, for drawing in between ticks
+        self.prev_x, self.prev_y = x, y
+        # what the last move ran into, see move_and_collide
+        self.contacts = []
+        # shared with every other player, frames and masks are only built once per process
+        self.sprites = load_animation_set("Sprites", "Frog", 32, 32, True)
+        # a frame can be drawn before the first tick picks one, start on the first idle frame
+        self.sprite = self.sprites["idle_" + self.direction][0]
+        self.mask = self.sprites.mask_of(self.sprite)
 
     def jump(self):
         self.y_vel = -self.GRAVITY * 8
@@ -75,9 +111,14 @@ class Player(pygame.sprite.Sprite):
             self.direction = "right"
             self.animation_count = 0
 
-    def loop(self, fps):
+    def loop(self, fps, grid=None, masks=None):
+        """
+        One tick of gravity, movement and animation.
+        With the level's grid and masks the move stops at walls, floors and ceilings and
+        self.contacts says what was hit, without them the player goes through everything.
+        """
+        self.prev_x, self.prev_y = self.rect.x, self.rect.y
         self.y_vel += min(1, (self.fall_count / fps) * self.GRAVITY)
-        self.move(self.x_vel, self.y_vel)
 
         if self.hit:
             self.hit_count += 1
@@ -87,8 +128,24 @@ class Player(pygame.sprite.Sprite):
             self.hit_count = 0
 
         self.fall_count += 1
+        # pick the frame first, the move has to be swept with the mask it ends up drawn with
         self.update_sprite()
 
+        self.contacts = []
+        if masks is None:
+            self.move(self.x_vel, self.y_vel)
+            return
+        # whole pixels the same way Rect rounds them
+        target = self.rect.copy()
+        target.x += self.x_vel
+        target.y += self.y_vel
+        self.contacts = move_and_collide(self, target.x - self.rect.x, target.y - self.rect.y, grid, masks)
+        for contact in self.contacts:
+            if contact.normal == (0, -1):
+                self.landed()
+            elif contact.normal == (0, 1):
+                self.hit_head()
+
     def landed(self):
         self.fall_count = 0
         self.y_vel = 0
@@ -114,7 +171,7 @@ class Player(pygame.sprite.Sprite):
             sprite_sheet = "run"
 
         sprite_sheet_name = sprite_sheet + "_" + self.direction
-        sprites = self.SPRITES[sprite_sheet_name]
+        sprites = self.sprites[sprite_sheet_name]
         sprite_index = (self.animation_count //
                         self.ANIMATION_DELAY) % len(sprites)
         self.sprite = sprites[sprite_index]
@@ -123,95 +180,134 @@ class Player(pygame.sprite.Sprite):
 
     def update(self):
         self.rect = self.sprite.get_rect(topleft=(self.rect.x, self.rect.y))
-        self.mask = pygame.mask.from_surface(self.sprite)
+        self.mask = self.sprites.mask_of(self.sprite)
 
-    def draw(self, win, offset_x):
-        win.blit(self.sprite, (self.rect.x - offset_x, self.rect.y))
+    def draw(self, win, offset_x, alpha=1):
+        """
+        alpha is how far we are between the last two ticks (0 to 1).
+        """
+        x = round(self.prev_x + (self.rect.x - self.prev_x) * alpha)
+        y = round(self.prev_y + (self.rect.y - self.prev_y) * alpha)
+        win.blit(self.sprite, (x - offset_x, y))
 
 
-def draw(window, bg_images, bg_width, player, objects, firework_obj, offset_x):
+def draw(window, background, player, tile_layer, firework_obj, offset_x, bg_scroll, alpha=1):
     """
     Draws the game scene, including background, player, and objects.
+    offset_x and bg_scroll are already interpolated between ticks, alpha is passed on to the player.
     """
     global finished
 
     # parallel background, each layer move in different vel, makes 2d looks like 3d
-    for x in range(5):
-        bg_speed = 0.1
-        for i in bg_images:
-            window.blit(i, ((x * bg_width) - scroll * bg_speed, 0))
-            bg_speed += 0.2
+    background.draw(window, bg_scroll)
 
-    for obj in objects:
-        obj.draw(window, offset_x)
+    # static tiles come pre-baked in chunks, only the visible ones are blitted
+    tile_layer.draw(window, offset_x)
 
-    player.draw(window, offset_x)
+    player.draw(window, offset_x, alpha)
 
     # when finished set on fireworks
     if finished:
         for obj in firework_obj:
-            obj.on()
-            obj.loop()
             obj.draw(window, offset_x)
 
     # pygame.display.update()
 
 
-def handle_vertical_collision(player, objects, dy):
+# normal points away from the object, (0, -1) is standing on it
+Contact = namedtuple("Contact", "obj normal")
+
+
+def collide_mask_at(player, obj, dx, dy=0):
     """
-    Handles vertical collisions for the player and updates position/state.
+    Same test as pygame.sprite.collide_mask, but as if the player was moved by (dx, dy).
+    The player is not touched, so its cached frame mask can be used as is.
     """
-    collided_objects = []
-    for obj in objects:
-        if pygame.sprite.collide_mask(player, obj):
-            if dy > 0:
-                player.rect.bottom = obj.rect.top
-                player.landed()
-            elif dy < 0:
-                player.rect.top = obj.rect.bottom
-                player.hit_head()
+    offset = (obj.rect.x - (player.rect.x + dx), obj.rect.y - (player.rect.y + dy))
+    return player.mask.overlap(obj.mask, offset)
 
-            collided_objects.append(obj)
 
-    return collided_objects
+def touching(player, grid, dx=0, dy=0):
+    """
+    The objects the player would overlap moved by (dx, dy), in grid order.
+    """
+    return [obj for obj in grid.query(player.rect.move(dx, dy)) if collide_mask_at(player, obj, dx, dy)]
 
 
-def collide(player, objects, dx):
+def push_out(player, grid, dy):
     """
-    Checks for horizontal collisions between the player and objects.
+    A new animation frame can start inside a tile. Puts the player on top of (or, going up,
+    under) what it is stuck in, like the old after-the-fact vertical pass did.
     """
-    player.move(dx, 0)
-    player.update()
-    collided_object = None
-    for obj in objects:
-        if pygame.sprite.collide_mask(player, obj):
-            collided_object = obj
-            break
+    for obj in touching(player, grid):
+        if dy >= 0:
+            player.rect.bottom = obj.rect.top
+        else:
+            player.rect.top = obj.rect.bottom
 
-    player.move(-dx, 0)
-    player.update()
-    return collided_object
 
+def move_and_collide(player, dx, dy, grid, masks):
+    """
+    Moves the player dx then dy whole pixels, each axis swept over the level masks up to the
+    first pixel that would touch something, so no speed can go through a tile.
+    Returns a Contact for every object that stopped the move. Only a stopped axis looks
+    objects up in the grid, a free move is one sweep per axis.
+    """
+    if masks.overlaps(player):
+        push_out(player, grid, dy)
+        if masks.overlaps(player):
+            # wedged in, let it move and sort itself out next tick
+            player.move(dx, dy)
+            return []
+
+    contacts = []
+    for step_x, step_y in ((dx, 0), (0, dy)):
+        moved, stopped = masks.sweep(player.mask, player.rect.x, player.rect.y, step_x, step_y)
+        if step_x:
+            player.rect.x += moved
+        else:
+            player.rect.y += moved
+        if stopped:
+            sign = 1 if step_x + step_y > 0 else -1
+            normal = (-sign, 0) if step_x else (0, -sign)
+            for obj in touching(player, grid, -normal[0], -normal[1]):
+                contacts.append(Contact(obj, normal))
+    return contacts
+
+
+def against_wall(player, grid, masks, dx):
+    """
+    True if the player moved by dx pixels sideways would touch something. Asked every tick,
+    a frog standing still against a wall has no contact from its move to say so.
+    """
+    if masks is not None:
+        return masks.overlaps(player, dx)
+    return bool(touching(player, grid, dx))
 
 
-def handle_move(player, objects):
+def handle_move(player, grid, keys=None, loudness=None, voice=None, masks=None, objects=None):
     '''
     Handles the movement of the player
     Remains keyboard input to convenient show
+    grid is the SpatialHash from load_level, it only holds collidable objects, masks its LevelMasks.
+    The move itself happened in player.loop, this reacts to its contacts and sets the velocity for the next tick
+    keys and loudness default to the live keyboard and microphone, headless runs pass their own
+    voice is whether a voice onset came in for this tick, None jumps on loudness_threshold instead
+    objects is the level's EntityRegistry, a stick the player touched is activated in it to shake
     '''
     global current_scene
     global death_trigger
     global death_time
-    objects = [obj for obj in objects if
-               not isinstance(obj, StartingPoint) and not isinstance(obj, FinishPoint) and not isinstance(obj,
-                                                                                                          Firework)]
     global scroll
-    keys = pygame.key.get_pressed()
+    if keys is None:
+        keys = pygame.key.get_pressed()
+    if loudness is None:
+        loudness = get_MIC.loudness
 
-    # check left and right if will collide
+    # pushing against a wall keeps the background still
     player.x_vel = 0
-    collide_left = collide(player, objects, -PLAYER_VEL * 2)
-    collide_right = collide(player, objects, PLAYER_VEL * 2)
+    collide_left = against_wall(player, grid, masks, -1)
+    collide_right = against_wall(player, grid, masks, 1)
 
     # move and handles the parallel background scroll
     if keys[pygame.K_LEFT] and not collide_left:
@@ -223,9 +319,10 @@ def handle_move(player, objects):
         if scroll < 6000:
             scroll += 5
 
-    if get_MIC.loudness > loudness_threshold and player.jump_count < 2:
+    jump = voice if voice is not None else loudness > loudness_threshold
+    if jump and player.jump_count < 2:
         player.jump()
-    if get_MIC.loudness > 5 and not collide_right:
+    if loudness > 5 and not collide_right:
         player.move_right(PLAYER_VEL)
         if scroll < 3000:
             scroll += 5
@@ -236,17 +333,17 @@ def handle_move(player, objects):
         death_trigger = True
         death_time = pygame.time.get_ticks()
 
-    vertical_collide = handle_vertical_collision(player, objects, player.y_vel)
-    to_check = [collide_left, collide_right, *vertical_collide]
-
     # collision interaction
-    for obj in to_check:
-        if obj and obj.name == "Spike":
+    for contact in player.contacts:
+        obj = contact.obj
+        if obj.name == "Spike":
             player.make_hit()
             death_trigger = True
             death_time = pygame.time.get_ticks()
-        elif obj and obj.name == "stick":
+        elif obj.name == "stick":
             obj.shaking = True
+            if objects is not None:
+                objects.activate(obj)
 
 
 def check_finish(player, finish_point):
@@ -256,38 +353,153 @@ def check_finish(player, finish_point):
     return pygame.sprite.collide_rect(player, finish_point)
 
 
-def GAME_SCENE(window):
+def game_tick(player, objects, grid, tile_layer, firework_obj, offset_x, keys=None, loudness=None, masks=None,
+              animations=None, voice=None):
+    """
+    Advances the game by one fixed tick. objects is the level's EntityRegistry,
+    returns it and the new camera offset.
+    keys, loudness and voice are handed to handle_move, grid and masks are what the player collides with,
+    animations is the level's AnimationStore.
+    """
     global current_scene
     global finished
-    global objects
-    global death_trigger
-    global death_time
     global finish_time
 
-    mic_icon = Icon(80, 80, "./assets/UI/mic_idle.png", "./assets/UI/mic_loud.png", scale_factor=1.1, shake_amplitude=8)
+    # after dying the frog falls through everything
+    if death_trigger:
+        player.loop(TICK_RATE)
+    else:
+        player.loop(TICK_RATE, grid, masks)
+    frame_profiler.lap(PLAYER)
+
+    # only the sticks handle_move made shake, not every stick of the level
+    for stick in objects.active_objects():
+        # a breaking stick leaves its baked chunk and the level masks so it can shake on its own
+        tile_layer.release(stick)
+        if masks is not None:
+            masks.release(stick)
+        stick.update(TICK_RATE)
+        if stick.broken:
+            objects.destroy(stick)
+    for trigger in objects.bucket(TRIGGER):
+        if not finished and check_finish(player, trigger):
+            finished = True
+            finish_time = pygame.time.get_ticks()
+
+    # when finished set on fireworks
+    if finished:
+        for obj in firework_obj:
+            obj.on()
+            obj.loop()
+    # every animated object of the level in one go, decorations out of sight wait until they are back
+    if animations is not None:
+        on_screen = tile_layer.visible(offset_x, (WINDOW_WIDTH, WINDOW_HEIGHT))
+        animations.step([obj.slot for obj in on_screen if isinstance(obj, Animated)])
+    frame_profiler.lap(OBJECTS)
+
+    if not death_trigger:
+        handle_move(player, grid, keys, loudness, voice, masks, objects)
+    elif death_trigger and pygame.time.get_ticks() - death_time > 1500:
+        current_scene = "RESTART_SCENE"
+    if finished and pygame.time.get_ticks() - finish_time > 1500:
+        current_scene = "RESTART_SCENE"
+
+    # camera scroll effect
+    if ((player.rect.right - offset_x >= WINDOW_WIDTH - SCROLL_AREA_WIDTH) and player.x_vel > 0) or (
+            (player.rect.left - offset_x <= SCROLL_AREA_WIDTH) and player.x_vel < 0):
+        offset_x += player.x_vel
+
+    # whatever broke this tick goes now, nothing is walking the buckets any more
+    for obj in objects.flush():
+        grid.remove(obj)
+        tile_layer.remove(obj)
+        if masks is not None:
+            masks.remove(obj)
+    frame_profiler.lap(HANDLE_MOVE)
+
+    return objects, offset_x
+
+
+def reset_level_globals():
+    """
+    Puts the module level game state back to the start of a level.
+    """
+    global finished, finish_time, death_trigger, death_time, scroll
+    finished = False
+    finish_time = None
+    death_trigger = False
+    death_time = None
+    scroll = 0
+
+
+def start_level(tmx_map=LEVEL_PATH):
+    """
+    Loads a level the first time it is played, after that restarts put the same objects
+    back the way they started. Returns the EntityRegistry to play with, the rest is in `level`.
+    """
+    global level, level_path
+    if level is None or level_path != tmx_map or isinstance(level, LevelStream) != stream_levels:
+        if isinstance(level, LevelStream):
+            level.close()
+        player = Player(*SPAWN, 32, 32)
+        # player = Player(50, 200, radius=16)
+        if stream_levels:
+            level = stream_level(player, tmx_map, WINDOW_WIDTH)
+        else:
+            level_objects, firework_obj, grid, masks, animations = load_level(tmx_map)
+            level = LevelSnapshot(player, level_objects, firework_obj, grid, ChunkedTileLayer(level_objects), masks,
+                                  animations)
+        level_path = tmx_map
+    objects_in_play = level.restore()
+    reset_level_globals()
+    return objects_in_play
+
+
+def GAME_SCENE(window):
+    global current_scene
+    global objects
+    global mic_icon
+
+    if mic_icon is None:
+        mic_icon = Icon(80, 80, "./assets/UI/mic_idle.png", "./assets/UI/mic_loud.png", scale_factor=1.1,
+                        shake_amplitude=8)
 
     clock = pygame.time.Clock()
-    bg_images, bg_width = get_background()
+    background = get_parallax_background()
 
-    player = Player(50, 200, 32, 32)
-    # player = Player(50, 200, radius=16)
-    tmx_map = "./Level/Level1_map.tmx"
-    objects, firework_obj = load_objects_from_tmx(tmx_map)
+    objects = start_level()
+    player, grid, tile_layer, firework_obj = level.player, level.grid, level.tile_layer, level.firework_objects
 
     offset_x = 0
-    scroll_area_width = 200
+    prev_offset_x, prev_scroll = offset_x, scroll
+    # wall time not simulated yet, in ms
+    accumulator = 0
+
+    # callback capture into a ring buffer, every frame reads what came in since the last one.
+    # It is already running after the first game, what was said in the menus does not count
+    get_MIC.start_capture()
+    get_MIC.skip_pending()
 
-    mic_thread_instance = threading.Thread(target=mic_thread, daemon=True)
-    mic_thread_instance.start()
+    recorder = None
+    if record_dir is not None:
+        recorder = InputRecorder(next_log_path(record_dir), level_path, TICK_RATE, loudness_threshold, voice_jump)
+    # SPACE presses since the last tick, the log has them with the next one
+    space_presses = 0
 
     run = True
     while run:
         if current_scene != "GAME_SCENE":
+            if recorder is not None:
+                recorder.close()
             return "RESTART_SCENE"
-        clock.tick(FPS)
-
-        loudness_tmp = get_MIC.loudness
-        if loudness_tmp > loudness_threshold:
+        accumulator += clock.tick(FPS)
+        frame_profiler.lap(WAIT)
+
+        # loudest moment since the last frame, so a short scream between frames is not lost
+        levels = get_MIC.read_levels()
+        loudness_tmp = levels.loudness
+        voice = levels.onset > 0 if voice_jump else None
+        if loudness_tmp > loudness_threshold or voice:
             mic_icon.set_state("loud2")
         elif loudness_tmp > 5:
             mic_icon.set_state("loud")
@@ -299,40 +511,50 @@ def GAME_SCENE(window):
                 run = False
                 break
 
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE and player.jump_count < 2:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                space_presses += 1
+                if player.jump_count < 2:
                     player.jump()
-
-        player.loop(FPS)
-
-        for obj in objects:
-            if isinstance(obj, BreakingStick) and obj.shaking:
-                # objects.remove(obj)
-                objects = obj.update(player, objects)
-            elif isinstance(obj, StartingPoint):
-                obj.loop()
-            elif isinstance(obj, FinishPoint):
-                obj.loop()
-                if not finished and check_finish(player, obj):
-                    finished = True
-                    finish_time = pygame.time.get_ticks()
-
-        draw(window, bg_images, bg_width, player, objects, firework_obj, offset_x)
+            frame_profiler.handle_event(event)
+        # the same for every tick of the frame, nothing reads new events in between
+        keys = pygame.key.get_pressed()
+        frame_profiler.lap(EVENTS)
+
+        # run as many fixed ticks as the elapsed time asks for, slow machines skip frames instead
+        ticks = 0
+        while accumulator >= TICK_MS and ticks < MAX_TICKS_PER_FRAME and current_scene == "GAME_SCENE":
+            prev_offset_x, prev_scroll = offset_x, scroll
+            level.update(offset_x)
+            objects, offset_x = game_tick(player, objects, grid, tile_layer, firework_obj, offset_x, keys,
+                                          loudness_tmp, level.masks, level.animations, voice)
+            if recorder is not None:
+                recorder.record(loudness_tmp, keys[pygame.K_LEFT], keys[pygame.K_RIGHT], space_presses, voice)
+            space_presses = 0
+            # an onset is one jump, unlike a loudness that lasts
+            if voice:
+                voice = False
+            accumulator -= TICK_MS
+            ticks += 1
+        if ticks == MAX_TICKS_PER_FRAME:
+            # too far behind to catch up, let the game slow down rather than spiral
+            accumulator = min(accumulator, TICK_MS)
+
+        # draw in between the last two ticks
+        alpha = min(accumulator / TICK_MS, 1)
+        render_offset_x = round(prev_offset_x + (offset_x - prev_offset_x) * alpha)
+        render_scroll = prev_scroll + (scroll - prev_scroll) * alpha
+        draw(window, background, player, tile_layer, firework_obj, render_offset_x, render_scroll, alpha)
+        frame_profiler.lap(DRAW)
         mic_icon.draw(window)
+        frame_profiler.lap(MIC_ICON)
+        frame_profiler.draw_overlay(window)
+        frame_profiler.mark()
         pygame.display.update()
+        frame_profiler.lap(DISPLAY)
+        frame_profiler.end_frame()
 
-        if not death_trigger:
-            handle_move(player, objects)
-        elif death_trigger and pygame.time.get_ticks() - death_time > 1500:
-            current_scene = "RESTART_SCENE"
-        if finished and pygame.time.get_ticks() - finish_time > 1500:
-            current_scene = "RESTART_SCENE"
-
-        # camera scroll effect
-        if ((player.rect.right - offset_x >= WINDOW_WIDTH - scroll_area_width) and player.x_vel > 0) or (
-                (player.rect.left - offset_x <= scroll_area_width) and player.x_vel < 0):
-            offset_x += player.x_vel
-
+    if recorder is not None:
+        recorder.close()
     pygame.quit()
     quit()
 
@@ -342,11 +564,11 @@ def START_SCENE():
     settings_button = Button(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 50, "Mic Set", button_sprite)
     background_image = pygame.image.load("./assets/Background/Whole_Background.png").convert()
     background_image = pygame.transform.scale2x(background_image)
+    # only buttons that change hover state get repainted, and it sleeps while nothing happens
+    painter = MenuPainter(window, background_image, [play_button, settings_button])
 
     while True:
-        window.blit(background_image, (0, 0))
-
-        for event in pygame.event.get():
+        for event in painter.events():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -359,11 +581,8 @@ def START_SCENE():
         play_button.check_hover()
         settings_button.check_hover()
 
-        play_button.draw(window)
-        settings_button.draw(window)
-
-        pygame.display.update()
-        clock.tick(FPS)
+        if painter.paint():
+            clock.tick(FPS)
 
 
 def RESTART_SCENE():
@@ -374,11 +593,13 @@ def RESTART_SCENE():
     global finished
     global finish_time
     text_context = 'YOU LOSE!' if death_trigger else 'YOU WON!'
-    text_surface = FONT.render(text_context, True, (255, 255, 255))
+    text_surface = RENDER_CACHE.text(text_context, FONT_SIZE, WHITE)
     text_rect = text_surface.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 150))
+    # the last frame of the level stays behind the buttons
+    painter = MenuPainter(window, window.copy(), [Label(text_surface, text_rect), restart_button, settings_button])
 
     while True:
-        for event in pygame.event.get():
+        for event in painter.events():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -398,12 +619,8 @@ def RESTART_SCENE():
         restart_button.check_hover()
         settings_button.check_hover()
 
-        window.blit(text_surface, text_rect)
-        restart_button.draw(window)
-        settings_button.draw(window)
-
-        pygame.display.update()
-        clock.tick(FPS)
+        if painter.paint():
+            clock.tick(FPS)
 
 
 def SETTING_SCENE():
@@ -415,15 +632,14 @@ def SETTING_SCENE():
     background_image = pygame.image.load("./assets/Background/Whole_Background.png").convert()
     background_image = pygame.transform.scale2x(background_image)
 
-    label_surface = FONT.render("Intensity", True, (255, 255, 255))
+    label_surface = RENDER_CACHE.text("Intensity", FONT_SIZE, WHITE)
 
     label_position = (slider.x + slider.width // 2 - label_surface.get_width() // 2,
                       slider.y - label_surface.get_height() - 50)
+    painter = MenuPainter(window, background_image, [slider, back_button, Label(label_surface, label_position)])
 
     while True:
-        window.blit(background_image, (0, 0))
-
-        for event in pygame.event.get():
+        for event in painter.events():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -434,12 +650,8 @@ def SETTING_SCENE():
 
         back_button.check_hover()
 
-        slider.draw(window)
-        back_button.draw(window)
-        window.blit(label_surface, label_position)
-
-        pygame.display.update()
-        clock.tick(FPS)
+        if painter.paint():
+            clock.tick(FPS)
 
 
 
@@ -447,6 +659,8 @@ def SETTING_SCENE():
 def main():
     global current_scene
     current_scene = "START_SCENE"
+    # one capture for the whole session, scenes only read from it
+    get_MIC.start_capture()
 
     while True:
         # print(loudness_threshold)
@@ -461,4 +675,26 @@ def main():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scream Frog")
+    parser.add_argument("--audio", help="audio source, e.g. mic, file:scream.wav or gen:bursts "
+                                        "(see audio_sources.py, default $SCREAM_FROG_AUDIO or mic)")
+    parser.add_argument("--profile", action="store_true",
+                        help="time every phase of the game loop, summary on exit and F3, overlay on F4")
+    parser.add_argument("--audio-process", action="store_true",
+                        help="capture and analyse audio in a child process (see audio_process.py)")
+    parser.add_argument("--voice-jump", action="store_true",
+                        help="jump on voice onsets in the 150-3400 Hz band instead of the loudness threshold")
+    parser.add_argument("--record", metavar="DIR",
+                        help="write the input of every level attempt to DIR/run-NNN.sfil, replay with headless.py")
+    parser.add_argument("--stream", action="store_true",
+                        help="load the level in chunks around the camera on a background thread")
+    args = parser.parse_args()
+    get_MIC.audio_spec = args.audio
+    voice_jump = args.voice_jump
+    record_dir = args.record
+    stream_levels = args.stream
+    if args.audio_process:
+        get_MIC.capture_mode = "process"
+    if args.profile:
+        frame_profiler.enable()
     main()
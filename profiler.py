@@ -0,0 +1,158 @@
+"""
+Per phase frame timings for GAME_SCENE
+
+Every phase of a frame ends with lap(PHASE), which adds the time since the
+previous lap (or mark) to that phase. end_frame() stores the frame in a
+preallocated ring of the last `capacity` frames. A disabled profiler returns
+straight away from every call, so it can stay in the loop.
+
+Turn it on with --profile or SCREAM_FROG_PROFILE=1 (0, false, no, off or
+empty leave it off). The summary is printed at exit and on F3, F4 toggles the
+overlay graph.
+"""
+import atexit
+import os
+import time
+
+import numpy as np
+import pygame
+
+WAIT, EVENTS, PLAYER, OBJECTS, HANDLE_MOVE, DRAW, MIC_ICON, DISPLAY = range(8)
+PHASE_NAMES = ("clock.tick", "events", "player.loop", "objects", "handle_move", "draw", "mic_icon.draw",
+               "display.update")
+PHASE_COLORS = ((60, 60, 60), (255, 220, 0), (0, 200, 0), (0, 150, 255), (255, 120, 0), (220, 0, 220),
+                (0, 230, 230), (255, 60, 60))
+
+ENV_VAR = "SCREAM_FROG_PROFILE"
+OFF_VALUES = ("", "0", "false", "no", "off")
+
+OVERLAY_SIZE = (240, 80)
+OVERLAY_MS = 33.3
+BUDGET_MS = 1000 / 60
+
+
+def enabled_by_env():
+    """
+    Whether SCREAM_FROG_PROFILE asks for profiling.
+    """
+    return os.environ.get(ENV_VAR, "").strip().lower() not in OFF_VALUES
+
+
+class FrameProfiler:
+    '''
+    Ring of per phase frame timings with p50 / p95 / p99 summaries and an optional overlay
+    '''
+
+    def __init__(self, capacity=3600, enabled=False):
+        self.capacity = capacity
+        self.samples = np.zeros((capacity, len(PHASE_NAMES)))
+        self.current = [0.0] * len(PHASE_NAMES)
+        self.frames = 0
+        self.enabled = False
+        self.show_overlay = False
+        self.overlay = None
+        self.last = time.perf_counter()
+        self.dump_registered = False
+        if enabled:
+            self.enable()
+
+    def enable(self):
+        self.enabled = True
+        self.last = time.perf_counter()
+        if not self.dump_registered:
+            atexit.register(self.dump)
+            self.dump_registered = True
+
+    def mark(self):
+        """
+        Starts timing from now without charging the time so far to any phase.
+        """
+        if not self.enabled:
+            return
+        self.last = time.perf_counter()
+
+    def lap(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        row = self.samples[self.frames % self.capacity]
+        row[:] = self.current
+        row *= 1000
+        self.frames += 1
+        self.current[:] = [0.0] * len(PHASE_NAMES)
+        if self.show_overlay:
+            self.add_overlay_column(row)
+        self.last = time.perf_counter()
+
+    def recorded(self):
+        """
+        The stored frames in ms, oldest first.
+        """
+        count = min(self.frames, self.capacity)
+        if self.frames <= self.capacity:
+            return self.samples[:count]
+        start = self.frames % self.capacity
+        return np.concatenate((self.samples[start:], self.samples[:start]))
+
+    def summary(self):
+        samples = self.recorded()
+        if not len(samples):
+            return "no frames profiled"
+        busy = samples[:, WAIT + 1:].sum(axis=1)
+        rows = [(name, samples[:, i]) for i, name in enumerate(PHASE_NAMES)]
+        rows += [("busy", busy), ("frame", samples.sum(axis=1))]
+
+        lines = [f"{len(samples)} frames, budget {BUDGET_MS:.1f} ms",
+                 f"{'phase':<16}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}  (ms)"]
+        for name, values in rows:
+            p50, p95, p99 = np.percentile(values, (50, 95, 99))
+            lines.append(f"{name:<16}{p50:>8.2f}{p95:>8.2f}{p99:>8.2f}{values.max():>8.2f}")
+        return "\n".join(lines)
+
+    def dump(self):
+        if self.frames:
+            print(self.summary())
+
+    def handle_event(self, event):
+        """
+        F3 prints the summary, F4 toggles the overlay (and turns profiling on).
+        """
+        if event.type != pygame.KEYDOWN:
+            return
+        if event.key == pygame.K_F3:
+            print(self.summary())
+        elif event.key == pygame.K_F4:
+            self.show_overlay = not self.show_overlay
+            if self.show_overlay and not self.enabled:
+                self.enable()
+
+    def add_overlay_column(self, row):
+        """
+        Scrolls the graph one column left and draws the newest frame as a stacked bar.
+        """
+        width, height = OVERLAY_SIZE
+        if self.overlay is None:
+            self.overlay = pygame.Surface(OVERLAY_SIZE, pygame.SRCALPHA)
+            self.overlay.fill((0, 0, 0, 160))
+        self.overlay.scroll(-2, 0)
+        self.overlay.fill((0, 0, 0, 160), (width - 2, 0, 2, height))
+
+        y = height
+        # the wait in clock.tick is headroom, not cost, leave it out of the bar
+        for phase in range(WAIT + 1, len(PHASE_NAMES)):
+            bar = int(row[phase] / OVERLAY_MS * height)
+            if bar:
+                y -= bar
+                self.overlay.fill(PHASE_COLORS[phase], (width - 2, max(y, 0), 2, bar))
+        budget_y = height - int(BUDGET_MS / OVERLAY_MS * height)
+        self.overlay.fill((255, 255, 255), (width - 2, budget_y, 2, 1))
+
+    def draw_overlay(self, win):
+        if self.show_overlay and self.overlay is not None:
+            win.blit(self.overlay, (win.get_width() - OVERLAY_SIZE[0] - 10, 10))
@@ -0,0 +1,725 @@
+"""
+Offline reachability analysis of a level
+
+Finding out whether a jump in Tiled is possible used to mean playing it.
+This searches every input the player has (left, right or neither, SPACE or
+not) tick by tick with the movement rules of Player.loop and handle_move:
+the same gravity ramp, the same Rect rounding, two jumps until landing, x
+then y swept up to the first solid pixel, death on a spike contact or below
+the window. The search is breadth first, so the first input sequence that
+touches the FinishPoint is the shortest one among the states it kept.
+
+CompiledLevel is what the search runs on. The level masks (tiles and spikes
+to the pixel) become a summed area table, so "is this box clear" is four
+lookups for any number of states at once, and the tiles become a grid for
+the report. The frog follows update_sprite's animation, every frame cut into
+one rect per pixel row, and a frame that starts inside a tile is pushed out
+like move_and_collide does. Gaps inside a row are filled and breaking sticks
+stay solid where they were loaded, so the shortest path is replayed through
+the real game_tick afterwards to check it.
+
+States are deduplicated in a packed visited bitmap over position (QUANTUM
+pixel cells), y velocity, jumps used and the x velocity handle_move set.
+Only the BEAM states nearest the FinishPoint sideways are kept each tick,
+which is what makes the search take seconds, --beam 0 keeps them all and
+splits each tick's frontier over a process pool once it is big enough to be
+worth sending. The search stops at the first tick that touches the
+FinishPoint.
+
+The search only ever proves a level completable. The bitmap merges
+positions within a QUANTUM cell and leaves out the fall counter (which
+changes gravity) and the animation counter (which changes the frame mask),
+so it drops states the game tells apart, and telling them apart blows up:
+with the fall and animation counters in the key, Level1 has a million new
+states by tick 25. A path it finds is replayed through game_tick, and only
+a replay that finishes makes the level completable.
+
+Everything negative comes from bound() instead, which over-approximates
+where the frog can be. Between two contacts with an object the frog flies
+free, and a frog that has just jumped, stands or falls can get no higher
+than one that starts fresh (standing, both jumps left) on the same pixel.
+So every object is a node, the frog leaves one it touches as a fresh frog,
+and it can get to another if the highest a fresh frog rises over their
+horizontal gap (max_rise(), collisions ignored) puts it next to it above
+the death line. A FinishPoint no node reaches is out of reach for any
+input, and so is a surface whose tile no node reaches. Nodes are swept in
+order of x, so the bound takes well under a second, however long the map.
+
+The exit status is 0 for a replayed path, 1 if bound() rules the
+FinishPoint out, 2 if neither is known. Level1 takes about 3 s on one core
+(13 s with --beam 0), the bound alone well under one.
+
+    python reachability.py Level/Level1_map.tmx
+    python reachability.py Level/Level1_map.tmx -j 4 --script shortest.txt
+    python reachability.py Level/Level1_map.tmx --bound-only
+"""
+import os
+
+# has to be set before pygame opens a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import multiprocessing
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+# visited bitmap cell size in pixels, under PLAYER_VEL or a walk would never leave its cell
+QUANTUM = 4
+# y velocities the bitmap tells apart, faster falls share the last bin
+VY_MIN, VY_MAX = -8, 31
+# room around the level the player can be in, the sky above it is where jumps go
+MARGIN = 128
+SKY = 400
+# children per tick before the frontier is worth splitting over the pool
+PARALLEL_MIN = 20000
+# states the search keeps per tick, the ones nearest the FinishPoint, 0 keeps every one
+BEAM = 2000
+# no jump / jump, then left / none / right for the next tick
+ACTIONS = [(jump, vx) for jump in (False, True) for vx in (-1, 0, 1)]
+# the sheets update_sprite picks from, the frog is only ever hit once it is dead
+SHEETS = ("idle", "run", "fall", "jump", "double_jump")
+IDLE, RUN, FALL, JUMP, DOUBLE_JUMP = range(len(SHEETS))
+LEFT, RIGHT = 0, 1
+
+# pixels a shaking BreakingStick moves away from where it was loaded
+SHAKE = 3
+
+# xv is the x velocity handle_move set in PLAYER_VEL, direction and count the animation of Player
+States = namedtuple("States", "x y vy fall jumps xv direction count")
+# completable is True for a replayed path, False if bound() rules the finish out and None if neither,
+# regions are (left, top, right, bottom) in level pixels
+Report = namedtuple("Report", "completable ticks script states unreachable verified")
+
+
+def to_array(mask):
+    """
+    A pygame Mask as a (height, width) bool array.
+    """
+    import pygame
+    return pygame.surfarray.array_red(mask.to_surface()).T > 0
+
+
+def summed_area(occupied):
+    """
+    Summed area table with a zero row and column in front. uint16 wraps, but the
+    difference of four entries is still exact for any box of fewer than 65536 pixels.
+    """
+    table = np.zeros((occupied.shape[0] + 1, occupied.shape[1] + 1), dtype=np.uint16)
+    np.cumsum(np.cumsum(occupied, axis=0, dtype=np.uint16), axis=1, dtype=np.uint16, out=table[1:, 1:])
+    return table
+
+
+def frame_bands(mask):
+    """
+    (left, top, right, bottom) of the pixels in every row of a mask, so a frame is the union
+    of its rows. Gaps inside a row are filled, empty rows are empty rects that never touch anything.
+    """
+    pixels = to_array(mask)
+    rects = []
+    for row, line in enumerate(pixels):
+        columns = np.flatnonzero(line)
+        rects.append((columns[0], row, columns[-1] + 1, row + 1) if len(columns) else (0, 0, 0, 0))
+    return rects
+
+
+class CompiledLevel:
+    '''
+    Everything the search needs from a level and the game rules, as plain arrays so pool workers can have it
+    '''
+
+    def __init__(self, solid, hazard, origin, tiles, tile_size, finish, spawn, frames, rules, contacts):
+        self.x0, self.y0 = origin
+        self.height, self.width = solid.shape
+        self.solid = summed_area(solid).ravel()
+        self.hazard = summed_area(hazard).ravel()
+        # (kind, load order) of every tile, kind 0 for none, 1 solid, 2 spike
+        self.tiles, self.order = tiles
+        self.tile_size = tile_size
+        # (left, top, right, bottom) of every FinishPoint
+        self.finish = np.asarray(finish, dtype=np.int64).reshape(-1, 4)
+        self.spawn = spawn
+        # frame ids of every (sheet, direction), how many there are, and the bands of every frame
+        self.sheet_frames, self.sheet_length, self.bands = frames
+        # bounding box of every frame, frogs whose box is clear skip the bands
+        used = (self.bands[..., 2] > self.bands[..., 0])[..., None]
+        big = np.iinfo(np.int64).max
+        self.boxes = np.stack((np.where(used, self.bands, big).min(axis=1)[:, :2],
+                               np.where(used, self.bands, -big).max(axis=1)[:, 2:]), axis=1).reshape(-1, 4)
+        self.gravity, self.fps, self.speed, self.jump_vel, self.delay, self.frame_size, self.death_y = rules
+        self.shape = (-(-self.width // QUANTUM), -(-self.height // QUANTUM), VY_MAX - VY_MIN + 1, 3, 3, 2)
+        # (left, top, right, bottom) of every object the frog collides with, as far as it ever moves,
+        # and the (row, column) of its tile
+        self.contacts, self.cells = (np.asarray(part, dtype=np.int64).reshape(-1, size)
+                                     for part, size in zip(contacts, (4, 2)))
+
+    def count(self, table, left, top, right, bottom):
+        """
+        Set pixels in each box, boxes reaching out of the level count what is inside.
+        """
+        left = np.clip(left - self.x0, 0, self.width)
+        right = np.clip(right - self.x0, 0, self.width)
+        top = np.clip(top - self.y0, 0, self.height)
+        bottom = np.clip(bottom - self.y0, 0, self.height)
+        # an empty or inside out box has nothing in it
+        right, bottom = np.maximum(right, left), np.maximum(bottom, top)
+        stride = self.width + 1
+        total = (table[bottom * stride + right] - table[top * stride + right]
+                 - table[bottom * stride + left] + table[top * stride + left])
+        return total.astype(np.int64)
+
+    def band_rects(self, x, y, frame):
+        """
+        Level pixel (left, top, right, bottom) of every band of every frog, each shaped (states, rows).
+        """
+        bands = self.bands[frame]
+        return (x[:, None] + bands[..., 0], y[:, None] + bands[..., 1],
+                x[:, None] + bands[..., 2], y[:, None] + bands[..., 3])
+
+    def overlaps(self, table, x, y, frame, dx=0, dy=0):
+        """
+        Whether the frogs moved by (dx, dy) touch anything in `table`, LevelMasks.overlaps for bands.
+        """
+        x, y = x + dx, y + dy
+        box = self.boxes[frame]
+        result = self.count(table, x + box[:, 0], y + box[:, 1], x + box[:, 2], y + box[:, 3]) > 0
+        near = np.flatnonzero(result)
+        left, top, right, bottom = self.band_rects(x[near], y[near], frame[near])
+        result[near] = (self.count(table, left, top, right, bottom) > 0).any(axis=1)
+        return result
+
+    def sweep(self, x, y, frame, move, horizontal):
+        """
+        Moves the frogs at (x, y) by `move` along one axis up to the first solid pixel,
+        returns (moved, stopped) like LevelMasks.sweep.
+        """
+        def hits(steps, index):
+            # the whole frame smeared first, only the frogs it touches something with test their rows
+            forward = move[index] > 0
+            box = self.boxes[frame[index]]
+            left, top = x[index] + box[:, 0], y[index] + box[:, 1]
+            right, bottom = x[index] + box[:, 2], y[index] + box[:, 3]
+            # the box is not clear to start with like the rows are, so all of it is smeared
+            if horizontal:
+                smeared = (np.where(forward, left, left - steps), top, np.where(forward, right + steps, right), bottom)
+            else:
+                smeared = (left, np.where(forward, top, top - steps), right, np.where(forward, bottom + steps, bottom))
+            result = self.count(self.solid, *smeared) > 0
+            near = np.flatnonzero(result)
+            if len(near) == 0:
+                return result
+            index, forward, steps = index[near], forward[near, None], steps[near, None]
+            left, top, right, bottom = self.band_rects(x[index], y[index], frame[index])
+            if horizontal:
+                smeared = (np.where(forward, right, left - steps), top, np.where(forward, right + steps, left), bottom)
+            else:
+                smeared = (left, np.where(forward, bottom, top - steps), right, np.where(forward, bottom + steps, top))
+            # every row is clear where it is, only what it moves over counts, an empty row stays empty
+            empty = (right == left) | (bottom == top)
+            result[near] = ((self.count(self.solid, *smeared) > 0) & ~empty).any(axis=1)
+            return result
+
+        moved = move.copy()
+        stopped = np.zeros(len(move), dtype=bool)
+        index = np.flatnonzero(move)
+        blocked = index[hits(np.abs(move[index]), index)]
+        if len(blocked):
+            stopped[blocked] = True
+            # hits only grows with steps, find the last clear step of every blocked frog at once
+            clear = np.zeros(len(blocked), dtype=np.int64)
+            far = np.abs(move[blocked])
+            while True:
+                open_ = far - clear > 1
+                if not open_.any():
+                    break
+                middle = (clear + far) // 2
+                hit = hits(middle, blocked) & open_
+                far = np.where(hit, middle, far)
+                clear = np.where(open_ & ~hit, middle, clear)
+            moved[blocked] = np.sign(move[blocked]) * clear
+        return moved, stopped
+
+    def push_out(self, x, y, frame, dy, index):
+        """
+        main.push_out for the frogs at `index`: on top of (going up, under) the last tile in load
+        order they are stuck in. Changes y in place.
+        """
+        size = self.tile_size
+        box = self.boxes[frame[index]]
+        box_left, box_top = x[index] + box[:, 0], y[index] + box[:, 1]
+        box_right, box_bottom = x[index] + box[:, 2], y[index] + box[:, 3]
+        best = np.full(len(index), -1, dtype=np.int64)
+        best_row = np.zeros(len(index), dtype=np.int64)
+        first_row, first_column = box_top // size, box_left // size
+        reach = -(-self.frame_size // size) + 1
+        for row_step in range(reach):
+            for column_step in range(reach):
+                row, column = first_row + row_step, first_column + column_step
+                inside = (row >= 0) & (row < self.tiles.shape[0]) & (column >= 0) & (column < self.tiles.shape[1])
+                row_in, column_in = np.where(inside, row, 0), np.where(inside, column, 0)
+                kind = np.where(inside, self.tiles[row_in, column_in], 0)
+                cell_left, cell_top = column * size, row * size
+                # the rows are only cut against the cells the whole frame has solid pixels in
+                near = np.flatnonzero((kind > 0) & (self.count(
+                    self.solid, np.maximum(box_left, cell_left), np.maximum(box_top, cell_top),
+                    np.minimum(box_right, cell_left + size), np.minimum(box_bottom, cell_top + size)) > 0))
+                left, top, right, bottom = self.band_rects(x[index[near]], y[index[near]], frame[index[near]])
+                cell_left, cell_top = cell_left[near, None], cell_top[near, None]
+                touching = np.zeros(len(index), dtype=bool)
+                touching[near] = (self.count(self.solid, np.maximum(left, cell_left), np.maximum(top, cell_top),
+                                             np.minimum(right, cell_left + size), np.minimum(bottom, cell_top + size))
+                                  > 0).any(axis=1)
+                order = np.where(touching, self.order[row_in, column_in], -1)
+                better = order > best
+                best = np.where(better, order, best)
+                best_row = np.where(better, row, best_row)
+        found = best >= 0
+        down = dy[index] >= 0
+        y[index] = np.where(found & down, best_row * size - self.frame_size,
+                            np.where(found & ~down, (best_row + 1) * size, y[index]))
+
+    def step(self, states, jump, vx):
+        """
+        One game tick of every state with its input: SPACE before the tick, Player.loop,
+        check_finish and handle_move with left/right. Returns (states, finished, dead).
+        """
+        x, y, vy, fall, jumps, xv, direction, count = (field.copy() for field in states)
+        # Player.jump
+        jump = jump & (jumps < 2)
+        vy[jump] = -self.jump_vel
+        jumps[jump] += 1
+        fall[jump & (jumps == 1)] = 0
+        count[jump] = 0
+
+        # Player.loop and update_sprite, a Rect rounds a float half away from zero
+        vy += np.minimum(1, (fall / self.fps) * self.gravity)
+        fall += 1
+        sheet = np.where(vy < 0, np.where(jumps == 1, JUMP, np.where(jumps == 2, DOUBLE_JUMP, IDLE)),
+                         np.where(vy > self.gravity * 2, FALL, np.where(xv != 0, RUN, IDLE)))
+        sheet = sheet * 2 + direction
+        frame = self.sheet_frames[sheet, (count // self.delay) % self.sheet_length[sheet]]
+        count += 1
+        target = y + vy
+        dy = np.where(target >= 0, np.floor(target + 0.5), np.ceil(target - 0.5)).astype(np.int64) - y
+        dx = xv.astype(np.int64) * self.speed
+
+        # move_and_collide, a frame that starts inside a tile is pushed out or left to sort itself out
+        stuck = np.flatnonzero(self.overlaps(self.solid, x, y, frame))
+        if len(stuck):
+            self.push_out(x, y, frame, dy, stuck)
+            wedged = stuck[self.overlaps(self.solid, x[stuck], y[stuck], frame[stuck])]
+        else:
+            wedged = stuck
+        free_dx, free_dy = dx[wedged], dy[wedged]
+        dx[wedged], dy[wedged] = 0, 0
+        moved_x, stopped_x = self.sweep(x, y, frame, dx, True)
+        x = x + moved_x
+        spiked = stopped_x & self.overlaps(self.hazard, x, y, frame, np.sign(dx), 0)
+        moved_y, stopped_y = self.sweep(x, y, frame, dy, False)
+        y = y + moved_y
+        spiked |= stopped_y & self.overlaps(self.hazard, x, y, frame, 0, np.sign(dy))
+        x[wedged] += free_dx
+        y[wedged] += free_dy
+        landed = stopped_y & (dy > 0)
+        fall[landed] = 0
+        vy[landed] = 0
+        jumps[landed] = 0
+
+        # check_finish is a Rect test on the whole frame
+        size = self.frame_size
+        finished = np.zeros(len(x), dtype=bool)
+        for left, top, right, bottom in self.finish:
+            finished |= (x < right) & (x + size > left) & (y < bottom) & (y + size > top)
+
+        # handle_move, a frog against a wall (1 px away, whether it moved or not) neither moves nor turns
+        pushing = np.flatnonzero(vx != 0)
+        blocked = np.zeros(len(x), dtype=bool)
+        blocked[pushing] = self.overlaps(self.solid, x[pushing], y[pushing], frame[pushing], vx[pushing], 0)
+        go_left = (vx < 0) & ~blocked
+        go_right = (vx > 0) & ~blocked
+        xv = np.where(go_right, 1, np.where(go_left, -1, 0)).astype(np.int8)
+        turned = (go_left & (direction == RIGHT)) | (go_right & (direction == LEFT))
+        count[turned] = 0
+        direction = np.where(go_right, RIGHT, np.where(go_left, LEFT, direction)).astype(np.int8)
+        dead = ~finished & (spiked | (y > self.death_y))
+        return States(x, y, vy, fall, jumps, xv, direction, count), finished, dead
+
+    def keys(self, states):
+        """
+        Flat visited bitmap index of every state, -1 for states outside the level's surroundings.
+        """
+        kx = (states.x - self.x0) // QUANTUM
+        ky = (states.y - self.y0) // QUANTUM
+        kv = np.clip(np.rint(states.vy), VY_MIN, VY_MAX).astype(np.int64) - VY_MIN
+        inside = (kx >= 0) & (kx < self.shape[0]) & (ky >= 0) & (ky < self.shape[1])
+        key = np.ravel_multi_index((np.where(inside, kx, 0), np.where(inside, ky, 0), kv, states.jumps,
+                                    states.xv + 1, states.direction), self.shape)
+        return np.where(inside, key, -1)
+
+
+def compile_level(level_path):
+    """
+    Loads a level and the game rules into a CompiledLevel.
+    """
+    import pygame
+    import main
+    from entities import SOLID, HAZARD, TRIGGER, categories_of
+    from level_cache import load_level
+    from sprite_loader import Spike, BreakingStick
+
+    objects, _, grid, masks, _ = load_level(level_path)
+    # the masks cover the tiles only, the level around them is open space
+    bounds = pygame.Rect(masks.origin, masks.masks[SOLID].get_size())
+    death_y = main.WINDOW_HEIGHT + 10
+    sprites = main.Player(*main.SPAWN, 32, 32).sprites
+    frame_size = sprites["idle_left"][0].get_height()
+    left = min(bounds.left, main.SPAWN[0]) - MARGIN
+    top = min(bounds.top, main.SPAWN[1]) - SKY
+    width = bounds.right + MARGIN - left
+    height = max(bounds.bottom, death_y + frame_size) + MARGIN - top
+
+    solid = np.zeros((height, width), dtype=bool)
+    hazard = np.zeros((height, width), dtype=bool)
+    ox, oy = bounds.left - left, bounds.top - top
+    solid[oy:oy + bounds.height, ox:ox + bounds.width] = to_array(masks.masks[SOLID]) | to_array(masks.masks[HAZARD])
+    hazard[oy:oy + bounds.height, ox:ox + bounds.width] = to_array(masks.masks[HAZARD])
+    for obj in masks.dynamic:
+        # whatever else collides blocks the way as it looks right now
+        x, y = obj.rect.x - left, obj.rect.y - top
+        solid[y:y + obj.rect.height, x:x + obj.rect.width] |= to_array(obj.mask)
+
+    collidable = [obj for obj in objects if obj in grid]
+    tile_size = max((obj.rect.width for obj in collidable), default=48)
+    shape = (-(-bounds.bottom // tile_size), -(-bounds.right // tile_size))
+    tiles, order = np.zeros(shape, dtype=np.int8), np.full(shape, -1, dtype=np.int64)
+    # the grid hands objects out in load order, push_out keeps the last one
+    for number, obj in enumerate(collidable):
+        tiles[obj.rect.y // tile_size, obj.rect.x // tile_size] = 2 if isinstance(obj, Spike) else 1
+        order[obj.rect.y // tile_size, obj.rect.x // tile_size] = number
+    contacts = [obj.rect.inflate(2 * SHAKE, 2 * SHAKE) if isinstance(obj, BreakingStick) else obj.rect
+                for obj in collidable]
+    contacts = ([(rect.left, rect.top, rect.right, rect.bottom) for rect in contacts],
+                [(obj.rect.y // tile_size, obj.rect.x // tile_size) for obj in collidable])
+
+    # every frame update_sprite can pick, as bands
+    bands, ids = [], {}
+    longest = max(len(sprites[f"{sheet}_left"]) for sheet in SHEETS)
+    sheet_frames = np.zeros((len(SHEETS) * 2, longest), dtype=np.int64)
+    sheet_length = np.zeros(len(SHEETS) * 2, dtype=np.int64)
+    for sheet_number, sheet in enumerate(SHEETS):
+        for direction, name in ((LEFT, "left"), (RIGHT, "right")):
+            frames = sprites[f"{sheet}_{name}"]
+            for number, frame in enumerate(frames):
+                if frame not in ids:
+                    ids[frame] = len(bands)
+                    bands.append(frame_bands(sprites.mask_of(frame)))
+                sheet_frames[sheet_number * 2 + direction, number] = ids[frame]
+            sheet_length[sheet_number * 2 + direction] = len(frames)
+
+    finish = [(obj.rect.left, obj.rect.top, obj.rect.right, obj.rect.bottom)
+              for obj in objects if TRIGGER in categories_of(obj)]
+    rules = (main.Player.GRAVITY, main.TICK_RATE, main.PLAYER_VEL, main.Player.GRAVITY * 8,
+             main.Player.ANIMATION_DELAY, frame_size, death_y)
+    return CompiledLevel(solid, hazard, (left, top), (tiles, order), tile_size, finish, main.SPAWN,
+                         (sheet_frames, sheet_length, np.array(bands, dtype=np.int64)), rules, contacts)
+
+
+def max_rise(level, drop):
+    """
+    The highest a fresh frog (standing, both jumps left) can be above where it started, with
+    collisions ignored, once it is `gap` pixels to either side, for every gap it gets to before
+    falling `drop` pixels. y is rounded half up the screen where a Rect rounds half away from
+    zero, so no frog the game plays gets higher.
+    """
+    # every (y, y velocity, fall counter, jumps used) there is after each tick, Player.jump and Player.loop
+    y, vy = np.zeros(1, dtype=np.int64), np.zeros(1)
+    fall, jumps = np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64)
+    rise = [0]
+    while len(y):
+        can = np.flatnonzero(jumps < 2)
+        jumped = jumps[can] + 1
+        y, vy = np.concatenate((y, y[can])), np.concatenate((vy, np.full(len(can), -float(level.jump_vel))))
+        fall, jumps = np.concatenate((fall, np.where(jumped == 1, 0, fall[can]))), np.concatenate((jumps, jumped))
+        vy = vy + np.minimum(1, (fall / level.fps) * level.gravity)
+        fall = fall + 1
+        y = np.ceil(y + vy - 0.5).astype(np.int64)
+        rise.append(int(-y.min()))
+        # below the death line from every start, the frog is dead
+        alive = np.flatnonzero(y <= drop)
+        unique = np.unique(np.stack((y[alive], vy[alive].view(np.int64), fall[alive], jumps[alive]), axis=1), axis=0)
+        y, vy, fall, jumps = unique[:, 0], unique[:, 1].copy().view(np.float64), unique[:, 2], unique[:, 3]
+    # x moves by at most `speed` a tick, so a gap is crossed by ceil(gap / speed) ticks, or any later one
+    highest = np.maximum.accumulate(np.array(rise)[::-1])[::-1]
+    return highest[-(-np.arange(level.speed * (len(rise) - 1) + 1) // level.speed)]
+
+
+def leads_to(level, rise, sources, targets):
+    """
+    Whether a fresh frog with its top left anywhere in `sources` can get to anywhere in `targets`
+    by max_rise without dying. Both are (left, top, right, bottom) with the right and bottom in,
+    the last axis of arrays that broadcast against each other.
+    """
+    gap = np.maximum(0, np.maximum(targets[..., 0] - sources[..., 2], sources[..., 0] - targets[..., 2]))
+    height = sources[..., 1] - rise[np.minimum(gap, len(rise) - 1)]
+    return (gap < len(rise)) & (np.maximum(height, targets[..., 1]) <= np.minimum(targets[..., 3], level.death_y))
+
+
+def bound(level):
+    """
+    Over-approximates where the frog can be from the spawn, as the module docstring explains.
+    Returns (whether any FinishPoint can be touched, grid of the tiles that can be touched).
+    """
+    size = level.frame_size
+    # the frog's top left when it is 1 pixel or less from an object, or on a FinishPoint
+    left, top, right, bottom = level.contacts.T
+    nodes = np.stack((left - size, top - size, right, bottom), axis=1)
+    left, top, right, bottom = level.finish.T
+    finish = np.stack((left - size + 1, top - size + 1, right - 1, bottom - 1), axis=1)
+    spawn = np.array([level.spawn[0], level.spawn[1], level.spawn[0], level.spawn[1]], dtype=np.int64)
+    rise = max_rise(level, level.death_y - min(nodes[:, 1].min(initial=spawn[1]), spawn[1]))
+
+    # a node only leads to the ones that start within the furthest a frog gets sideways
+    order = np.argsort(nodes[:, 0], kind="stable")
+    lefts = nodes[order, 0]
+    widest = int((nodes[:, 2] - nodes[:, 0]).max(initial=0))
+    reached = np.zeros(len(nodes), dtype=bool)
+    sources, queue = [spawn], [spawn]
+    while queue:
+        source = queue.pop()
+        first = np.searchsorted(lefts, source[0] - len(rise) - widest)
+        last = np.searchsorted(lefts, source[2] + len(rise), side="right")
+        near = order[first:last]
+        near = near[~reached[near]]
+        new = near[leads_to(level, rise, source, nodes[near])]
+        reached[new] = True
+        sources.extend(nodes[new])
+        queue.extend(nodes[new])
+
+    finishable = bool(leads_to(level, rise, np.array(sources)[:, None], finish[None]).any())
+    touched = np.zeros(level.tiles.shape, dtype=bool)
+    touched[level.cells[reached, 0], level.cells[reached, 1]] = True
+    return finishable, touched
+
+
+# the compiled level of a pool worker, set once when it starts
+worker_level = None
+
+
+def init_worker(level):
+    global worker_level
+    worker_level = level
+
+
+def step_chunk(args):
+    states, jump, vx = args
+    return worker_level.step(states, jump, vx)
+
+
+def take(states, index):
+    return States(*(field[index] for field in states))
+
+
+def join(parts):
+    return States(*(np.concatenate(fields) for fields in zip(*parts)))
+
+
+def expand(level, frontier, pool, processes):
+    """
+    Every state of the frontier under every input that makes a difference.
+    Returns (children, parent index, action index, finished, dead).
+    """
+    parents, actions = [], []
+    for action, (jump, vx) in enumerate(ACTIONS):
+        index = np.arange(len(frontier.x)) if not jump else np.flatnonzero(frontier.jumps < 2)
+        parents.append(index)
+        actions.append(np.full(len(index), action, dtype=np.uint8))
+    parent = np.concatenate(parents)
+    action = np.concatenate(actions)
+    states = take(frontier, parent)
+    jump = np.array([jump for jump, _ in ACTIONS])[action]
+    vx = np.array([vx for _, vx in ACTIONS], dtype=np.int8)[action]
+
+    if pool is None or len(parent) < PARALLEL_MIN:
+        children, finished, dead = level.step(states, jump, vx)
+    else:
+        bounds = np.linspace(0, len(parent), processes + 1).astype(int)
+        chunks = [(take(states, slice(a, b)), jump[a:b], vx[a:b]) for a, b in zip(bounds, bounds[1:])]
+        results = pool.map(step_chunk, chunks)
+        children = join([result[0] for result in results])
+        finished = np.concatenate([result[1] for result in results])
+        dead = np.concatenate([result[2] for result in results])
+    return children, parent, action, finished, dead
+
+
+def to_script(actions):
+    """
+    The headless script ticks for a list of action indices. A tick's SPACE comes before it,
+    its arrow keys set the x velocity of the tick after.
+    """
+    ticks = []
+    for action in actions:
+        jump, vx = ACTIONS[action]
+        ticks.append((0.0, vx < 0, vx > 0, int(jump)))
+    return ticks
+
+
+def spawn_state(level):
+    """
+    The player as start_level puts it in the level, facing left.
+    """
+    return States(np.array([level.spawn[0]], dtype=np.int64), np.array([level.spawn[1]], dtype=np.int64),
+                  np.zeros(1), np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int8), np.zeros(1, dtype=np.int8),
+                  np.full(1, LEFT, dtype=np.int8), np.zeros(1, dtype=np.int64))
+
+
+def finish_distance(level, states):
+    """
+    Pixels each frog is sideways from the nearest FinishPoint, 0 above or below one.
+    """
+    left, right = level.finish[:, 0], level.finish[:, 2]
+    x = states.x[:, None]
+    gap = np.maximum(0, np.maximum(left - (x + level.frame_size), x - right))
+    return gap.min(axis=1, initial=np.iinfo(np.int64).max)
+
+
+def search(level, processes=1, max_ticks=None, beam=BEAM):
+    """
+    Breadth first search from the spawn until the FinishPoint is touched or nothing new is reachable,
+    keeping the `beam` states nearest to it each tick (all of them for 0).
+    Returns (shortest action list or None, states visited).
+    """
+    visited = np.zeros(-(-int(np.prod(level.shape)) // 8), dtype=np.uint8)
+    frontier = spawn_state(level)
+    # parent and action of every state of every tick, to walk the shortest path back
+    layers = []
+    shortest = None
+    total = 1
+
+    pool = None
+    try:
+        tick = 0
+        while len(frontier.x) and (max_ticks is None or tick < max_ticks):
+            if pool is None and processes > 1 and len(frontier.x) * len(ACTIONS) >= PARALLEL_MIN:
+                # forking after pygame has started its threads can deadlock the workers, start them clean
+                pool = multiprocessing.get_context("spawn").Pool(processes, init_worker, (level,))
+            children, parent, action, finished, dead = expand(level, frontier, pool, processes)
+            if finished.any():
+                first = np.flatnonzero(finished)[0]
+                path = [action[first]]
+                index = parent[first]
+                for layer_parent, layer_action in reversed(layers):
+                    path.append(layer_action[index])
+                    index = layer_parent[index]
+                shortest = path[::-1]
+                break
+
+            alive = np.flatnonzero(~finished & ~dead)
+            children, parent, action = take(children, alive), parent[alive], action[alive]
+            keys = level.keys(children)
+            # first of every key in this tick, then only keys never seen before
+            keys, first = np.unique(keys, return_index=True)
+            fresh = (keys >= 0) & ((visited[np.maximum(keys, 0) >> 3] >> (np.maximum(keys, 0) & 7)) & 1 == 0)
+            keys, first = keys[fresh], first[fresh]
+            if beam and len(first) > beam:
+                nearest = np.argsort(finish_distance(level, take(children, first)), kind="stable")[:beam]
+                keys, first = keys[nearest], first[nearest]
+            np.bitwise_or.at(visited, keys >> 3, (1 << (keys & 7)).astype(np.uint8))
+
+            frontier = take(children, first)
+            layers.append((parent[first], action[first]))
+            total += len(first)
+            tick += 1
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return shortest, total
+
+
+def unreachable_regions(level, touched):
+    """
+    Runs of tiles on the same row with open space above that bound() says nobody can touch,
+    as (left, top, right, bottom) in level pixels. Spikes do not count as somewhere to stand.
+    """
+    tiles = level.tiles
+    above = np.vstack((np.zeros((1, tiles.shape[1]), dtype=tiles.dtype), tiles[:-1]))
+    missed = (tiles == 1) & (above == 0) & ~touched
+    regions = []
+    size = level.tile_size
+    for row, columns in enumerate(missed):
+        columns = np.flatnonzero(columns)
+        if not len(columns):
+            continue
+        # split where the columns stop being next to each other
+        for run in np.split(columns, np.flatnonzero(np.diff(columns) > 1) + 1):
+            regions.append((int(run[0]) * size, row * size, (int(run[-1]) + 1) * size, (row + 1) * size))
+    return regions
+
+
+def verify(level_path, script):
+    """
+    Plays a script through the real game_tick, returns headless.run_episode's (outcome, ticks).
+    """
+    import headless
+    return headless.run_episode(level_path, script, len(script) + 1)
+
+
+def analyse(level_path, processes=1, max_ticks=None, check=True, search_path=True, beam=BEAM):
+    """
+    Compiles and bounds a level, searches it unless the bound rules the FinishPoint out, returns a Report.
+    """
+    level = compile_level(level_path)
+    finishable, touched = bound(level)
+    shortest, total = search(level, processes, max_ticks, beam) if finishable and search_path else (None, 0)
+    script = to_script(shortest) if shortest is not None else None
+    verified = verify(level_path, script) if check and script is not None else None
+    if verified is not None and verified[0] == "finished":
+        completable = True
+    else:
+        completable = False if not finishable else None
+    return Report(completable, len(script) if script else None, script, total,
+                  unreachable_regions(level, touched), verified)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Check which parts of a level the frog can reach.")
+    parser.add_argument("level", help="path to the .tmx level")
+    parser.add_argument("-j", "--processes", type=int, default=os.cpu_count() or 1,
+                        help="worker processes, all cores by default, only a search without a beam uses them")
+    parser.add_argument("--beam", type=int, default=BEAM,
+                        help=f"states kept per tick, the ones nearest the FinishPoint, 0 keeps all (default {BEAM})")
+    parser.add_argument("--max-ticks", type=int, default=None, help="stop searching after this many ticks")
+    parser.add_argument("--script", help="write the shortest input sequence as a headless.py script")
+    parser.add_argument("--no-verify", action="store_true", help="do not replay the shortest path in the game")
+    parser.add_argument("--bound-only", action="store_true", help="only check what no input can reach, no search")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    report = analyse(args.level, args.processes, args.max_ticks, not args.no_verify, not args.bound_only,
+                     args.beam)
+    if report.states:
+        print(f"{report.states} states searched")
+    if report.script is not None:
+        print(f"path found in {report.ticks} ticks")
+        if report.verified is not None:
+            outcome, ticks = report.verified
+            print(f"replayed in the game: {outcome} after {ticks} ticks")
+        if args.script:
+            with open(args.script, "w") as f:
+                f.write(f"# shortest path found by reachability.py, {report.ticks} ticks\n")
+                for loudness, left, right, space in report.script:
+                    f.write(f"{loudness:g},{int(left)},{int(right)},{space}\n")
+    if report.completable:
+        print("completable")
+    elif report.completable is None:
+        print("unknown: no input is ruled out from reaching the FinishPoint, but no path was replayed to it")
+    else:
+        print("not completable: no input reaches the FinishPoint")
+    print(f"{len(report.unreachable)} surfaces no input reaches")
+    for left, top, right, bottom in report.unreachable:
+        print(f"  x {left}-{right}, y {top}")
+    sys.exit(0 if report.completable else 1 if report.completable is False else 2)
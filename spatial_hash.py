@@ -0,0 +1,94 @@
+from collections import defaultdict
+
+
+class SpatialHash:
+    '''
+    Uniform grid of the level, so collision only tests objects near the player
+    '''
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = defaultdict(list)
+        # remember where every object lives so removing it is cheap
+        self.object_cells = {}
+        # insertion order keeps query results in the same order as the objects list
+        self.order = {}
+        self.counter = 0
+
+    def __len__(self):
+        return len(self.object_cells)
+
+    def __contains__(self, obj):
+        return obj in self.object_cells
+
+    def __iter__(self):
+        """
+        Every object, in insertion order.
+        """
+        return iter(sorted(self.order, key=self.order.get))
+
+    def cell_range(self, rect):
+        """
+        Cell coordinates covered by a rect (right and bottom edges are exclusive).
+        """
+        size = self.cell_size
+        x1, y1 = rect.left // size, rect.top // size
+        x2, y2 = (rect.right - 1) // size, (rect.bottom - 1) // size
+        return x1, y1, x2, y2
+
+    def insert(self, obj):
+        if obj in self.object_cells:
+            return
+        x1, y1, x2, y2 = self.cell_range(obj.rect)
+        keys = [(cx, cy) for cx in range(x1, x2 + 1) for cy in range(y1, y2 + 1)]
+        for key in keys:
+            self.cells[key].append(obj)
+        self.object_cells[obj] = keys
+        self.order[obj] = self.counter
+        self.counter += 1
+
+    def remove(self, obj):
+        """
+        Removes an object from every cell it was put in, does nothing if it is not indexed.
+        """
+        keys = self.object_cells.pop(obj, None)
+        if keys is None:
+            return
+        del self.order[obj]
+        for key in keys:
+            cell = self.cells[key]
+            cell.remove(obj)
+            if not cell:
+                del self.cells[key]
+
+    def snapshot(self):
+        """
+        A copy of the index that restore() can go back to.
+        """
+        cells = {key: list(cell) for key, cell in self.cells.items()}
+        return cells, dict(self.object_cells), dict(self.order), self.counter
+
+    def restore(self, state):
+        """
+        Puts the index back as it was at snapshot(), insertion order included.
+        """
+        cells, object_cells, order, self.counter = state
+        self.cells = defaultdict(list, {key: list(cell) for key, cell in cells.items()})
+        self.object_cells = dict(object_cells)
+        self.order = dict(order)
+
+    def query(self, rect, margin=1):
+        """
+        Returns objects in the cells covered by rect plus `margin` neighbouring cells,
+        in insertion order.
+        """
+        x1, y1, x2, y2 = self.cell_range(rect)
+        found = {}
+        cells = self.cells
+        for cx in range(x1 - margin, x2 + margin + 1):
+            for cy in range(y1 - margin, y2 + margin + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    for obj in cell:
+                        found[obj] = self.order[obj]
+        return sorted(found, key=found.get)
@@ -1,58 +1,130 @@
 import pygame
-import time
 import math
 from os import listdir
 from os.path import isfile, join
 import random
+from types import MappingProxyType
 from pytmx import load_pygame
+from spatial_hash import SpatialHash
+from animation_store import AnimationStore
 
 finished = False
 
 def flip(sprites):
     return [pygame.transform.flip(sprite, True, False) for sprite in sprites]
 
+# every tile "type" property the levels use, level_cache stores them by position in this tuple
+TILE_TYPES = ("grassBlock", "stick", "Spike", "startingPoint", "FinishPoint", "dirtBlock", "fire", "firework")
+
+
+def read_tmx_tiles(tmx_data):
+    """
+    Yields (layer, x, y, tile_type) for every tile of the visible tile layers, in map order.
+    """
+    for index, layer in enumerate(layer for layer in tmx_data.visible_layers if hasattr(layer, "tiles")):
+        for x, y, surface in layer.tiles():
+            # Access tile properties
+            props = tmx_data.get_tile_properties_by_gid(layer.data[y][x])
+            tile_type = props.get("type", None) if props else None
+            yield index, x, y, tile_type
+
+
 def load_objects_from_tmx(tmx_file):
     tmx_data = load_pygame(tmx_file)
-    block_size = tmx_data.tilewidth
+    tiles = ((x, y, tile_type) for _, x, y, tile_type in read_tmx_tiles(tmx_data))
+    return build_level(tiles, tmx_data.tilewidth)
 
+
+def build_level(tiles, block_size):
+    """
+    Makes the level objects from (x, y, tile_type) tiles in map order.
+    Returns (objects, firework_objects, grid, masks, animations) like load_objects_from_tmx,
+    masks is the LevelMasks of everything in the grid, animations the AnimationStore
+    every animated object of the level plays in.
+    """
     objects = []
     firework_objects = []
+    # only the things the player can bump into go in the collision grid
+    grid = SpatialHash(block_size)
+    animations = AnimationStore()
+
+    for x, y, tile_type in tiles:
+        if tile_type == "grassBlock":
+            block = GrassBlock(x * block_size, y * block_size, block_size)
+            objects.append(block)
+        elif tile_type == "stick":
+            block = BreakingStick(x * block_size, y * block_size, block_size, block_size)
+            objects.append(block)
+        elif tile_type == "Spike":
+            block = Spike(x * block_size, y * block_size, block_size)
+            objects.append(block)
+        elif tile_type == "startingPoint":
+            block = StartingPoint(x * block_size, 500, 64, 64, animations)
+            objects.append(block)
+        elif tile_type == "FinishPoint":
+            block = FinishPoint(x * block_size, 364, 64, 64, animations)
+            objects.append(block)
+        elif tile_type == "dirtBlock":
+            block = DirtBlock(x * block_size, y * block_size, block_size)
+            objects.append(block)
+        elif tile_type == "fire":
+            fire = Fire(x * block_size, y * block_size - block_size, block_size, block_size, animations)
+            objects.append(fire)
+        elif tile_type == "firework":
+            block = Firework(x * block_size, 500, 256, 256, animations=animations)
+            firework_objects.append(block)
+
+    for obj in objects:
+        if not isinstance(obj, (StartingPoint, FinishPoint)):
+            grid.insert(obj)
+    # level_masks sorts objects by these classes, so it can only be imported once they exist
+    from level_masks import LevelMasks
+    masks = LevelMasks([obj for obj in objects if obj in grid], block_size)
+
+    return objects, firework_objects, grid, masks, animations
+
+class AnimationSet:
+    '''
+    The frames of one sprite folder plus a mask per frame, shared by every object
+    that animates with it. Frame lists are tuples, so nobody can change them for the others
+    '''
+
+    def __init__(self, sprites):
+        self.sprites = MappingProxyType({name: tuple(frames) for name, frames in sprites.items()})
+        self.masks = {frame: pygame.mask.from_surface(frame)
+                      for frames in self.sprites.values() for frame in frames}
+
+    def __getitem__(self, name):
+        return self.sprites[name]
+
+    def mask_of(self, frame):
+        """
+        Mask of one of this set's frames, computed once when the set was loaded.
+        """
+        return self.masks[frame]
+
+
+# process wide, keyed by (dir1, dir2, width, height, direction)
+ANIMATIONS = {}
+
+
+def load_animation_set(dir1, dir2, width, height, direction=False):
+    """
+    Cached version of load_sprite_sheets, every caller with the same arguments gets the same AnimationSet.
+    """
+    key = (dir1, dir2, width, height, direction)
+    animation = ANIMATIONS.get(key)
+    if animation is None:
+        animation = AnimationSet(slice_sprite_sheets(dir1, dir2, width, height, direction))
+        ANIMATIONS[key] = animation
+    return animation
 
-    for layer in tmx_data.visible_layers:
-        if hasattr(layer, "tiles"):
-            for x, y, surface in layer.tiles():
-                # Access tile properties
-                props = tmx_data.get_tile_properties_by_gid(layer.data[y][x])
-                tile_type = props.get("type", None) if props else None
-
-                if tile_type == "grassBlock":
-                    block = GrassBlock(x * block_size, y * block_size, block_size)
-                    objects.append(block)
-                elif tile_type == "stick":
-                    block = BreakingStick(x * block_size, y * block_size, block_size, block_size)
-                    objects.append(block)
-                elif tile_type == "Spike":
-                    block = Spike(x * block_size, y * block_size, block_size)
-                    objects.append(block)
-                elif tile_type == "startingPoint":
-                    block = StartingPoint(x * block_size, 500, 64, 64)
-                    objects.append(block)
-                elif tile_type == "FinishPoint":
-                    block = FinishPoint(x * block_size, 364, 64, 64)
-                    objects.append(block)
-                elif tile_type == "dirtBlock":
-                    block = DirtBlock(x * block_size, y * block_size, block_size)
-                    objects.append(block)
-                elif tile_type == "fire":
-                    fire = Fire(x * block_size, y * block_size - block_size, block_size, block_size)
-                    objects.append(fire)
-                elif tile_type == "firework":
-                    block = Firework(x * block_size, 500, 256, 256)
-                    firework_objects.append(block)
-
-    return objects, firework_objects
 
 def load_sprite_sheets(dir1, dir2, width, height, direction=False):
+    return load_animation_set(dir1, dir2, width, height, direction).sprites
+
+
+def slice_sprite_sheets(dir1, dir2, width, height, direction=False):
     path = join("assets", dir1, dir2)
     images = [f for f in listdir(path) if isfile(join(path, f))]
 
@@ -78,21 +150,55 @@ def load_sprite_sheets(dir1, dir2, width, height, direction=False):
     return all_sprites
 
 
+class TileRegistry:
+    '''
+    Flyweight store for tileset blocks: the tileset is decoded once and every
+    block of the same type shares one image and one mask
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.sheet = None
+        self.tiles = {}
+
+    def get(self, size, x, y):
+        """
+        Returns the shared (image, mask) of the size x size block at (x, y) in the tileset.
+        The image is shared, so never draw onto it.
+        """
+        key = (size, x, y)
+        tile = self.tiles.get(key)
+        if tile is None:
+            if self.sheet is None:
+                # convert_alpha needs a display, so only decode on first use
+                self.sheet = pygame.image.load(self.path).convert_alpha()
+            image = pygame.Surface((size, size), pygame.SRCALPHA, 32)
+            image.blit(self.sheet, (0, 0), pygame.Rect(x, y, size, size))
+            tile = (image, pygame.mask.from_surface(image))
+            self.tiles[key] = tile
+        return tile
+
+
+TILES = TileRegistry(join("Level", "Tilemap", "Level1_map.png"))
+
+
 def get_block(size, x, y):
-    path = join("Level", "Tilemap", "Level1_map.png")
-    image = pygame.image.load(path).convert_alpha()
-    surface = pygame.Surface((size, size), pygame.SRCALPHA, 32)
-    rect = pygame.Rect(x, y, size, size)
-    surface.blit(image, (0, 0), rect)
-    # return pygame.transform.scale2x(surface)
-    return surface
+    """
+    Shared image of a tileset block, see TileRegistry.
+    """
+    return TILES.get(size, x, y)[0]
 
 class Object(pygame.sprite.Sprite):
 
-    def __init__(self, x, y, width, height, name=None):
+    def __init__(self, x, y, width, height, name=None, image=None):
         super().__init__()
         self.rect = pygame.Rect(x, y, width, height)
-        self.image = pygame.Surface((width, height), pygame.SRCALPHA)
+        # blocks pass their shared tile image instead of getting a blank surface of their own,
+        # animated objects read theirs from their AnimationStore slot
+        if image is not None:
+            self.image = image
+        elif not isinstance(self, Animated):
+            self.image = pygame.Surface((width, height), pygame.SRCALPHA)
         self.width = width
         self.height = height
         self.name = name
@@ -101,95 +207,100 @@ class Object(pygame.sprite.Sprite):
         win.blit(self.image, (self.rect.x - offset_x, self.rect.y))
 
 
+class Animated:
+    '''
+    Mixin for objects animated by an AnimationStore, image is the frame their slot is on.
+    CULLED ones are decorations that only animate while on screen
+    '''
+    CULLED = True
+
+    def animate(self, animations, frames, delay, running=True):
+        """
+        Takes a slot in `animations` (a store of its own if None) playing `frames`.
+        """
+        self.animations = animations if animations is not None else AnimationStore(1)
+        self.slot = self.animations.add(frames, delay, running, self.CULLED)
+
+    @property
+    def image(self):
+        return self.animations.frame(self.slot)
+
+
 class GrassBlock(Object):
     def __init__(self, x, y, size):
-        super().__init__(x, y, size, size)
-        block = get_block(size, 96, 0)
-        self.image.blit(block, (0, 0))
-        self.mask = pygame.mask.from_surface(self.image)
+        image, self.mask = TILES.get(size, 96, 0)
+        super().__init__(x, y, size, size, image=image)
 
 
 class DirtBlock(Object):
     def __init__(self, x, y, size):
-        super().__init__(x, y, size, size)
-        block = get_block(size, 0, 192)
-        self.image.blit(block, (0, 0))
-        self.mask = pygame.mask.from_surface(self.image)
+        image, self.mask = TILES.get(size, 0, 192)
+        super().__init__(x, y, size, size, image=image)
 
 
-class Fire(Object):
+class Fire(Animated, Object):
     ANIMATION_DELAY = 3
 
-    def __init__(self, x, y, width, height):
+    def __init__(self, x, y, width, height, animations=None):
         super().__init__(x, y, width, height, "fire")
-        self.fire = load_sprite_sheets("Sprites", "Fire", width, height)
-        self.image = self.fire["off"][0]
-        self.mask = pygame.mask.from_surface(self.image)
-        self.animation_count = 0
+        self.fire = load_animation_set("Sprites", "Fire", width, height)
         self.animation_name = "off"
+        self.animate(animations, self.fire["off"], self.ANIMATION_DELAY)
+
+    @property
+    def mask(self):
+        return self.fire.mask_of(self.image)
 
     def on(self):
         self.animation_name = "on"
+        self.animations.play(self.slot, self.fire["on"])
 
     def off(self):
         self.animation_name = "off"
-
-    def loop(self):
-        sprites = self.fire[self.animation_name]
-        sprite_index = (self.animation_count //
-                        self.ANIMATION_DELAY) % len(sprites)
-        self.image = sprites[sprite_index]
-        self.animation_count += 1
-
-        self.rect = self.image.get_rect(topleft=(self.rect.x, self.rect.y))
-        self.mask = pygame.mask.from_surface(self.image)
-
-        if self.animation_count // self.ANIMATION_DELAY > len(sprites):
-            self.animation_count = 0
+        self.animations.play(self.slot, self.fire["off"])
 
 
 class BreakingStick(Object):
     def __init__(self, x, y, width, height):
-        super().__init__(x, y, width, height, "stick")
-
-        stick_sprite = get_block(width, 288, 0)
-        self.image = stick_sprite
-        self.mask = pygame.mask.from_surface(self.image)
+        image, self.mask = TILES.get(width, 288, 0)
+        super().__init__(x, y, width, height, "stick", image=image)
 
         self.shaking = False
         self.broken = False
         self.animation_count = 0
-        self.start_time = None
+        # ticks spent shaking, the stick breaks after half a second of them
+        self.shake_count = 0
         self.shake_f = 50
         # store the pos to avoid stick moving away
         self.original_x = x
         self.original_y = y
 
-    def update(self, player, obj):
-        """Handles accurate shaking and breaking behavior."""
+    def update(self, fps=60):
+        """
+        One tick of shaking and breaking, fps is the tick rate so every run shakes as long.
+        Whoever holds the stick takes it away once broken.
+        """
         if self.shaking:
-            if self.start_time is None: self.start_time = time.time()
-            elapsed_time = time.time() - self.start_time
-            if elapsed_time < 0.5:
+            if self.shake_count < fps // 2:
+                elapsed_time = self.shake_count / fps
                 shake_magnitude = 3
                 offset_x = int(shake_magnitude * math.sin(elapsed_time * self.shake_f))
                 offset_y = int(shake_magnitude * math.cos(elapsed_time * self.shake_f))
 
                 self.rect.x = self.original_x + offset_x
                 self.rect.y = self.original_y + offset_y
+                self.shake_count += 1
             else:
-                if self in obj:
-                    obj.remove(self)
                 self.break_stick()
         else:
             # Ensure stick returns to original position
             self.rect.x = self.original_x
             self.rect.y = self.original_y
-        return obj
 
     def break_stick(self):
         """Sets the stick to the broken state and removes it."""
-        del self
+        self.shaking = False
+        self.broken = True
 
 
 
@@ -198,91 +309,66 @@ class Spike(Object):
     Spike object that hurts
     '''
     def __init__(self, x, y, size):
-        super().__init__(x, y, size, size, "Spike")
-        block = get_block(size, 384, 0)
-        self.image.blit(block, (0, 0))
-        self.mask = pygame.mask.from_surface(self.image)
+        image, self.mask = TILES.get(size, 384, 0)
+        super().__init__(x, y, size, size, "Spike", image=image)
 
 
-class StartingPoint(Object):
+class StartingPoint(Animated, Object):
     '''
     The initial decoration with an arrow
     '''
     ANIMATION_DELAY = 3
 
-    def __init__(self, x, y, width, height):
+    def __init__(self, x, y, width, height, animations=None):
         super().__init__(x, y, width, height, "startPoint")
-        self.point = load_sprite_sheets("Sprites", "Start", width, height)
-        self.image = self.point["move"][0]
+        self.point = load_animation_set("Sprites", "Start", width, height)
         # self.mask = pygame.mask.from_surface(self.image)
-        self.animation_count = 0
         self.animation_name = "move"
+        self.animate(animations, self.point["move"], self.ANIMATION_DELAY)
 
-    def loop(self):
-        sprites = self.point[self.animation_name]
-        sprite_index = (self.animation_count // self.ANIMATION_DELAY) % len(sprites)
-        self.image = sprites[sprite_index]
-        self.animation_count += 1
-
-        if self.animation_count // self.ANIMATION_DELAY > len(sprites):
-            self.animation_count = 0
 
-
-class FinishPoint(Object):
+class FinishPoint(Animated, Object):
     '''
     The end check point
     '''
     ANIMATION_DELAY = 8
 
-    def __init__(self, x, y, width, height):
+    def __init__(self, x, y, width, height, animations=None):
         super().__init__(x, y, width, height, "EndPoint")
-        self.point = load_sprite_sheets("Sprites", "End", width, height)
-        self.image = self.point["move"][0]
-        self.animation_count = 0
+        self.point = load_animation_set("Sprites", "End", width, height)
         self.animation_name = "move"
-
-
-    def loop(self):
-        sprites = self.point[self.animation_name]
-        sprite_index = (self.animation_count // self.ANIMATION_DELAY) % len(sprites)
-        self.image = sprites[sprite_index]
-        self.animation_count += 1
-
+        self.animate(animations, self.point["move"], self.ANIMATION_DELAY)
+        # every frame is the same size
         self.rect = self.image.get_rect(topleft=(self.rect.x, self.rect.y))
 
-        if self.animation_count // self.ANIMATION_DELAY > len(sprites):
-            self.animation_count = 0
-
 
-class Firework(Object):
+class Firework(Animated, Object):
     ANIMATION_DELAY = 7
+    # not in the tile layer, it animates whenever it is on
+    CULLED = False
     type_num = 1
 
     global finished
 
-    def __init__(self, x, y, width, height, type_num=1):
+    def __init__(self, x, y, width, height, type_num=1, animations=None):
         super().__init__(x, y, width, height, "Firework")
-        self.point = load_sprite_sheets("Sprites", "Firework", width, height)
-        self.image = self.point[f"firework{type_num}"][0]
-        self.mask = pygame.mask.from_surface(self.image)
-        self.animation_count = 0
+        self.point = load_animation_set("Sprites", "Firework", width, height)
+        self.mask = self.point.mask_of(self.point[f"firework{type_num}"][0])
         self.animation_name = None
+        # still until the level is finished
+        self.animate(animations, self.point[f"firework{type_num}"], self.ANIMATION_DELAY, running=False)
 
     def on(self):
         self.animation_name = f"firework{self.type_num}"
+        self.animations.play(self.slot, self.point[self.animation_name])
 
     def loop(self):
+        """
+        Flies up and starts again from the bottom as another colour, the frames are up to the AnimationStore.
+        """
         if self.rect.y > 0:
             self.rect.y -= 15
         else:
             self.rect.y = 500
             self.type_num = random.randint(1, 3)
 
-        sprites = self.point[self.animation_name]
-        sprite_index = (self.animation_count // self.ANIMATION_DELAY) % len(sprites)
-        self.image = sprites[sprite_index]
-        self.animation_count += 1
-
-        if self.animation_count // self.ANIMATION_DELAY > len(sprites):
-            self.animation_count = 0
-
@@ -0,0 +1,11 @@
+"""
+The tests run the game with SDL's dummy drivers from the repository root, where the assets are.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
@@ -0,0 +1,102 @@
+"""
+GAME_SCENE itself, with a clock that says how much time every frame took and the scene ended after a few frames.
+"""
+import pytest
+
+import get_MIC
+import headless
+import main
+from input_log import load_log
+from sprite_loader import BreakingStick
+
+SCRIPT = "Level/scripts/level1_finish.txt"
+
+
+class FrameClock:
+    '''
+    Stands in for pygame.time.Clock, every tick() says the next of `frames` ms went by
+    '''
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.count = 0
+
+    def tick(self, framerate=0):
+        ms = self.frames[self.count % len(self.frames)]
+        self.count += 1
+        return ms
+
+
+@pytest.fixture
+def scene(monkeypatch):
+    """
+    enter(frames, stream) plays GAME_SCENE for len(frames) frames with those ms per frame, like "Again" does.
+    With `count` it plays that many frames, cycling through `frames`, or until the level is won or lost.
+    """
+    monkeypatch.setattr(get_MIC, "audio_spec", "gen:silence")
+    draw = main.draw
+
+    def enter(frames, stream=False, count=None):
+        drawn = []
+
+        def counted(*args, **kwargs):
+            draw(*args, **kwargs)
+            drawn.append(main.level.player.rect.topleft)
+            if len(drawn) == (count or len(frames)) or main.finished or main.death_trigger:
+                main.current_scene = "RESTART_SCENE"
+
+        monkeypatch.setattr(main, "draw", counted)
+        monkeypatch.setattr(main.pygame.time, "Clock", lambda: FrameClock(frames))
+        monkeypatch.setattr(main, "stream_levels", stream)
+        main.current_scene = "GAME_SCENE"
+        assert main.GAME_SCENE(main.window) == "RESTART_SCENE"
+        return drawn
+
+    yield enter
+    main.current_scene = "START_SCENE"
+
+
+@pytest.fixture
+def ticks(monkeypatch):
+    """
+    The player position after every game_tick, live or headless.
+    """
+    positions = []
+    game_tick = main.game_tick
+
+    def traced(player, *args, **kwargs):
+        result = game_tick(player, *args, **kwargs)
+        positions.append(player.rect.topleft)
+        return result
+
+    monkeypatch.setattr(main, "game_tick", traced)
+    return positions
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_restart_draws_before_the_first_tick(scene, stream):
+    # the first frame of every attempt comes in under TICK_MS, nothing has ticked when it is drawn
+    frames = [0] + [main.TICK_MS] * 40
+    first = scene(frames, stream)
+    for _ in range(3):
+        assert scene(frames, stream) == first
+    assert first[0] == main.SPAWN
+
+
+def test_replay_plays_like_the_live_run(scene, ticks, monkeypatch, tmp_path):
+    # the golden script as the microphone, read once per frame like the real one,
+    # on uneven frames that never run two ticks so every tick gets its own loudness
+    script = headless.load_script(SCRIPT)
+    monkeypatch.setattr(get_MIC, "read_levels", lambda: get_MIC.Levels(0.0, 0.0, script.get(len(ticks))[0], 0.0, 0.0))
+    monkeypatch.setattr(main, "record_dir", str(tmp_path))
+    scene([main.TICK_MS, 5, main.TICK_MS - 5, 0, 30, 2 * main.TICK_MS - 30], count=10000)
+    live = list(ticks)
+    assert main.finished
+    # the shake of a breaking stick is part of the run
+    assert any(isinstance(obj, BreakingStick) and obj not in main.level.entities for obj in main.level.objects)
+
+    ticks.clear()
+    log = load_log(str(next(tmp_path.iterdir())))
+    assert len(log) == len(live)
+    assert headless.run_episode(main.LEVEL_PATH, log) == ("finished", len(live))
+    assert ticks == live
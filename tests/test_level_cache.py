@@ -0,0 +1,47 @@
+"""
+The compiled level cache, when it is broken or written by many processes at once.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import main
+from level_cache import cache_path, compile_level, read_cache, source_files, write_cache
+
+
+@pytest.fixture
+def compiled():
+    return compile_level(main.LEVEL_PATH) + (source_files(main.LEVEL_PATH),)
+
+
+@pytest.mark.parametrize("keep", [0, 10, 100, 0.5])
+def test_a_cut_short_cache_is_compiled_again(tmp_path, compiled, keep):
+    types, block_size, sources = compiled
+    path = str(tmp_path / "Level1_map.npz")
+    write_cache(path, types, block_size, sources)
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:int(len(data) * keep) if isinstance(keep, float) else keep])
+    assert read_cache(path) is None
+
+    write_cache(path, types, block_size, sources)
+    cached_types, cached_block_size = read_cache(path)
+    assert np.array_equal(cached_types, types) and cached_block_size == block_size
+
+
+def test_writers_at_the_same_time_leave_a_whole_cache(tmp_path, compiled):
+    types, block_size, sources = compiled
+    path = str(tmp_path / os.path.basename(cache_path(main.LEVEL_PATH)))
+
+    # like the workers of headless.run_episodes on a fresh checkout, every one of them writes the cache
+    def write(_):
+        for _ in range(5):
+            write_cache(path, types, block_size, sources)
+            assert read_cache(path) is not None
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(write, range(8)))
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
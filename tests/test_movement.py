@@ -0,0 +1,39 @@
+"""
+handle_move on Level1, headless, with the player put down by hand next to what it has to deal with.
+"""
+import pygame
+import pytest
+
+import headless
+import main
+
+# standing on the grass left of the wall at x=1056, y=528
+NEAR_WALL = (985, 512)
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_holding_right_against_a_wall_keeps_the_camera_still(monkeypatch, stream):
+    monkeypatch.setattr(main, "stream_levels", stream)
+    headless.reset_game_state()
+    objects = main.start_level(main.LEVEL_PATH)
+    level = main.level
+    player = level.player
+    player.rect.topleft = NEAR_WALL
+    # the player well inside the right scroll area, every step right moves the camera
+    offset_x = player.rect.right - main.WINDOW_WIDTH + main.SCROLL_AREA_WIDTH // 2
+    keys = {pygame.K_LEFT: False, pygame.K_RIGHT: True}
+
+    ticks = []
+    for _ in range(60):
+        level.update(offset_x)
+        objects, offset_x = main.game_tick(player, objects, level.grid, level.tile_layer, level.firework_objects,
+                                           offset_x, keys, 0.0, level.masks, level.animations)
+        ticks.append((player.rect.topleft, player.x_vel, main.scroll, offset_x))
+
+    # it walks up to the wall, then stands there
+    assert ticks[-1][0][0] > NEAR_WALL[0]
+    stopped = ticks.index(ticks[-1])
+    assert stopped < 10
+    assert ticks[stopped:] == [ticks[-1]] * (len(ticks) - stopped)
+    assert ticks[-1][1] == 0
+    assert not main.death_trigger
@@ -0,0 +1,16 @@
+"""
+Turning the frame profiler on from the environment.
+"""
+import pytest
+
+import profiler
+
+
+@pytest.mark.parametrize("value, enabled", [(None, False), ("", False), ("0", False), ("false", False), ("Off", False),
+                                            ("no", False), ("1", True), ("yes", True), ("true", True)])
+def test_the_env_var_is_read_as_a_flag(monkeypatch, value, enabled):
+    if value is None:
+        monkeypatch.delenv(profiler.ENV_VAR, raising=False)
+    else:
+        monkeypatch.setenv(profiler.ENV_VAR, value)
+    assert profiler.enabled_by_env() == enabled
@@ -0,0 +1,58 @@
+"""
+The bound of reachability.py on Level1, and max_rise against the frog the game plays.
+"""
+import numpy as np
+import pygame
+import pytest
+
+import headless
+import main
+import reachability
+
+# high above every tile of Level1, the frog flies free there
+SKY = (main.SPAWN[0], -300)
+
+
+@pytest.fixture(scope="module")
+def level():
+    return reachability.compile_level(main.LEVEL_PATH)
+
+
+def test_bound_lets_level1_finish(level):
+    finishable, touched = reachability.bound(level)
+    assert finishable
+    assert reachability.unreachable_regions(level, touched) == []
+
+
+def test_bound_rules_out_a_finish_out_of_jumping_reach(level, monkeypatch):
+    monkeypatch.setattr(level, "finish", level.finish - [0, 1000, 0, 1000])
+    finishable, _ = reachability.bound(level)
+    assert not finishable
+
+
+@pytest.mark.parametrize("second_jump", [None, 1, 8, 20, 40])
+def test_max_rise_is_never_beaten_in_the_game(level, monkeypatch, second_jump):
+    monkeypatch.setattr(main, "stream_levels", False)
+    monkeypatch.setattr(main, "loudness_threshold", headless.DEFAULT_THRESHOLD)
+    headless.reset_game_state()
+    objects = main.start_level(main.LEVEL_PATH)
+    game = main.level
+    player = game.player
+    player.rect.topleft = SKY
+    keys = {pygame.K_LEFT: False, pygame.K_RIGHT: True}
+    rise = reachability.max_rise(level, level.death_y - SKY[1])
+
+    offset_x = 0
+    for tick in range(200):
+        if tick in (0, second_jump) and player.jump_count < 2:
+            player.jump()
+        objects, offset_x = main.game_tick(player, objects, game.grid, game.tile_layer, game.firework_objects,
+                                           offset_x, keys, 0.0, game.masks, game.animations)
+        gap, height = abs(player.rect.x - SKY[0]), SKY[1] - player.rect.y
+        # back down where the tiles are, the frog is not flying free any more
+        if height < 0:
+            break
+        assert gap < len(rise)
+        assert height <= rise[gap]
+    assert tick > 20
+    assert np.all(np.diff(rise) <= 0)
@@ -0,0 +1,146 @@
+import pygame
+from sprite_loader import GrassBlock, DirtBlock, Spike, BreakingStick
+from spatial_hash import SpatialHash
+
+# 16 tiles, wider than the window so at most two chunks are ever on screen
+CHUNK_WIDTH = 768
+# how far off screen an object still counts as visible, covers shaking sticks
+CULL_MARGIN = 96
+
+
+class ChunkedTileLayer:
+    '''
+    Bakes the static tiles of a level into wide chunk surfaces once,
+    so drawing the level is one or two blits instead of one per tile
+    '''
+    STATIC_TYPES = (GrassBlock, DirtBlock, Spike, BreakingStick)
+
+    def __init__(self, objects, chunk_width=CHUNK_WIDTH, margin=CULL_MARGIN, span=None):
+        self.chunk_width = chunk_width
+        self.margin = margin
+        self.chunks = {}
+        self.surfaces = {}
+        self.object_chunks = {}
+        # animated things and sticks that started breaking are drawn on top, the ones on screen every frame
+        self.dynamic = SpatialHash(chunk_width)
+
+        static = [obj for obj in objects if isinstance(obj, self.STATIC_TYPES)]
+        # a streamed level starts empty, it says how high its tiles go instead
+        if span is None:
+            span = (min((obj.rect.top for obj in static), default=0),
+                    max((obj.rect.bottom for obj in static), default=0))
+        self.top, self.bottom = span
+
+        for obj in objects:
+            if isinstance(obj, self.STATIC_TYPES):
+                first = obj.rect.left // chunk_width
+                last = (obj.rect.right - 1) // chunk_width
+                indexes = list(range(first, last + 1))
+                for index in indexes:
+                    self.chunks.setdefault(index, []).append(obj)
+                self.object_chunks[obj] = indexes
+            else:
+                self.dynamic.insert(obj)
+
+        for index in self.chunks:
+            self.bake(index)
+
+    def bake(self, index):
+        """
+        Redraws one chunk surface from the objects that are still in it.
+        """
+        self.surfaces[index] = self.render(index, self.chunks[index])
+
+    def render(self, index, objects):
+        """
+        A chunk surface with `objects` on it. Touches nothing of the layer, so a loader thread can call it.
+        """
+        surface = pygame.Surface((self.chunk_width, self.bottom - self.top), pygame.SRCALPHA)
+        chunk_x = index * self.chunk_width
+        for obj in objects:
+            surface.blit(obj.image, (obj.rect.x - chunk_x, obj.rect.y - self.top))
+        return surface
+
+    def add_chunk(self, index, objects, surface=None):
+        """
+        Adds the objects of one chunk of a streamed level, static ones have to lie inside it.
+        `surface` is their render() if it was made already.
+        """
+        static = []
+        for obj in objects:
+            if isinstance(obj, self.STATIC_TYPES):
+                static.append(obj)
+                self.object_chunks[obj] = [index]
+            else:
+                self.dynamic.insert(obj)
+        self.chunks[index] = static
+        self.surfaces[index] = surface if surface is not None else self.render(index, static)
+
+    def drop_chunk(self, index, objects):
+        """
+        Forgets a chunk added with add_chunk() and its objects, wherever they are drawn from now.
+        """
+        self.chunks.pop(index, None)
+        self.surfaces.pop(index, None)
+        for obj in objects:
+            self.object_chunks.pop(obj, None)
+            self.dynamic.remove(obj)
+
+    def release(self, obj):
+        """
+        Takes an object out of the baked chunks and draws it on its own from now on,
+        only the chunks that held it are baked again.
+        """
+        indexes = self.object_chunks.pop(obj, None)
+        if indexes is None:
+            return
+        for index in indexes:
+            self.chunks[index].remove(obj)
+            self.bake(index)
+        self.dynamic.insert(obj)
+
+    def remove(self, obj):
+        """
+        Stops drawing an object at all (e.g. a broken stick).
+        """
+        self.release(obj)
+        self.dynamic.remove(obj)
+
+    def snapshot(self):
+        """
+        The current chunks, a later bake() makes new surfaces so these stay as they are.
+        """
+        chunks = {index: list(objects) for index, objects in self.chunks.items()}
+        object_chunks = {obj: list(indexes) for obj, indexes in self.object_chunks.items()}
+        return chunks, dict(self.surfaces), object_chunks, self.dynamic.snapshot()
+
+    def restore(self, state):
+        """
+        Goes back to a snapshot() without baking anything again.
+        """
+        chunks, surfaces, object_chunks, dynamic = state
+        self.chunks = {index: list(objects) for index, objects in chunks.items()}
+        self.surfaces = dict(surfaces)
+        self.object_chunks = {obj: list(indexes) for obj, indexes in object_chunks.items()}
+        self.dynamic.restore(dynamic)
+
+    def visible(self, offset_x, size):
+        """
+        The dynamic objects within `margin` of a window of `size` scrolled to offset_x, in map order.
+        Only the cells around the window are looked at, however long the level is.
+        """
+        width, height = size
+        view = pygame.Rect(offset_x - self.margin, -self.margin, width + 2 * self.margin, height + 2 * self.margin)
+        return self.dynamic.query(view, margin=0)
+
+    def draw(self, win, offset_x=0):
+        # decorations go first, they sit behind the ground like they did in map order
+        for obj in self.visible(offset_x, win.get_size()):
+            obj.draw(win, offset_x)
+
+        first = offset_x // self.chunk_width
+        last = (offset_x + win.get_width() - 1) // self.chunk_width
+        for index in range(first, last + 1):
+            surface = self.surfaces.get(index)
+            if surface is not None:
+                win.blit(surface, (index * self.chunk_width - offset_x, self.top))
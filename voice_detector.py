@@ -0,0 +1,116 @@
+"""
+Voice onset detection
+
+calculate_loudness is RMS over every frequency, so a fan, a clap or the game
+coming out of the speakers is as loud to it as a scream. VoiceDetector only
+listens to the voice band. Every HOP samples it takes the last FRAME_SIZE
+samples through a Hann window and np.fft.rfft, all the windows of a chunk
+in one batch, and measures the energy between VOICE_BAND[0] and
+VOICE_BAND[1] Hz in dB.
+
+A noise floor follows that level, falling fast and rising slowly, so steady
+noise in the voice band (a fan, a hum) is soon part of the floor. A Trigger
+fires when the band level climbs ONSET_DB over the floor and most of the
+energy of the window is in the voice band. It stays quiet until the level has
+dropped back under RELEASE_DB over the floor. The time of a Trigger is the
+first loud sample of the newest hop, so it is finer than the chunk it came in.
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from audio_sources import SAMPLE_RATE
+
+FRAME_SIZE = 1024
+# 75 % overlap, one window per CALLBACK_SIZE block
+HOP = 256
+VOICE_BAND = (150.0, 3400.0)
+# dB over the noise floor to start a trigger, and to end one
+ONSET_DB = 12.0
+RELEASE_DB = 6.0
+# quieter than this (dB of the mean square, a full scale sine is -3) is never a voice
+MIN_DB = -45.0
+# share of the window's energy that has to be in the voice band
+VOICE_RATIO = 0.5
+# seconds for the noise floor to move most of the way down, and up
+FLOOR_FALL = 0.05
+FLOOR_RISE = 2.0
+
+# time is time.perf_counter() of the onset, level the band level in dB, snr how far it is over the floor
+Trigger = namedtuple("Trigger", "time level snr")
+
+
+class VoiceDetector:
+    '''
+    Streams mono float32 chunks of any length in, hands voice onsets back as Triggers
+    '''
+
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_size=FRAME_SIZE, hop=HOP, band=VOICE_BAND):
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.hop = hop
+        self.window = np.hanning(frame_size).astype(np.float32)
+        frequencies = np.fft.rfftfreq(frame_size, 1 / sample_rate)
+        self.band = (frequencies >= band[0]) & (frequencies <= band[1])
+        # one sided spectrum of the windowed samples back to the mean square of the signal
+        self.scale = 2 / (frame_size * float(np.sum(self.window.astype(np.float64) ** 2)))
+        self.fall = 1 - math.exp(-hop / sample_rate / FLOOR_FALL)
+        self.rise = 1 - math.exp(-hop / sample_rate / FLOOR_RISE)
+        self.reset()
+
+    def reset(self):
+        # the history the next window overlaps with, silence before the first chunk
+        self.buffer = np.zeros(self.frame_size - self.hop, dtype=np.float32)
+        self.floor = None
+        self.active = False
+
+    def levels(self, frames):
+        """
+        Voice band level in dB and the voice band share of the energy of every window, a row each.
+        """
+        spectrum = np.fft.rfft(frames * self.window, axis=1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        band = power[:, self.band].sum(axis=1)
+        # DC is an offset of the microphone, not a sound
+        total = power[:, 1:].sum(axis=1)
+        level = 10 * np.log10(band * self.scale + 1e-12)
+        return level, band / np.maximum(total, 1e-12)
+
+    def process(self, block, end_time=0.0):
+        """
+        Triggers of a chunk that ends at `end_time`, usually none and rarely more than one.
+        """
+        data = np.concatenate((self.buffer, np.asarray(block, dtype=np.float32)))
+        count = (len(data) - self.frame_size) // self.hop + 1
+        if count <= 0:
+            self.buffer = data
+            return []
+        frames = sliding_window_view(data, self.frame_size)[:count * self.hop:self.hop]
+        level, ratio = self.levels(frames)
+        self.buffer = data[count * self.hop:]
+
+        triggers = []
+        floor, active = self.floor, self.active
+        if floor is None:
+            floor = float(level[0])
+        # the floor depends on the one before, the rest of the work is done per batch above
+        for i, (db, share) in enumerate(zip(level.tolist(), ratio.tolist())):
+            if active:
+                active = db > floor + RELEASE_DB
+            elif db > floor + ONSET_DB and db > MIN_DB and share > VOICE_RATIO:
+                active = True
+                triggers.append(Trigger(self.onset_time(data, i, end_time), db, db - floor))
+            floor += (db - floor) * (self.fall if db < floor else self.rise)
+        self.floor, self.active = floor, active
+        return triggers
+
+    def onset_time(self, data, i, end_time):
+        """
+        perf_counter time of the first sample of window i's newest hop that is at least half its peak.
+        """
+        end = i * self.hop + self.frame_size
+        newest = np.abs(data[end - self.hop:end])
+        first = end - self.hop + int(np.argmax(newest >= newest.max() / 2))
+        return end_time - (len(data) - 1 - first) / self.sample_rate